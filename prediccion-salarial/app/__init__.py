@@ -2,6 +2,8 @@
 app/__init__.py - Inicialización de la aplicación Flask
 """
 
+import logging
+import time
 import warnings
 from flask import Flask
 from flask_cors import CORS
@@ -16,6 +18,8 @@ def create_app(config_name='default'):
     """
     from config import get_config
 
+    started = time.perf_counter()
+
     # Crear aplicación Flask
     app = Flask(__name__)
 
@@ -24,25 +28,47 @@ def create_app(config_name='default'):
     app.config.from_object(app_config)
     app.secret_key = app_config.SECRET_KEY
 
+    # Logging estructurado (JSON, escritura en un hilo aparte)
+    from app.utils.logger import setup_logging, parse_levels
+    setup_logging(app_config.LOG_LEVEL, parse_levels(app_config.LOG_LEVELS), app_config.LOG_FORMAT)
+
+    # Respuestas JSON con orjson (o json de la librería estándar)
+    from app.utils.json_provider import configure_json_provider
+    configure_json_provider(app)
+
     # Configurar CORS para desarrollo con frontend separado
     CORS(app, resources={
         r"/api/*": {"origins": app_config.FRONT_ORIGIN}
     })
 
+    # Carga del modelo (memory-mapped o pickle) y backend de inferencia
+    from app.models.predictor import configure_model_loading, configure_inference_backend
+    configure_model_loading(mmap=app_config.MODEL_MMAP)
+    configure_inference_backend(app_config.INFERENCE_BACKEND)
+
+    # Servicio de inferencia: cache, micro-batching y pool de puntuación
+    from app.models.service import configure_inference_service
+    configure_inference_service(app_config)
+
+    # Almacén de predicciones (compartido por API y vistas)
+    from app.models.store import init_prediction_store
+    init_prediction_store(app_config)
+
     # Registrar blueprints
     from app.routes import views, api
     app.register_blueprint(views)
     app.register_blueprint(api)
 
-    # Inicializar cache de estadísticas del modelo
-    with app.app_context():
-        try:
-            from app.models.predictor import _PREDICTOR_AVAILABLE
-            if _PREDICTOR_AVAILABLE:
-                print("[INFO] Calculando estadísticas con el modelo...")
-                from app.utils.helpers import calculate_average_salaries_from_model
-                calculate_average_salaries_from_model()
-        except Exception as e:
-            print(f"[WARNING] No se pudieron calcular estadísticas: {e}")
+    # Carga del modelo: perezosa por defecto (primera predicción), anticipada
+    # si MODEL_EAGER_LOAD está activo. La carga calcula también las estadísticas
+    if app_config.MODEL_EAGER_LOAD:
+        from app.models.predictor import warm_up
+        warm_up()
+
+    # Recarga en caliente del modelo al cambiar data/ (si está configurada)
+    from app.models.registry import configure_model_registry
+    configure_model_registry(app_config)
+
+    logging.getLogger(__name__).info("Aplicación creada en %.3fs", time.perf_counter() - started)
 
     return app
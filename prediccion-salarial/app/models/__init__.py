@@ -3,10 +3,35 @@ Módulo de modelos
 """
 
 from app.models.predictor import (
+    ModelVersion,
     predict_one,
     load_meta,
-    MODEL,
-    _PREDICTOR_AVAILABLE
+    get_model,
+    get_active_model,
+    is_predictor_available,
+    ensure_model_loaded,
+    warm_up,
+    preload_for_fork,
+    export_mmap_artifact
+)
+
+from app.models.registry import (
+    ModelRegistry,
+    ModelReloadInProgress,
+    get_model_registry
+)
+
+from app.models.service import (
+    InferenceService,
+    PredictionCache,
+    get_inference_service
+)
+
+from app.models.store import (
+    PredictionStore,
+    MemoryPredictionStore,
+    SQLitePredictionStore,
+    get_prediction_store
 )
 
 from app.models.schema import (
@@ -15,10 +40,26 @@ from app.models.schema import (
 )
 
 __all__ = [
+    'ModelVersion',
     'predict_one',
     'load_meta',
-    'MODEL',
-    '_PREDICTOR_AVAILABLE',
+    'get_model',
+    'get_active_model',
+    'is_predictor_available',
+    'ensure_model_loaded',
+    'warm_up',
+    'preload_for_fork',
+    'export_mmap_artifact',
+    'ModelRegistry',
+    'ModelReloadInProgress',
+    'get_model_registry',
+    'InferenceService',
+    'PredictionCache',
+    'get_inference_service',
+    'PredictionStore',
+    'MemoryPredictionStore',
+    'SQLitePredictionStore',
+    'get_prediction_store',
     'PredictRequest',
     'PredictResponse'
 ]
@@ -0,0 +1,132 @@
+"""
+batching.py - Agrupación dinámica de peticiones (micro-batching)
+
+Las peticiones que llegan dentro de una ventana corta (p.ej. 2 ms, hasta 64
+filas) se apilan y se puntúan con una sola llamada al modelo; cada petición
+espera su resultado en un Future durante un tiempo acotado (TimeoutError si
+el despachador se atasca).
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from app.utils.metrics import record_microbatch
+
+
+class MicroBatcher:
+    """
+    Coalescedor de peticiones con un hilo despachador.
+
+    `score_batch` recibe la lista de elementos encolados y devuelve un
+    resultado por elemento, en el mismo orden. `timeout` (segundos) es la
+    espera máxima por defecto de submit().
+    """
+
+    def __init__(self, score_batch: Callable[[List[Any]], Sequence[Any]],
+                 window_ms: float = 2.0, max_batch: int = 64, timeout: float = 5.0):
+        self.score_batch = score_batch
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+        # Métricas
+        self.requests = 0
+        self.batches = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.batch_sizes: Dict[int, int] = {}
+
+    def _ensure_worker(self):
+        # El hilo no sobrevive a un fork: se relanza en cada proceso
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._thread = threading.Thread(target=self._run, name='microbatcher', daemon=True)
+                self._pid = os.getpid()
+                self._thread.start()
+
+    def submit(self, item: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Encola un elemento y bloquea hasta tener su resultado, como mucho
+        `timeout` segundos (por defecto self.timeout). Al agotarse lanza
+        TimeoutError y el elemento ya no se puntúa si seguía en la cola.
+        """
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise TimeoutError(f"Sin respuesta del micro-batcher en {timeout:g} s") from None
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        # Las peticiones que ya agotaron su espera no se puntúan
+        batch = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        started = time.perf_counter()
+        self._record(len(batch), [started - enqueued for _, _, enqueued in batch])
+
+        try:
+            results = self.score_batch([item for item, _, _ in batch])
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+
+        for (_, future, _), result in zip(batch, results):
+            future.set_result(result)
+
+    def _record(self, size: int, waits: List[float]):
+        bucket = 1
+        while bucket < size:
+            bucket *= 2
+        with self._lock:
+            self.requests += size
+            self.batches += 1
+            self.total_wait += sum(waits)
+            self.max_wait = max(self.max_wait, max(waits))
+            self.batch_sizes[bucket] = self.batch_sizes.get(bucket, 0) + 1
+        record_microbatch(size, waits)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "window_ms": self.window * 1000.0,
+                "max_batch": self.max_batch,
+                "timeout": self.timeout,
+                "queue_depth": self._queue.qsize(),
+                "requests": self.requests,
+                "batches": self.batches,
+                "avg_batch_size": round(self.requests / self.batches, 2) if self.batches else 0.0,
+                "batch_size_histogram": {f"<={size}": count
+                                         for size, count in sorted(self.batch_sizes.items())},
+                "avg_wait_ms": round(self.total_wait / self.requests * 1000.0, 3) if self.requests else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000.0, 3)
+            }
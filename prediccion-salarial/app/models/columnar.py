@@ -0,0 +1,158 @@
+"""
+columnar.py - Validación por columnas para entradas masivas
+
+validate_columns aplica a un DataFrame completo las mismas reglas que
+PredictRequest (campos obligatorios y por defecto, rangos numéricos y
+valores admitidos de los campos categóricos) con máscaras vectorizadas de
+NumPy/pandas, sin crear un objeto Pydantic por fila. Devuelve las filas
+válidas con los tipos que espera InferenceService.predict_records y un
+informe de errores con una fila por (fila de entrada, campo).
+
+Las reglas se leen de PredictRequest.model_fields, así que un cambio en el
+esquema se aplica también aquí.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.models.schema import CATEGORICAL_VALUES, PredictRequest
+
+# Valores de texto aceptados en la columna practicas (los de Pydantic y "sí")
+TRUE_VALUES = {'1', 'true', 't', 'yes', 'y', 'on', 'si', 'sí', 's'}
+FALSE_VALUES = {'0', 'false', 'f', 'no', 'n', 'off'}
+
+ERROR_COLUMNS = ['row', 'field', 'error', 'value']
+
+
+def _numeric_ranges() -> Dict[str, Tuple[float, float]]:
+    """Campo numérico -> (mínimo, máximo) según las restricciones ge/le del esquema"""
+    ranges = {}
+    for name, field in PredictRequest.model_fields.items():
+        if field.annotation is not float:
+            continue
+        bounds = {'ge': -np.inf, 'le': np.inf}
+        for constraint in field.metadata:
+            for bound in bounds:
+                if getattr(constraint, bound, None) is not None:
+                    bounds[bound] = float(getattr(constraint, bound))
+        ranges[name] = (bounds['ge'], bounds['le'])
+    return ranges
+
+
+NUMERIC_RANGES = _numeric_ranges()
+
+# Campos que se puntúan, en el orden de PredictRequest (sin nombre)
+FIELDS = [name for name in PredictRequest.model_fields if name != 'nombre']
+
+# Alias camelCase del formulario -> nombre del campo
+COLUMN_ALIASES = {
+    field.alias: name
+    for name, field in PredictRequest.model_fields.items()
+    if field.alias and field.alias != name
+}
+
+
+@dataclass
+class ColumnarValidation:
+    """Resultado de validate_columns"""
+    frame: pd.DataFrame
+    valid: np.ndarray
+    errors: pd.DataFrame
+
+    @property
+    def n_invalid(self) -> int:
+        return int((~self.valid).sum())
+
+    def features(self) -> pd.DataFrame:
+        """Filas válidas traducidas a las columnas en inglés de MODEL.predict"""
+        from app.utils.helpers import translate_features_batch_to_english
+        return translate_features_batch_to_english(self.frame)
+
+
+def _parse_bool(column: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """practicas -> (valores bool, máscara de valores no reconocidos)"""
+    if pd.api.types.is_bool_dtype(column):
+        return column.to_numpy(dtype=bool, copy=True), np.zeros(len(column), dtype=bool)
+    if pd.api.types.is_numeric_dtype(column):
+        array = column.to_numpy(dtype=np.float64)
+        return array == 1, ~np.isin(array, (0, 1))
+
+    # Texto: se clasifican solo los valores distintos (unos pocos) y se
+    # expanden con los códigos de factorize
+    codes, uniques = pd.factorize(column)
+    text = [str(value).strip().lower() for value in uniques]
+    is_true = np.append(np.isin(text, list(TRUE_VALUES)), False)
+    is_false = np.append(np.isin(text, list(FALSE_VALUES)), False)
+    return is_true[codes], ~(is_true | is_false)[codes]
+
+
+def validate_columns(data: pd.DataFrame) -> ColumnarValidation:
+    """
+    Valida `data` (columnas en snake_case o con los alias camelCase del
+    formulario). Una columna ausente toma el valor por defecto del campo, o
+    lanza ValueError si el campo es obligatorio; las celdas vacías de los
+    campos con valor por defecto también lo toman.
+
+    Devuelve un ColumnarValidation con `frame` (solo las filas válidas, con
+    el índice original), `valid` (máscara sobre las filas de entrada) y
+    `errors` (columnas row, field, error, value; row es la posición de la
+    fila en `data`).
+    """
+    source = data.rename(columns=COLUMN_ALIASES)
+    missing = [name for name in FIELDS
+               if name not in source.columns and PredictRequest.model_fields[name].is_required()]
+    if missing:
+        raise ValueError(f"Faltan columnas en la entrada: {missing}")
+
+    n_rows = len(source)
+    columns: Dict[str, Any] = {}
+    failures = []
+
+    def fail(name: str, error: str, mask: np.ndarray, values: pd.Series):
+        rows = np.flatnonzero(mask)
+        if len(rows):
+            failures.append(pd.DataFrame({'row': rows, 'field': name, 'error': error,
+                                          'value': values.iloc[rows].astype(str).to_numpy()}))
+
+    for name in FIELDS:
+        field = PredictRequest.model_fields[name]
+        if name not in source.columns:
+            columns[name] = np.full(n_rows, field.default)
+            continue
+
+        raw = source[name]
+        absent = raw.isna().to_numpy()
+        if field.is_required():
+            fail(name, 'missing', absent, raw)
+
+        if name in NUMERIC_RANGES:
+            array = pd.to_numeric(raw, errors='coerce').to_numpy(dtype=np.float64, copy=True)
+            fail(name, 'float_parsing', np.isnan(array) & ~absent, raw)
+            if not field.is_required():
+                array[absent] = field.default
+            low, high = NUMERIC_RANGES[name]
+            fail(name, 'greater_than_equal', array < low, raw)
+            fail(name, 'less_than_equal', array > high, raw)
+            columns[name] = array
+        elif name in CATEGORICAL_VALUES:
+            allowed = raw.isin(CATEGORICAL_VALUES[name]).to_numpy()
+            fail(name, 'literal_error', ~allowed & ~absent, raw)
+            columns[name] = raw.to_numpy()
+        else:
+            array, unknown = _parse_bool(raw)
+            fail(name, 'bool_parsing', unknown & ~absent, raw)
+            if not field.is_required():
+                array[absent] = field.default
+            columns[name] = array
+
+    errors = (pd.concat(failures, ignore_index=True).sort_values(['row'], kind='stable',
+                                                                   ignore_index=True)
+              if failures else pd.DataFrame(columns=ERROR_COLUMNS))
+    valid = np.ones(n_rows, dtype=bool)
+    valid[errors['row'].to_numpy(dtype=np.intp)] = False
+
+    frame = pd.DataFrame(columns, index=source.index)[valid]
+    return ColumnarValidation(frame=frame, valid=valid, errors=errors)
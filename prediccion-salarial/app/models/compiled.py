@@ -0,0 +1,417 @@
+"""
+compiled.py - Motor de inferencia compilado a arrays NumPy planos
+
+Compila el Pipeline entrenado (ColumnTransformer + RandomForest) en:
+- CompiledPreprocessor: one-hot / escalado / passthrough como operaciones
+  vectorizadas sobre columnas NumPy
+- CompiledForest: todos los árboles concatenados en arrays planos
+  (feature, threshold, hijos, valor) recorridos a la vez para todo el lote
+
+Las operaciones reproducen exactamente las de sklearn (X en float32 comparado
+con umbrales float64, suma secuencial de los árboles), así que las
+predicciones son idénticas a MODEL.predict. Con una tabla de predicciones
+(app.models.lookup) las filas codificadas se resuelven con una búsqueda.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Filas por bloque en el recorrido de los árboles (acota la memoria de n × árboles)
+DEFAULT_CHUNK_SIZE = 8192
+
+
+# --------------------------------------------------------------------------
+# --- PREPROCESADOR ---
+# --------------------------------------------------------------------------
+
+class CompiledPreprocessor:
+    """
+    ColumnTransformer compilado. Cada bloque escribe en un rango de columnas
+    de la matriz de salida, en el mismo orden que get_feature_names_out().
+    """
+
+    def __init__(self, blocks: List[Dict[str, Any]], n_features_out: int):
+        self.blocks = blocks
+        self.n_features_out = n_features_out
+
+    @classmethod
+    def from_column_transformer(cls, transformer) -> 'CompiledPreprocessor':
+        from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder, StandardScaler
+
+        input_names = list(getattr(transformer, 'feature_names_in_', []))
+        blocks = []
+        offset = 0
+
+        for name, step, columns in transformer.transformers_:
+            columns = [input_names[c] if isinstance(c, (int, np.integer)) else c
+                       for c in np.atleast_1d(columns).tolist()]
+            if step == 'drop' or len(columns) == 0:
+                continue
+
+            if step == 'passthrough':
+                blocks.append({'kind': 'passthrough', 'columns': columns, 'offset': offset})
+                offset += len(columns)
+
+            elif isinstance(step, StandardScaler):
+                blocks.append({
+                    'kind': 'scale',
+                    'columns': columns,
+                    'offset': offset,
+                    'mean': step.mean_ if step.with_mean else None,
+                    'scale': step.scale_ if step.with_std else None
+                })
+                offset += len(columns)
+
+            elif isinstance(step, OneHotEncoder):
+                if step.drop_idx_ is not None or getattr(step, 'infrequent_categories_', None) is not None:
+                    raise NotImplementedError(f"OneHotEncoder con drop/infrequent no soportado ({name})")
+                categories = [_sorted_categories(c) for c in step.categories_]
+                blocks.append({
+                    'kind': 'onehot',
+                    'columns': columns,
+                    'offset': offset,
+                    'categories': categories,
+                    'ignore_unknown': step.handle_unknown != 'error'
+                })
+                offset += sum(len(c[0]) for c in categories)
+
+            elif isinstance(step, OrdinalEncoder):
+                if step.handle_unknown != 'error':
+                    raise NotImplementedError(f"OrdinalEncoder con handle_unknown no soportado ({name})")
+                blocks.append({
+                    'kind': 'ordinal',
+                    'columns': columns,
+                    'offset': offset,
+                    'categories': [_sorted_categories(c) for c in step.categories_]
+                })
+                offset += len(columns)
+
+            else:
+                raise NotImplementedError(f"Transformador no soportado: {type(step).__name__} ({name})")
+
+        return cls(blocks, offset)
+
+    def transform(self, frame) -> np.ndarray:
+        """Transforma un DataFrame (o dict de columnas) a la matriz de features"""
+        n_rows = len(frame[self.blocks[0]['columns'][0]]) if self.blocks else len(frame)
+        X = np.zeros((n_rows, self.n_features_out), dtype=np.float64)
+
+        for block in self.blocks:
+            offset = block['offset']
+            kind = block['kind']
+
+            if kind in ('passthrough', 'scale'):
+                values = np.column_stack([np.asarray(frame[c], dtype=np.float64)
+                                          for c in block['columns']])
+                if kind == 'scale':
+                    if block['mean'] is not None:
+                        values = values - block['mean']
+                    if block['scale'] is not None:
+                        values = values / block['scale']
+                X[:, offset:offset + values.shape[1]] = values
+
+            elif kind == 'onehot':
+                rows = np.arange(n_rows)
+                for column, categories in zip(block['columns'], block['categories']):
+                    codes, known = _encode(np.asarray(frame[column]), categories)
+                    if not known.all() and not block['ignore_unknown']:
+                        raise ValueError(f"Categoría desconocida en '{column}'")
+                    X[rows[known], offset + codes[known]] = 1.0
+                    offset += len(categories[0])
+
+            elif kind == 'ordinal':
+                for i, (column, categories) in enumerate(zip(block['columns'], block['categories'])):
+                    codes, known = _encode(np.asarray(frame[column]), categories)
+                    if not known.all():
+                        raise ValueError(f"Categoría desconocida en '{column}'")
+                    X[:, offset + i] = codes
+
+        return X
+
+
+def _sorted_categories(categories: np.ndarray):
+    """Devuelve (categorías, orden) para buscar con searchsorted"""
+    categories = np.asarray(categories)
+    order = np.argsort(categories, kind='stable')
+    return categories, order
+
+
+def _encode(values: np.ndarray, sorted_categories):
+    """
+    Índice de cada valor dentro de las categorías del encoder y máscara de
+    valores conocidos, sin pasar por dicts de Python.
+    """
+    categories, order = sorted_categories
+    ordered = categories[order]
+    try:
+        position = np.searchsorted(ordered, values)
+    except TypeError:
+        # Tipos no comparables (p.ej. números frente a strings): todo desconocido
+        return np.zeros(len(values), dtype=np.intp), np.zeros(len(values), dtype=bool)
+
+    position = np.minimum(position, len(ordered) - 1)
+    known = ordered[position] == values
+    return order[position], np.asarray(known, dtype=bool)
+
+
+# --------------------------------------------------------------------------
+# --- TABLAS DE CODIFICACIÓN DESDE EL PAYLOAD EN ESPAÑOL ---
+# --------------------------------------------------------------------------
+
+# Campo numérico del payload validado -> columna en inglés
+NUMERIC_FIELDS = {
+    'edad': 'Age',
+    'anios_desde_obtencion': 'Years_Since_Graduation',
+    'nota_media': 'GPA_10',
+    'practicas': 'Internship_Experience'
+}
+
+
+class EncodingTable:
+    """
+    Tablas precompiladas que llevan el payload validado (en español)
+    directamente a la fila de features del bosque, sin traducir strings ni
+    construir DataFrames. Se derivan de get_feature_names_out() al cargar.
+
+    - categóricas: valor del formulario -> (columna de salida, valor)
+    - numéricas: columna de salida + media/escala del StandardScaler
+    """
+
+    def __init__(self, n_features_out: int, categorical: Dict[str, Dict[str, tuple]],
+                 numeric: List[tuple]):
+        self.n_features_out = n_features_out
+        self.categorical = categorical
+        self.numeric = numeric
+
+    @classmethod
+    def from_pipeline(cls, column_transformer, compiled: 'CompiledPreprocessor') -> 'EncodingTable':
+        from app.models.schema import CATEGORICAL_VALUES
+        from app.utils.helpers import CATEGORICAL_FIELDS, translate_category
+
+        # Nombre de salida sin el prefijo del transformador ("cat__Gender_Male" -> "Gender_Male")
+        names = [name.split('__', 1)[-1] for name in column_transformer.get_feature_names_out()]
+        position = {name: i for i, name in enumerate(names)}
+        blocks = {column: block for block in compiled.blocks for column in block['columns']}
+
+        categorical = {}
+        for field, values in CATEGORICAL_VALUES.items():
+            column = CATEGORICAL_FIELDS[field][0]
+            block = blocks.get(column)
+            if block is None or block['kind'] not in ('onehot', 'ordinal'):
+                raise NotImplementedError(f"Columna categórica sin codificador compilable: {column}")
+
+            table = {}
+            for value in values:
+                english = translate_category(field, value)
+                if block['kind'] == 'onehot':
+                    index = position.get(f"{column}_{english}")
+                    if index is None and not block['ignore_unknown']:
+                        continue
+                    # Categoría desconocida ignorada por el encoder: fila a ceros
+                    table[value] = (index, 1.0) if index is not None else None
+                else:
+                    categories, _ = block['categories'][block['columns'].index(column)]
+                    matches = np.flatnonzero(categories == english)
+                    if len(matches):
+                        table[value] = (position[column], float(matches[0]))
+            categorical[field] = table
+
+        numeric = []
+        for field, column in NUMERIC_FIELDS.items():
+            block = blocks.get(column)
+            if block is None or block['kind'] not in ('passthrough', 'scale'):
+                raise NotImplementedError(f"Columna numérica sin transformación compilable: {column}")
+            i = block['columns'].index(column)
+            mean = block['mean'][i] if block.get('mean') is not None else None
+            scale = block['scale'][i] if block.get('scale') is not None else None
+            numeric.append((field, position[column], mean, scale))
+
+        return cls(compiled.n_features_out, categorical, numeric)
+
+    def encode(self, data: Dict[str, Any]) -> Optional[np.ndarray]:
+        """
+        Fila (1, n_features) para el bosque a partir del payload validado.
+        Devuelve None si algún valor no está en las tablas (usar la vía general).
+        """
+        row = np.zeros((1, self.n_features_out), dtype=np.float64)
+
+        for field, table in self.categorical.items():
+            try:
+                entry = table[data[field]]
+            except KeyError:
+                return None
+            if entry is not None:
+                row[0, entry[0]] = entry[1]
+
+        for field, index, mean, scale in self.numeric:
+            value = float(data[field])
+            if mean is not None:
+                value = value - mean
+            if scale is not None:
+                value = value / scale
+            row[0, index] = value
+
+        return row
+
+
+# --------------------------------------------------------------------------
+# --- BOSQUE ---
+# --------------------------------------------------------------------------
+
+class CompiledForest:
+    """
+    Árboles de regresión concatenados en arrays planos. Las hojas apuntan a
+    sí mismas, así que el recorrido es un bucle sin ramas de max_depth pasos
+    sobre todas las filas y todos los árboles a la vez.
+    """
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray,
+                 right: np.ndarray, value: np.ndarray, roots: np.ndarray, max_depth: int):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @classmethod
+    def from_estimator(cls, estimator) -> 'CompiledForest':
+        from sklearn.ensemble import ExtraTreesRegressor, RandomForestRegressor
+        from sklearn.tree import DecisionTreeRegressor
+
+        if isinstance(estimator, (RandomForestRegressor, ExtraTreesRegressor)):
+            trees = [e.tree_ for e in estimator.estimators_]
+        elif isinstance(estimator, DecisionTreeRegressor):
+            trees = [estimator.tree_]
+        else:
+            raise NotImplementedError(f"Estimador no soportado: {type(estimator).__name__}")
+
+        if any(t.n_outputs != 1 for t in trees):
+            raise NotImplementedError("Solo se soportan modelos de una salida")
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        for tree in trees:
+            node_ids = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+            values.append(tree.value[:, 0, 0])
+            roots.append(offset)
+            offset += tree.node_count
+
+        return cls(
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.intp),
+            right=np.concatenate(rights).astype(np.intp),
+            value=np.concatenate(values).astype(np.float64),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max(t.max_depth for t in trees)
+        )
+
+    def leaves(self, X: np.ndarray) -> np.ndarray:
+        """Índice de la hoja alcanzada en cada árbol: matriz (filas, árboles)"""
+        # sklearn evalúa los árboles con X en float32 frente a umbrales float64
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(X.shape[0])[:, None]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], self.n_trees)).copy()
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def tree_predictions(self, X: np.ndarray, chunk_size: int = DEFAULT_CHUNK_SIZE) -> np.ndarray:
+        """Predicción de cada árbol para cada fila: matriz (filas, árboles)"""
+        out = np.empty((X.shape[0], self.n_trees), dtype=np.float64)
+        for start in range(0, X.shape[0], chunk_size):
+            stop = start + chunk_size
+            out[start:stop] = self.value[self.leaves(X[start:stop])]
+        return out
+
+    def predict(self, X: np.ndarray, chunk_size: int = DEFAULT_CHUNK_SIZE) -> np.ndarray:
+        out = np.empty(X.shape[0], dtype=np.float64)
+        for start in range(0, X.shape[0], chunk_size):
+            stop = start + chunk_size
+            per_tree = self.value[self.leaves(X[start:stop])]
+            # Suma secuencial árbol a árbol (cumsum) como hace sklearn, no por pares
+            out[start:stop] = np.cumsum(per_tree, axis=1)[:, -1] / self.n_trees
+        return out
+
+
+# --------------------------------------------------------------------------
+# --- PIPELINE COMPLETO ---
+# --------------------------------------------------------------------------
+
+class CompiledPipeline:
+    """
+    Sustituto de Pipeline.predict: preprocesador compilado (o el de sklearn si
+    no se puede compilar) seguido del bosque compilado.
+    """
+
+    def __init__(self, pipeline, preprocessor, forest: CompiledForest,
+                 encoding: Optional[EncodingTable] = None):
+        self.pipeline = pipeline
+        self.preprocessor = preprocessor
+        self.forest = forest
+        self.encoding = encoding
+        # LookupTable opcional (backend 'lookup')
+        self.lookup = None
+
+    @classmethod
+    def from_pipeline(cls, pipeline) -> 'CompiledPipeline':
+        from sklearn.compose import ColumnTransformer
+        from sklearn.pipeline import Pipeline
+
+        if not isinstance(pipeline, Pipeline):
+            return cls(pipeline, None, CompiledForest.from_estimator(pipeline))
+
+        forest = CompiledForest.from_estimator(pipeline.steps[-1][1])
+        preprocessing = pipeline[:-1]
+
+        preprocessor = None
+        encoding = None
+        if len(preprocessing) == 1 and isinstance(preprocessing[0], ColumnTransformer):
+            try:
+                preprocessor = CompiledPreprocessor.from_column_transformer(preprocessing[0])
+                encoding = EncodingTable.from_pipeline(preprocessing[0], preprocessor)
+            except NotImplementedError as e:
+                logger.warning("Preprocesador no compilable del todo, se usa sklearn: %s", e)
+        if preprocessor is None:
+            preprocessor = preprocessing
+
+        return cls(pipeline, preprocessor, forest, encoding)
+
+    def transform(self, frame) -> np.ndarray:
+        if self.preprocessor is None:
+            return np.asarray(frame, dtype=np.float64)
+        X = self.preprocessor.transform(frame)
+        if hasattr(X, 'toarray'):
+            X = X.toarray()
+        return np.asarray(X, dtype=np.float64)
+
+    def predict(self, frame) -> np.ndarray:
+        return self.forest.predict(self.transform(frame))
+
+    def encode_request(self, data: Dict[str, Any]) -> Optional[np.ndarray]:
+        """Fila de features directa desde el payload validado (None si no es posible)"""
+        if self.encoding is None:
+            return None
+        return self.encoding.encode(data)
+
+    def predict_encoded(self, X: np.ndarray) -> np.ndarray:
+        """Predicción sobre filas ya codificadas (salida de encode_request)"""
+        if self.lookup is not None:
+            return self.lookup.predict_encoded(X, self.forest)
+        return self.forest.predict(X)
@@ -0,0 +1,89 @@
+"""
+intervals.py - Intervalos de predicción a partir de los árboles del bosque
+
+La predicción del RandomForest es la media de sus árboles; la dispersión de
+las predicciones individuales da una estimación real de la incertidumbre:
+- salary_range: cuantiles de los árboles (por defecto el 80 % central)
+- std: desviación típica entre árboles
+- confidence: % de árboles a menos de un 10 % de la predicción
+
+Todas las filas y todos los árboles se evalúan en una sola pasada
+vectorizada con el bosque compilado (CompiledForest.tree_predictions). Con
+el backend 'sklearn' el bosque se compila aparte una vez por versión del
+modelo, solo para los intervalos.
+"""
+
+import logging
+import threading
+import weakref
+from typing import Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Fracción central de las predicciones de los árboles que cubre salary_range
+DEFAULT_COVERAGE = 0.8
+
+# Distancia relativa a la predicción para contar un árbol como "de acuerdo"
+AGREEMENT_TOLERANCE = 0.10
+
+# ModelVersion -> CompiledPipeline (o None si el modelo no se puede compilar)
+_FOREST_ENGINES = weakref.WeakKeyDictionary()
+_FOREST_ENGINES_LOCK = threading.Lock()
+
+
+def forest_engine(active) -> Optional['CompiledPipeline']:
+    """
+    Motor compilado con el que calcular los intervalos de `active`
+    (ModelVersion): el propio motor si ya está compilado, o uno compilado
+    una vez a partir del pipeline. None en modo MOCK o si no es un bosque.
+    """
+    engine = active.engine
+    if engine is None:
+        return None
+    if hasattr(engine, 'forest'):
+        return engine
+
+    with _FOREST_ENGINES_LOCK:
+        if active not in _FOREST_ENGINES:
+            from app.models.compiled import CompiledPipeline
+            try:
+                _FOREST_ENGINES[active] = CompiledPipeline.from_pipeline(active.pipeline)
+            except Exception as e:
+                logger.warning("Sin intervalos de predicción para %s: %s", active.uid, e)
+                _FOREST_ENGINES[active] = None
+        return _FOREST_ENGINES[active]
+
+
+def summarize_tree_predictions(per_tree: np.ndarray,
+                               coverage: float = DEFAULT_COVERAGE) -> Dict[str, np.ndarray]:
+    """
+    Resumen por fila de una matriz (filas, árboles): predicción (la misma
+    que CompiledForest.predict), cuantiles del intervalo, desviación típica
+    y % de árboles de acuerdo con la predicción.
+    """
+    n_trees = per_tree.shape[1]
+    salary = np.cumsum(per_tree, axis=1)[:, -1] / n_trees
+    low, high = np.quantile(per_tree, [(1.0 - coverage) / 2.0, (1.0 + coverage) / 2.0], axis=1)
+    agreement = np.abs(per_tree - salary[:, None]) <= AGREEMENT_TOLERANCE * np.abs(salary)[:, None]
+    return {
+        'salary': salary,
+        'min': low,
+        'max': high,
+        'std': per_tree.std(axis=1),
+        'confidence': np.rint(agreement.mean(axis=1) * 100.0)
+    }
+
+
+def row_interval(summary: Dict[str, np.ndarray], coverage: float, n_trees: int,
+                 index: int = 0) -> Dict[str, float]:
+    """Intervalo de una fila de summarize_tree_predictions como dict serializable"""
+    return {
+        'min': float(summary['min'][index]),
+        'max': float(summary['max'][index]),
+        'std': float(summary['std'][index]),
+        'confidence': int(summary['confidence'][index]),
+        'coverage': coverage,
+        'trees': n_trees
+    }
@@ -0,0 +1,329 @@
+"""
+lookup.py - Tabla exacta de salarios precalculada a partir de los umbrales del bosque
+
+El espacio de entrada es casi todo categórico y las entradas numéricas solo
+influyen a través de los umbrales de los árboles: dos valores entre los
+mismos umbrales consecutivos recorren los mismos nodos y dan la misma
+predicción. LookupTable enumera las celdas (una por combinación de valores
+categóricos del formulario × intervalo entre umbrales de cada columna
+numérica), puntúa un representante de cada celda con el bosque compilado y
+guarda el resultado como tensor denso .npy, que se carga memory-mapped.
+Con el backend 'lookup', predecir una fila codificada es calcular su celda
+y leer un float: el resultado es idéntico a MODEL.predict.
+
+Uso (desde prediccion-salarial/):
+    python -m app.models.lookup                 # construye data/modelo_entrenado.lookup.npy
+    python -m app.models.lookup --max-mb 2048
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import pickle
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.models.compiled import CompiledForest, CompiledPipeline, EncodingTable
+
+# Nombre fijo: con python -m el módulo se llama __main__
+logger = logging.getLogger('app.models.lookup')
+
+LOOKUP_FILE = Path(__file__).parent.parent.parent / 'data' / 'modelo_entrenado.lookup.npy'
+
+# Tamaño máximo de la tabla por defecto (float64: 8 bytes por celda)
+DEFAULT_MAX_MB = 512
+
+# Celdas puntuadas por bloque al construir la tabla
+BUILD_CHUNK_SIZE = 65536
+
+
+class LookupTooLarge(ValueError):
+    """La tabla de celdas supera el tamaño máximo permitido"""
+
+
+def _sidecar(path: Path) -> Path:
+    return path.with_suffix('.json')
+
+
+class LookupTable:
+    """
+    Tensor de predicciones indexado por celdas.
+
+    - categorical: por cada campo del formulario, columnas y valores que
+      escribe EncodingTable (columna -1: fila a ceros, por categoría ignorada
+      o porque el bosque no usa esa columna)
+    - numeric: por cada columna numérica, su posición en la fila, los
+      umbrales del bosque sobre ella (float32, ordenados) y un representante
+      por celda
+    """
+
+    def __init__(self, categorical: List[Tuple[str, np.ndarray, np.ndarray]],
+                 numeric: List[Tuple[str, int, np.ndarray, np.ndarray]], n_features_out: int,
+                 values: Optional[np.ndarray] = None):
+        self.categorical = categorical
+        self.numeric = numeric
+        self.n_features_out = n_features_out
+        self.shape = tuple([len(columns) for _, columns, _ in categorical]
+                           + [len(thresholds) + 1 for _, _, thresholds, _ in numeric])
+        self.strides = np.array([int(np.prod(self.shape[i + 1:])) for i in range(len(self.shape))],
+                                dtype=np.intp)
+        self.values = values
+
+        # Entradas categóricas con columna aplanadas: una sola comparación
+        # por fila decide todos los campos en cell_index
+        entry_axis, entry_code, self._entry_columns, self._entry_values = [], [], [], []
+        blank_offset = np.zeros(len(categorical), dtype=np.intp)
+        self._has_blank = np.zeros(len(categorical), dtype=bool)
+        for axis, (_, columns, values) in enumerate(categorical):
+            for code, (column, value) in enumerate(zip(columns, values)):
+                if column >= 0:
+                    entry_axis.append(axis)
+                    entry_code.append(code)
+                    self._entry_columns.append(column)
+                    self._entry_values.append(value)
+                elif not self._has_blank[axis]:
+                    self._has_blank[axis] = True
+                    blank_offset[axis] = code * self.strides[axis]
+        self._entry_columns = np.asarray(self._entry_columns, dtype=np.intp)
+        self._entry_values = np.asarray(self._entry_values, dtype=np.float64)
+        entry_axis = np.asarray(entry_axis, dtype=np.intp)
+        self._entry_offset = np.asarray(entry_code, dtype=np.intp) * self.strides[entry_axis]
+        self._entry_field = np.zeros((len(entry_axis), len(categorical)), dtype=np.intp)
+        self._entry_field[np.arange(len(entry_axis)), entry_axis] = 1
+        self._blank_offset = blank_offset
+
+    @property
+    def n_cells(self) -> int:
+        return int(np.prod(self.shape))
+
+    @property
+    def nbytes(self) -> int:
+        return self.n_cells * np.dtype(np.float64).itemsize
+
+    # --- Ejes ---
+
+    @classmethod
+    def from_compiled(cls, compiled: CompiledPipeline) -> 'LookupTable':
+        """Ejes de la tabla (sin valores) para un pipeline compilado"""
+        if compiled.encoding is None:
+            raise NotImplementedError("La tabla requiere las tablas de codificación del backend compilado")
+        return cls(*cls._axes(compiled.encoding, compiled.forest), compiled.encoding.n_features_out)
+
+    @staticmethod
+    def _axes(encoding: EncodingTable, forest: CompiledForest):
+        is_split = forest.left != np.arange(len(forest.left))
+        used = set(np.unique(forest.feature[is_split]).tolist())
+
+        categorical = []
+        for field, table in encoding.categorical.items():
+            # Una columna en la que ningún árbol divide equivale a la fila a
+            # ceros: esos valores comparten celda
+            entries = list(dict.fromkeys(entry if entry is not None and entry[0] in used else None
+                                         for entry in table.values()))
+            columns = np.array([entry[0] if entry is not None else -1 for entry in entries], dtype=np.intp)
+            values = np.array([entry[1] if entry is not None else 0.0 for entry in entries])
+            categorical.append((field, columns, values))
+
+        numeric = []
+        for field, position, _, _ in encoding.numeric:
+            thresholds = _float32_thresholds(forest.threshold[is_split & (forest.feature == position)])
+            numeric.append((field, position, thresholds, _representatives(thresholds)))
+        return categorical, numeric
+
+    def fingerprint(self, forest: CompiledForest) -> str:
+        """Huella del bosque y de los ejes: una tabla solo vale para su modelo"""
+        digest = hashlib.sha256()
+        for array in (forest.feature, forest.threshold, forest.left, forest.right, forest.value,
+                      forest.roots):
+            digest.update(np.ascontiguousarray(array).tobytes())
+        for field, columns, values in self.categorical:
+            digest.update(field.encode())
+            digest.update(columns.tobytes())
+            digest.update(values.tobytes())
+        for field, position, thresholds, _ in self.numeric:
+            digest.update(f"{field}:{position}".encode())
+            digest.update(thresholds.tobytes())
+        return digest.hexdigest()
+
+    # --- Celdas ---
+
+    def cell_index(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Índice plano de la celda de cada fila codificada y máscara de filas
+        que caen en la tabla (las demás deben puntuarse con el bosque).
+        """
+        X = np.atleast_2d(X)
+
+        # Qué entrada de cada campo está escrita en la fila; los campos sin
+        # ninguna usan la entrada a ceros (si no la hay, la fila no cabe)
+        matches = (X[:, self._entry_columns] == self._entry_values).astype(np.intp)
+        index = matches @ self._entry_offset
+        missing = (matches @ self._entry_field) == 0
+        index += missing @ self._blank_offset
+        known = ~(missing & ~self._has_blank).any(axis=1)
+
+        offset = len(self.categorical)
+        for axis, (_, position, thresholds, _) in enumerate(self.numeric, start=offset):
+            # Mismo criterio que el recorrido del bosque: float32 <= umbral va a la izquierda
+            cell = np.searchsorted(thresholds, X[:, position].astype(np.float32), side='left')
+            index += cell * self.strides[axis]
+
+        return index, known
+
+    def cell_rows(self, flat_index: np.ndarray) -> np.ndarray:
+        """Filas codificadas representantes de las celdas indicadas"""
+        codes = np.unravel_index(flat_index, self.shape)
+        X = np.zeros((len(flat_index), self.n_features_out), dtype=np.float64)
+        rows = np.arange(len(flat_index))
+
+        for (_, columns, values), code in zip(self.categorical, codes):
+            column = columns[code]
+            valid = column >= 0
+            X[rows[valid], column[valid]] = values[code[valid]]
+        for (_, position, _, representatives), code in zip(self.numeric, codes[len(self.categorical):]):
+            X[:, position] = representatives[code]
+        return X
+
+    def predict_encoded(self, X: np.ndarray, forest: CompiledForest) -> np.ndarray:
+        """Predicción de filas codificadas leyendo la tabla (bosque para las que no caben)"""
+        index, known = self.cell_index(X)
+        out = np.asarray(self.values.reshape(-1)[index])
+        if not known.all():
+            out[~known] = forest.predict(np.atleast_2d(X)[~known])
+        return out
+
+    # --- Construcción y carga ---
+
+    @classmethod
+    def build(cls, compiled: CompiledPipeline, path: Path = LOOKUP_FILE,
+              max_mb: float = DEFAULT_MAX_MB, chunk_size: int = BUILD_CHUNK_SIZE) -> 'LookupTable':
+        """
+        Puntúa todas las celdas con el bosque compilado y escribe el tensor
+        en `path` (.npy) y su huella en el .json de al lado. Lanza
+        LookupTooLarge si la tabla supera `max_mb`.
+        """
+        table = cls.from_compiled(compiled)
+        if table.nbytes > max_mb * 1024 * 1024:
+            raise LookupTooLarge(
+                f"La tabla tendría {table.n_cells} celdas ({table.nbytes / 1024 ** 2:.0f} MB, "
+                f"máximo {max_mb:.0f} MB); ejes {table.shape}")
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        values = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float64, shape=table.shape)
+        flat = values.reshape(-1)
+        for start in range(0, table.n_cells, chunk_size):
+            stop = min(start + chunk_size, table.n_cells)
+            flat[start:stop] = compiled.forest.predict(table.cell_rows(np.arange(start, stop)))
+        values.flush()
+
+        probe_cells = _probe_cells(table.n_cells)
+        meta = {
+            "fingerprint": table.fingerprint(compiled.forest),
+            "shape": list(table.shape),
+            "axes": [field for field, _, _ in table.categorical] + [field for field, *_ in table.numeric],
+            "probe": flat[probe_cells].tolist(),
+            "built_at": datetime.now(timezone.utc).isoformat(timespec='seconds')
+        }
+        del values, flat
+
+        # Sidecar y tensor se sustituyen cada uno de forma atómica, primero el
+        # sidecar. Entre los dos pasos (o si el proceso muere) el sidecar no
+        # corresponde al tensor: load() lo detecta con las celdas de "probe"
+        sidecar = _sidecar(path)
+        tmp_sidecar = sidecar.with_name(f"{sidecar.name}.{os.getpid()}.tmp")
+        tmp_sidecar.write_text(json.dumps(meta, indent=2), encoding='utf-8')
+        os.replace(tmp_sidecar, sidecar)
+        os.replace(tmp_path, path)
+
+        table.values = np.load(path, mmap_mode='r')
+        logger.info("Tabla de predicciones escrita en %s: %d celdas (%.1f MB), ejes %s",
+                    path, table.n_cells, table.nbytes / 1024 ** 2, table.shape)
+        return table
+
+    @classmethod
+    def load(cls, compiled: CompiledPipeline, path: Path = LOOKUP_FILE) -> Optional['LookupTable']:
+        """Carga memory-mapped la tabla de `path` si existe y corresponde a este modelo"""
+        path = Path(path)
+        if compiled.encoding is None or not path.exists() or not _sidecar(path).exists():
+            logger.info("Sin tabla de predicciones en %s (python -m app.models.lookup)", path)
+            return None
+
+        table = cls.from_compiled(compiled)
+        meta = json.loads(_sidecar(path).read_text(encoding='utf-8'))
+        if meta.get('fingerprint') != table.fingerprint(compiled.forest):
+            logger.warning("La tabla de predicciones %s es de otro modelo; se ignora", path)
+            return None
+
+        values = np.load(path, mmap_mode='r')
+        if values.shape != table.shape or values.dtype != np.float64:
+            logger.warning("La tabla de predicciones %s no tiene la forma esperada; se ignora", path)
+            return None
+        probe = values.reshape(-1)[_probe_cells(table.n_cells)]
+        if not np.array_equal(probe, np.asarray(meta.get('probe', []), dtype=np.float64)):
+            logger.warning("El tensor %s no corresponde a su sidecar (escritura a medias); se ignora", path)
+            return None
+        table.values = values
+        logger.info("Tabla de predicciones cargada (mmap): %d celdas, ejes %s", table.n_cells, table.shape)
+        return table
+
+
+def _probe_cells(n_cells: int, n_probes: int = 64) -> np.ndarray:
+    """Celdas repartidas por el tensor cuyo valor se guarda en el sidecar"""
+    return np.unique(np.linspace(0, n_cells - 1, num=min(n_probes, n_cells), dtype=np.intp))
+
+
+def _float32_thresholds(thresholds: np.ndarray) -> np.ndarray:
+    """
+    Umbrales equivalentes en float32, ordenados y únicos: para x en float32,
+    x <= t equivale a x <= (mayor float32 <= t). Dos umbrales float64 sin
+    ningún float32 entre ellos quedan en uno solo.
+    """
+    floor = thresholds.astype(np.float32)
+    above = floor.astype(np.float64) > thresholds
+    floor[above] = np.nextafter(floor[above], np.float32(-np.inf))
+    return np.unique(floor)
+
+
+def _representatives(thresholds: np.ndarray) -> np.ndarray:
+    """
+    Un valor por celda que cae dentro de ella: el propio umbral (queda a su
+    izquierda) y, para la última celda, el siguiente float32.
+    """
+    if len(thresholds) == 0:
+        return np.zeros(1)
+    last = np.nextafter(thresholds[-1:], np.float32(np.inf))
+    return np.concatenate([thresholds, last]).astype(np.float64)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Construye la tabla exacta de predicciones del modelo")
+    parser.add_argument('--output', type=Path, default=LOOKUP_FILE)
+    parser.add_argument('--max-mb', type=float, default=DEFAULT_MAX_MB,
+                        help=f"Tamaño máximo de la tabla (defecto {DEFAULT_MAX_MB} MB)")
+    args = parser.parse_args(argv)
+
+    from app.models import predictor
+    from app.utils.logger import setup_logging
+    setup_logging('INFO', fmt='text')
+
+    with open(predictor.MODEL_FILE, 'rb') as file:
+        pipeline = pickle.load(file)
+
+    try:
+        LookupTable.build(CompiledPipeline.from_pipeline(pipeline), args.output, args.max_mb)
+    except (LookupTooLarge, NotImplementedError) as e:
+        logger.error("%s", e)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""
+parallel.py - Puntuación de lotes grandes en un pool de procesos
+
+RandomForest.predict usa un solo núcleo (n_jobs no está fijado). Para lotes
+grandes, ParallelScorer reparte las filas en trozos entre procesos worker;
+cada worker carga el modelo una sola vez. En la app los workers se crean
+con forkserver (o spawn) y leen el artefacto del modelo con
+load_model_version (sin el precálculo de estadísticas): nunca se hace fork
+del servidor, que tiene hilos (workers gthread/ASGI, micro-batcher,
+listener de logs) que podrían tener un lock adquirido. score.py, que es de
+un solo hilo, usa fork y hereda el modelo tras preload_for_fork. Los lotes
+pequeños se puntúan en serie porque el coste de IPC supera la ganancia.
+
+Cada trozo vuelve con la firma del fichero (model_file_signature) del
+modelo con el que se puntuó; si no coincide con la de la versión de la
+petición el lote se puntúa en serie. Los workers solo conocen el modelo con
+el que se crearon: al activarse uno nuevo el pool se recrea, y las
+peticiones que siguen con la versión anterior se puntúan en serie. Una
+versión con la que el pool ha fallado, o que no está en disco (modo MOCK,
+modelos solo en memoria), se puntúa siempre en serie.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# (firma del fichero del modelo, motor de inferencia) de este worker
+_WORKER_MODEL = (None, None)
+
+
+class ModelMismatch(RuntimeError):
+    """Los workers puntúan con un modelo distinto al de la petición"""
+
+
+def _init_worker(use_mmap: bool, backend: str, paths: tuple, signature: Optional[tuple]):
+    global _WORKER_MODEL
+    from app.models import predictor
+
+    # Con fork el modelo ya viene cargado del proceso padre
+    active = predictor.ACTIVE_MODEL
+    if predictor.is_model_loaded() and active.available and active.signature == signature:
+        _WORKER_MODEL = (active.signature, active.engine)
+        return
+
+    # Con forkserver o spawn se lee el mismo artefacto que el padre, sin
+    # ensure_model_loaded: el worker no necesita las estadísticas
+    predictor.MODEL_FILE, predictor.META_FILE, predictor.MODEL_MMAP_FILE = (Path(p) for p in paths)
+    predictor.configure_model_loading(use_mmap)
+    predictor.configure_inference_backend(backend)
+    try:
+        version = predictor.load_model_version()
+    except Exception as e:
+        logger.error("El worker de puntuación no pudo cargar el modelo: %s", e)
+        return
+    _WORKER_MODEL = (version.signature, version.engine)
+
+
+def _predict_chunk(frame):
+    signature, engine = _WORKER_MODEL
+    if engine is None:
+        raise ModelMismatch("El worker no tiene modelo cargado")
+    return signature, engine.predict(frame)
+
+
+class ParallelScorer:
+    """
+    Pool de procesos perezoso para model.predict sobre DataFrames.
+
+    - workers: número de procesos (<= 1 desactiva el pool)
+    - chunk_size: filas por tarea enviada a un worker
+    - min_rows: por debajo de este tamaño el lote se puntúa en serie
+    - start_method: 'forkserver' (por defecto) o 'spawn'; 'fork' solo desde
+      procesos de un solo hilo como score.py
+    """
+
+    def __init__(self, workers: int, chunk_size: int = 20000, min_rows: int = 50000,
+                 start_method: str = 'forkserver'):
+        self.workers = workers
+        self.chunk_size = max(1, chunk_size)
+        self.min_rows = min_rows
+        methods = multiprocessing.get_all_start_methods()
+        self.start_method = start_method if start_method in methods else 'spawn'
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_version = None
+        self._failed_version = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self, active) -> ProcessPoolExecutor:
+        # El pool no sobrevive a un fork: se crea uno nuevo en cada proceso
+        if self._pool is not None and self._pid == os.getpid():
+            return self._pool
+        with self._lock:
+            if self._pool is None or self._pid != os.getpid():
+                from app.models import predictor
+                if self.start_method == 'fork':
+                    predictor.preload_for_fork()
+                self._pool_version = active
+
+                context = multiprocessing.get_context(self.start_method)
+                paths = tuple(str(path) for path in (predictor.MODEL_FILE, predictor.META_FILE,
+                                                     predictor.MODEL_MMAP_FILE))
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=context,
+                    initializer=_init_worker,
+                    initargs=(predictor.USE_MMAP, predictor.INFERENCE_BACKEND, paths, active.signature)
+                )
+                self._pid = os.getpid()
+                logger.info("Pool de puntuación creado: %d workers (%s)",
+                            self.workers, self.start_method)
+        return self._pool
+
+    def should_parallelize(self, n_rows: int) -> bool:
+        return self.workers > 1 and n_rows >= self.min_rows
+
+    def _usable(self, active) -> bool:
+        """Si los workers pueden puntuar con la versión `active`"""
+        if active is self._failed_version:
+            return False
+        # Sin fork los workers leen el modelo de disco: uno solo en memoria no les llega
+        return self.start_method == 'fork' or active.signature is not None
+
+    def predict(self, active, frame):
+        """
+        Predicciones de la versión `active` (ModelVersion) para `frame`,
+        repartidas entre workers si compensa
+        """
+        import numpy as np
+
+        model = active.engine
+        if not self.should_parallelize(len(frame)) or not self._usable(active):
+            return model.predict(frame)
+
+        if self._pool is not None and active is not self._pool_version:
+            from app.models.predictor import get_active_model
+            if active is not get_active_model():
+                # Petición que sigue con una versión anterior del modelo
+                return model.predict(frame)
+            logger.info("Nuevo modelo activo, se recrea el pool de puntuación")
+            self.shutdown(wait=False)
+
+        chunks = [frame.iloc[start:start + self.chunk_size]
+                  for start in range(0, len(frame), self.chunk_size)]
+        try:
+            results = list(self._get_pool(active).map(_predict_chunk, chunks))
+            signatures = {signature for signature, _ in results}
+            if signatures != {active.signature}:
+                raise ModelMismatch(f"firma {sorted(signatures, key=str)} en lugar de {active.signature}")
+        except Exception as e:
+            # Pool roto, modelo distinto en disco, sin permisos para crear
+            # procesos... se repetiría: esta versión se puntúa en serie
+            logger.warning("Fallo en el pool de puntuación, la versión %s se puntúa en serie: %s",
+                           active.uid, e)
+            self.shutdown(wait=False)
+            self._failed_version = active
+            return model.predict(frame)
+        return np.concatenate([predictions for _, predictions in results])
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            if self._pool is not None and self._pid == os.getpid():
+                self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
+            self._pool_version = None
+            self._pid = None
@@ -1,16 +1,24 @@
 # model/predictor.py
 
+import gc
+import itertools
+import os
 import pickle
-import pandas as pd
+import threading
+import time
 import warnings
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import json
+import logging
 from datetime import datetime
 
 # Suprimir advertencias de incompatibilidad de versiones de sklearn
 warnings.filterwarnings('ignore', category=UserWarning, module='sklearn')
 
+logger = logging.getLogger(__name__)
+
 # --------------------------------------------------------------------------
 # --- 1. CONFIGURACIÓN Y CARGA DEL MODELO ---
 # --------------------------------------------------------------------------
@@ -18,9 +26,11 @@ warnings.filterwarnings('ignore', category=UserWarning, module='sklearn')
 # Rutas de archivos
 MODEL_FILE = Path(__file__).parent.parent.parent / 'data' / 'modelo_entrenado.pkl'
 META_FILE = Path(__file__).parent.parent.parent / 'data' / 'metadata.json'
+# Copia del modelo en formato joblib sin comprimir, cargable con mmap_mode='r'
+MODEL_MMAP_FILE = Path(__file__).parent.parent.parent / 'data' / 'modelo_entrenado.joblib'
 
-# 2. ORDEN EXACTO DE LAS COLUMNAS (FEATURES) que el modelo espera
-# Basado en tu schema.py y formulario
+# Claves del formulario legacy que aceptan predict_one y validate_input_data
+# (el pipeline recibe las columnas en inglés de helpers.MODEL_FEATURES)
 COLUMN_ORDER = [
     'edad',
     'pais',
@@ -32,187 +42,317 @@ COLUMN_ORDER = [
     'universidad_ranking',
     'region_estudio',
     'nota_media',
-    'practicas',  # bool convertido a 0/1
+    'practicas',
     'situacion_laboral'
 ]
 
-# Mapeos para codificación categórica (deben coincidir con el entrenamiento)
-# IMPORTANTE: Ajusta estos valores según cómo entrenaste el modelo
-
-ENCODING_MAPS = {
-    'pais': {
-        'brasil': 0, 'china': 1, 'españa': 2, 'pakistán': 3,
-        'usa': 4, 'india': 5, 'vietnam': 6, 'nigeria': 7
-    },
-    'genero': {
-        'hombre': 0, 'mujer': 1, 'otro': 2
-    },
-    'titulacion': {
-        'fp': 0, 'grado': 1, 'master': 2, 'phd': 3
-    },
-    'campo_estudio': {
-        'artes': 0, 'ing': 1, 'it': 2, 'salud': 3,
-        's_sociales': 4, 'empresa': 5
-    },
-    'nivel_ingles': {
-        'basico': 0, 'intermedio': 1, 'avanzado': 2, 'fluido': 3
-    },
-    'universidad_ranking': {
-        'bajo': 0, 'medio': 1, 'alto': 2
-    },
-    'region_estudio': {
-        'australia': 0, 'europa': 1, 'usa': 2
-    },
-    'situacion_laboral': {
-        'estudiando': 0, 'desempleado': 1, 'empleado': 2
-    }
-}
+_VERSION_SEQUENCE = itertools.count(1)
+
 
-MODEL = None
-SCALER = None
-METADATA = None
-_PREDICTOR_AVAILABLE = False
+@dataclass(frozen=True, eq=False)
+class ModelVersion:
+    """
+    Modelo cargado, inmutable: pipeline de sklearn, motor que atiende las
+    predicciones (el propio pipeline o su versión compilada) y metadata.
+    Cada petición toma la versión activa una sola vez y la usa hasta el
+    final, así que un cambio de modelo no le afecta a mitad de camino.
+    """
+    pipeline: Any
+    engine: Any
+    metadata: Optional[Dict[str, Any]]
+    signature: Optional[tuple] = None
+    loaded_at: float = field(default_factory=time.time)
+    # Identificador único de la carga (las caches se indexan con él: dos
+    # despliegues con la misma versión en metadata.json no se confunden)
+    uid: str = ''
+
+    def __post_init__(self):
+        if not self.uid:
+            object.__setattr__(self, 'uid', f"{self.version}#{next(_VERSION_SEQUENCE)}")
+
+    @property
+    def version(self) -> str:
+        return (self.metadata or {}).get('version', 'unknown')
+
+    @property
+    def available(self) -> bool:
+        return self.engine is not None
+
+
+# Versión activa del modelo. Se sustituye de una sola asignación
+# (activate_model_version); en modo MOCK no tiene motor
+ACTIVE_MODEL = ModelVersion(None, None, None, uid='mock')
 _MOCK_ERR = None
 
+# Carga perezosa: el modelo se carga en la primera predicción (o en warm_up)
+_LOADED = False
+_LOAD_LOCK = threading.Lock()
+
+# Desglose de tiempos de arranque (segundos) para diagnosticar el boot
+STARTUP_TIMINGS: Dict[str, float] = {}
+
+# Carga del artefacto memory-mapped (configurable con configure_model_loading)
+USE_MMAP = False
+
+# Backend de inferencia: 'sklearn' (Pipeline.predict), 'compiled' (app.models.compiled)
+# o 'lookup' (compilado + tabla exacta de app.models.lookup si está construida)
+INFERENCE_BACKEND = 'sklearn'
+
 # --------------------------------------------------------------------------
-# --- CARGA INICIAL ---
+# --- CARGA DEL MODELO ---
 # --------------------------------------------------------------------------
 
 def _load_model():
-    global MODEL, SCALER, METADATA, _PREDICTOR_AVAILABLE, _MOCK_ERR
-    global MODEL, SCALER, METADATA
+    global ACTIVE_MODEL, _MOCK_ERR
 
-    print(f"[INFO] Intentando cargar modelo desde: {MODEL_FILE}")
-    print(f"[INFO] Archivo existe: {MODEL_FILE.exists()}")
+    logger.info("Intentando cargar modelo desde: %s (existe: %s)", MODEL_FILE, MODEL_FILE.exists())
 
     try:
-        with open(MODEL_FILE, 'rb') as file:
-            MODEL = pickle.load(file)
-        print(f"[OK] Modelo predictivo cargado exitosamente desde {MODEL_FILE}")
-        _PREDICTOR_AVAILABLE = True
-        print(f"[OK] Tipo de modelo: {type(MODEL)}")
-
-        # Si usaste un scaler, cárgalo aquí
-        scaler_path = Path(__file__).parent.parent.parent / 'data' / 'scaler.pkl'
-        if scaler_path.exists():
-            with open(scaler_path, 'rb') as file:
-                SCALER = pickle.load(file)
-            print(f"[OK] Scaler cargado desde {scaler_path}")
-        
-        # Cargar metadata si existe
-        if META_FILE.exists():
-            with open(META_FILE, 'r', encoding='utf-8') as f:
-                METADATA = json.load(f)
-            print(f"[OK] Metadata cargada desde {META_FILE}")
-        else:
-            # Crear metadata por defecto
-            METADATA = {
-                "version": "1.0.0",
-                "trained_at": datetime.now().isoformat(),
-                "metrics": {},
-                "features": COLUMN_ORDER
-            }
-            
+        ACTIVE_MODEL = load_model_version(STARTUP_TIMINGS)
     except FileNotFoundError:
-        print(f"[WARNING] Archivo del modelo no encontrado en {MODEL_FILE}")
-        print("          El sistema funcionará en modo MOCK para desarrollo")
+        logger.warning("Archivo del modelo no encontrado en %s; "
+                       "el sistema funcionará en modo MOCK para desarrollo", MODEL_FILE)
     except Exception as e:
         _MOCK_ERR = str(e)
-        print(f"[ERROR] Error al cargar el modelo: {e}")
+        logger.error("Error al cargar el modelo: %s", e)
 
-# Cargar al importar el módulo
-_load_model()
 
-# --------------------------------------------------------------------------
-# --- 2. FUNCIONES DE PREPROCESAMIENTO ---
-# --------------------------------------------------------------------------
+def load_model_version(timings: Optional[Dict[str, float]] = None) -> ModelVersion:
+    """
+    Lee de disco el modelo y su metadata y construye el motor de inferencia,
+    sin tocar la versión activa. Lanza la excepción si la carga falla.
+    """
+    timings = timings if timings is not None else {}
+    signature = model_file_signature()
+
+    # Las dependencias pesadas solo se importan al cargar el modelo
+    started = time.perf_counter()
+    import pandas  # noqa: F401
+    import sklearn  # noqa: F401
+    timings['imports'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    pipeline = _read_model_artifact()
+    timings['unpickle'] = time.perf_counter() - started
+    logger.info("Tipo de modelo: %s", type(pipeline).__name__)
+
+    started = time.perf_counter()
+    metadata = _read_metadata()
+    timings['metadata'] = time.perf_counter() - started
+
+    engine = build_inference_engine(pipeline, timings)
+    return ModelVersion(pipeline, engine, metadata, signature)
+
+
+def _read_metadata() -> Dict[str, Any]:
+    if META_FILE.exists():
+        with open(META_FILE, 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+        logger.info("Metadata cargada desde %s", META_FILE)
+        return metadata
+
+    # Metadata por defecto
+    return {
+        "version": "1.0.0",
+        "trained_at": datetime.now().isoformat(),
+        "metrics": {},
+        "features": COLUMN_ORDER
+    }
+
 
-def _encode_categorical(value: str, feature_name: str) -> int:
+def _read_model_artifact():
     """
-    Codifica una variable categórica a su valor numérico.
+    Lee el modelo desde disco. Con USE_MMAP se usa la copia joblib con
+    mmap_mode='r': los arrays NumPy grandes quedan mapeados en solo lectura y
+    los workers comparten esas páginas a través de la page cache.
     """
-    encoding_map = ENCODING_MAPS.get(feature_name)
-    if encoding_map is None:
-        raise ValueError(f"No existe mapa de codificación para '{feature_name}'")
-    
-    encoded = encoding_map.get(value)
-    if encoded is None:
-        raise ValueError(
-            f"Valor '{value}' no válido para '{feature_name}'. "
-            f"Valores permitidos: {list(encoding_map.keys())}"
-        )
-    return encoded
+    if USE_MMAP:
+        try:
+            if not MODEL_MMAP_FILE.exists() or (
+                    MODEL_FILE.exists() and MODEL_FILE.stat().st_mtime > MODEL_MMAP_FILE.stat().st_mtime):
+                export_mmap_artifact()
+
+            import joblib
+            model = joblib.load(MODEL_MMAP_FILE, mmap_mode='r')
+            logger.info("Modelo cargado (mmap) desde %s", MODEL_MMAP_FILE)
+            return model
+        except OSError as e:
+            if not MODEL_FILE.exists():
+                raise
+            logger.warning("No se pudo usar el artefacto mmap (%s), cargando con pickle", e)
+
+    with open(MODEL_FILE, 'rb') as file:
+        model = pickle.load(file)
+    logger.info("Modelo predictivo cargado exitosamente desde %s", MODEL_FILE)
+    return model
+
+
+def export_mmap_artifact(source: Optional[Path] = None, target: Optional[Path] = None) -> Path:
+    """
+    Convierte el pickle del modelo a joblib sin comprimir (requisito para
+    mmap_mode). Se escribe en un temporal y se renombra de forma atómica para
+    que varios procesos puedan hacerlo a la vez sin leer un fichero a medias.
+    """
+    import joblib
+
+    source = source or MODEL_FILE
+    target = target or MODEL_MMAP_FILE
+    with open(source, 'rb') as file:
+        model = pickle.load(file)
+
+    tmp_path = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, target)
+    logger.info("Artefacto mmap generado en %s", target)
+    return target
+
+
+def configure_model_loading(mmap: bool):
+    """Activa o desactiva la carga memory-mapped (llamado desde create_app)"""
+    global USE_MMAP
+    USE_MMAP = mmap
+
 
+def configure_inference_backend(backend: str):
+    """Selecciona el backend de inferencia ('sklearn', 'compiled' o 'lookup')"""
+    global INFERENCE_BACKEND
+    if backend not in ('sklearn', 'compiled', 'lookup'):
+        raise ValueError(f"Backend de inferencia desconocido: '{backend}'")
+    INFERENCE_BACKEND = backend
 
-def _preprocess_features(input_data: Dict[str, Any]) -> pd.DataFrame:
+
+def build_inference_engine(pipeline, timings: Optional[Dict[str, float]] = None):
     """
-    Preprocesa los datos de entrada:
-    1. Convierte categóricas a numéricas
-    2. Convierte booleanos a 0/1
-    3. Asegura el orden correcto de columnas
+    Compila el modelo si el backend es 'compiled' o 'lookup' (si falla, usa
+    sklearn). Con 'lookup' se adjunta la tabla de predicciones si existe y
+    corresponde a este modelo.
     """
-    processed = {}
-    
-    for feature in COLUMN_ORDER:
-        if feature not in input_data:
-            raise ValueError(f"Falta la feature requerida: '{feature}'")
-        
-        value = input_data[feature]
-        
-        # Procesar según el tipo de feature
-        if feature in ENCODING_MAPS:
-            # Variable categórica -> codificar
-            processed[feature] = _encode_categorical(value, feature)
-        
-        elif feature == 'practicas':
-            # Booleano -> convertir a 0/1
-            processed[feature] = 1 if value else 0
-        
-        elif feature in ['edad', 'anios_desde_titulo', 'nota_media']:
-            # Variables numéricas -> asegurar tipo float
-            processed[feature] = float(value)
-        
-        else:
-            # Por defecto, mantener el valor
-            processed[feature] = value
-    
-    # Crear DataFrame con el orden correcto
-    df = pd.DataFrame([processed], columns=COLUMN_ORDER)
-    
-    return df
+    if pipeline is None or INFERENCE_BACKEND == 'sklearn':
+        return pipeline
+
+    started = time.perf_counter()
+    engine = pipeline
+    try:
+        from app.models.compiled import CompiledPipeline
+        engine = CompiledPipeline.from_pipeline(pipeline)
+        logger.info("Modelo compilado a arrays planos (%d árboles)", engine.forest.n_trees)
+        if INFERENCE_BACKEND == 'lookup':
+            from app.models.lookup import LookupTable, LOOKUP_FILE
+            engine.lookup = LookupTable.load(engine, LOOKUP_FILE)
+    except Exception as e:
+        logger.warning("No se pudo compilar el modelo, se usa sklearn: %s", e)
+    if timings is not None:
+        timings['compile'] = time.perf_counter() - started
+    return engine
 
 
-def _apply_scaling(df: pd.DataFrame) -> pd.DataFrame:
+def activate_model_version(version: ModelVersion):
     """
-    Aplica escalado si se usó durante el entrenamiento.
+    Publica `version` como modelo activo. Es una sola asignación: las
+    peticiones en curso siguen con la versión que ya tenían.
     """
-    if SCALER is None:
-        return df
-    
-    # Identificar columnas numéricas que deben ser escaladas
-    numeric_cols = ['edad', 'anios_desde_titulo', 'nota_media']
-    
-    # Crear copia para no modificar el original
-    df_scaled = df.copy()
-    
-    # Escalar solo las columnas numéricas
-    if hasattr(SCALER, 'feature_names_in_'):
-        # Si el scaler tiene info de features, usarla
-        cols_to_scale = [c for c in SCALER.feature_names_in_ if c in df.columns]
-    else:
-        cols_to_scale = numeric_cols
-    
-    df_scaled[cols_to_scale] = SCALER.transform(df[cols_to_scale])
-    
-    return df_scaled
+    global ACTIVE_MODEL, _LOADED
+    ACTIVE_MODEL = version
+    _LOADED = True
+
+
+def preload_for_fork():
+    """
+    Carga el modelo en el proceso maestro antes de hacer fork de los workers.
+    gc.freeze() saca los objetos ya creados del recolector para que los
+    workers no escriban en esas páginas y se mantengan compartidas (copy-on-write).
+    """
+    ensure_model_loaded()
+    gc.collect()
+    gc.freeze()
+
+
+def ensure_model_loaded():
+    """
+    Carga el modelo la primera vez que se necesita (thread-safe) y calcula
+    a continuación las estadísticas cacheadas con él.
+    """
+    global _LOADED
+    if _LOADED:
+        return
+
+    with _LOAD_LOCK:
+        if _LOADED:
+            return
+
+        started = time.perf_counter()
+        _load_model()
+        _LOADED = True
+
+        if ACTIVE_MODEL.available:
+            stats_started = time.perf_counter()
+            try:
+                from app.utils.helpers import calculate_average_salaries_from_model
+                calculate_average_salaries_from_model()
+            except Exception as e:
+                logger.warning("No se pudieron calcular estadísticas: %s", e)
+            STARTUP_TIMINGS['stats_cache'] = time.perf_counter() - stats_started
+
+        STARTUP_TIMINGS['total'] = time.perf_counter() - started
+        breakdown = ", ".join(f"{name}={seconds:.3f}s" for name, seconds in STARTUP_TIMINGS.items())
+        logger.info("Tiempos de carga del modelo: %s", breakdown,
+                    extra={'startup_timings': dict(STARTUP_TIMINGS)})
+
+
+def warm_up():
+    """Carga anticipada del modelo y de las estadísticas (modo producción)"""
+    ensure_model_loaded()
+
+
+def model_file_signature() -> Optional[tuple]:
+    """
+    (mtime, tamaño) del fichero del modelo y de metadata.json, o None si el
+    modelo no existe. Cambia cuando se despliega un modelo nuevo.
+    """
+    try:
+        stat = MODEL_FILE.stat()
+    except OSError:
+        return None
+    try:
+        meta_stat = META_FILE.stat()
+        meta = (meta_stat.st_mtime_ns, meta_stat.st_size)
+    except OSError:
+        meta = None
+    return stat.st_mtime_ns, stat.st_size, meta
+
+
+def is_model_loaded() -> bool:
+    """Indica si ya se ha intentado cargar el modelo (sin forzar la carga)"""
+    return _LOADED
+
+
+def get_active_model() -> ModelVersion:
+    """Versión activa del modelo, cargándola si hace falta"""
+    ensure_model_loaded()
+    return ACTIVE_MODEL
+
+
+def get_model():
+    """
+    Devuelve el modelo de inferencia activo (Pipeline de sklearn o su versión
+    compilada), cargándolo si hace falta. None en modo MOCK.
+    """
+    return get_active_model().engine
+
+
+def is_predictor_available() -> bool:
+    """Indica si el modelo real está disponible (fuerza la carga)"""
+    return get_active_model().available
 
 # --------------------------------------------------------------------------
-# --- 3. FUNCIÓN PRINCIPAL DE PREDICCIÓN (usada por app.py) ---
+# --- 2. FUNCIÓN PRINCIPAL DE PREDICCIÓN (legacy) ---
 # --------------------------------------------------------------------------
 
 def predict_one(features_dict: Dict[str, Any]) -> float:
     """
-    Función principal que usa app.py para hacer predicciones.
+    Predicción individual con las claves antiguas del formulario
+    (anios_desde_titulo). Delega en el servicio de inferencia, el mismo
+    camino que /api/predict.
 
     Args:
         features_dict: Diccionario con todas las features necesarias
@@ -220,47 +360,30 @@ def predict_one(features_dict: Dict[str, Any]) -> float:
     Returns:
         float: Predicción del salario
     """
-    # Verificación inicial
-    if MODEL is None:
+    if get_model() is None:
         # Modo MOCK para desarrollo
-        print("[WARNING] Usando prediccion MOCK (modelo no cargado)")
+        logger.warning("Usando prediccion MOCK (modelo no cargado)")
         return 45000.0 + (features_dict.get('edad', 25) * 500)
 
-    print(f"[INFO] Usando MODELO REAL para prediccion")
-    print(f"[INFO] Features recibidas: {list(features_dict.keys())}")
-
-    # 1. Preprocesar features
-    try:
-        df = _preprocess_features(features_dict)
-        print(f"[INFO] Features preprocesadas correctamente")
-    except ValueError as e:
-        raise ValueError(f"Error en preprocesamiento: {e}")
-
-    # 2. Aplicar escalado si corresponde
-    df_final = _apply_scaling(df)
-
-    # 3. Realizar predicción
-    try:
-        prediction = MODEL.predict(df_final)[0]
-        print(f"[INFO] Prediccion realizada: {prediction:.2f}")
-    except Exception as e:
-        _MOCK_ERR = str(e)
-        raise Exception(f"Error al ejecutar predicción del modelo: {e}")
+    data = dict(features_dict)
+    if 'anios_desde_titulo' in data:
+        data.setdefault('anios_desde_obtencion', data.pop('anios_desde_titulo'))
 
-    # 4. Devolver resultado
-    return float(prediction)
+    from app.models.service import get_inference_service
+    return get_inference_service().predict(data)
 
 
 # --------------------------------------------------------------------------
-# --- 4. FUNCIÓN DE METADATA (usada por app.py) ---
+# --- 3. FUNCIÓN DE METADATA (usada por app.py) ---
 # --------------------------------------------------------------------------
 
 def load_meta() -> Dict[str, Any]:
     """
     Devuelve metadata del modelo para el endpoint /model/info
     """
-    if METADATA is not None:
-        return METADATA
+    metadata = get_active_model().metadata
+    if metadata is not None:
+        return metadata
     
     # Metadata por defecto si no se pudo cargar
     return {
@@ -280,7 +403,7 @@ def get_model_version() -> str:
 
 
 # --------------------------------------------------------------------------
-# --- 5. FUNCIÓN LEGACY (para compatibilidad) ---
+# --- 4. FUNCIÓN LEGACY (para compatibilidad) ---
 # --------------------------------------------------------------------------
 
 def preprocess_and_predict(input_data: dict) -> float:
@@ -291,7 +414,7 @@ def preprocess_and_predict(input_data: dict) -> float:
 
 
 # --------------------------------------------------------------------------
-# --- 6. UTILIDADES DE VALIDACIÓN ---
+# --- 5. UTILIDADES DE VALIDACIÓN ---
 # --------------------------------------------------------------------------
 
 def validate_input_data(data: Dict[str, Any]) -> tuple[bool, list[str]]:
@@ -324,14 +447,15 @@ def validate_input_data(data: Dict[str, Any]) -> tuple[bool, list[str]]:
         if not (0 <= anios <= 40):
             errors.append(f"Años desde título fuera de rango (0-40): {anios}")
     
-    # Validar valores categóricos
-    for feature, encoding_map in ENCODING_MAPS.items():
+    # Validar valores categóricos con los mismos mapas que usa la traducción
+    from app.utils.helpers import CATEGORICAL_FIELDS
+    for feature, (_, mapping, _) in CATEGORICAL_FIELDS.items():
         if feature in data:
-            value = data[feature]
-            if value not in encoding_map:
+            value = str(data[feature]).lower()
+            if value not in mapping:
                 errors.append(
-                    f"Valor '{value}' no válido para '{feature}'. "
-                    f"Permitidos: {list(encoding_map.keys())}"
+                    f"Valor '{data[feature]}' no válido para '{feature}'. "
+                    f"Permitidos: {list(mapping.keys())}"
                 )
     
     return len(errors) == 0, errors
@@ -0,0 +1,221 @@
+"""
+registry.py - Recarga en caliente del modelo
+
+ModelRegistry carga un modelo nuevo de data/ sin parar el proceso: lo lee y
+lo compila en segundo plano, lo calienta (una predicción y la tabla de
+estadísticas completa) y solo entonces lo activa con una única asignación
+(predictor.activate_model_version). Las peticiones en curso terminan con la
+versión que ya tenían; la cache de predicciones pasa a la nueva versión y la
+tabla de estadísticas se sustituye de una vez.
+
+La recarga se dispara con POST /api/admin/reload-model o vigilando el
+fichero del modelo (MODEL_WATCH_INTERVAL). Con Gunicorn y preload_app es
+preferible el HUP al maestro (gunicorn.conf.py): cada worker recargaría su
+propia copia y se perdería la memoria compartida. Las dos vigilancias usan
+el mismo ModelFileWatcher.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from app.models import predictor
+from app.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+REGISTRY.describe('app_model_reloads_total', 'Recargas del modelo por resultado')
+
+
+class ModelReloadInProgress(RuntimeError):
+    """Ya hay una recarga del modelo en marcha"""
+
+
+class ModelRegistry:
+    """Carga, calentamiento y activación atómica de versiones del modelo"""
+
+    def __init__(self):
+        self._reload_lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.reloads = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        # Firma del fichero cuya última recarga falló (la vigilancia la ignora)
+        self.failed_signature: Optional[tuple] = None
+        self.last_reload_seconds: Optional[float] = None
+
+    # --- Versiones ---
+
+    @staticmethod
+    def current() -> predictor.ModelVersion:
+        return predictor.get_active_model()
+
+    @staticmethod
+    def warm_up(version: predictor.ModelVersion) -> Dict[tuple, Any]:
+        """
+        Calienta una versión antes de activarla: una predicción de una fila
+        (cargar páginas del modelo, cachés internas), el bosque de los
+        intervalos de predicción y la tabla de estadísticas, que además se
+        devuelve para publicarla con el modelo.
+        """
+        import pandas as pd
+        from app.models.intervals import forest_engine
+        from app.models.service import get_inference_service
+        from app.utils.helpers import MODEL_FEATURES, STATS_BASE_PROFILE, build_statistics_table
+
+        version.engine.predict(pd.DataFrame([STATS_BASE_PROFILE], columns=MODEL_FEATURES))
+        if get_inference_service().intervals_enabled:
+            forest_engine(version)
+        return build_statistics_table(version.engine)
+
+    def activate(self, version: predictor.ModelVersion, stats_table: Optional[Dict[tuple, Any]] = None):
+        """
+        Publica `version`: modelo activo, tabla de estadísticas y cache de
+        predicciones. Sin `stats_table` la tabla se calcula aquí (warm_up).
+        """
+        from app.models.service import get_inference_service
+        from app.utils.helpers import install_statistics_table
+
+        if stats_table is None and version.available:
+            stats_table = self.warm_up(version)
+
+        predictor.activate_model_version(version)
+        if stats_table is not None:
+            install_statistics_table(stats_table)
+        get_inference_service().cache.invalidate(version.uid)
+        logger.info("Modelo activo: %s", version.uid)
+
+    def reload(self, wait: bool = True) -> Optional[predictor.ModelVersion]:
+        """
+        Carga el modelo de disco, lo calienta y lo activa. Con wait=False se
+        hace en un hilo aparte y devuelve None. Si la carga falla se conserva
+        el modelo activo. Lanza ModelReloadInProgress si ya hay una recarga.
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            raise ModelReloadInProgress("Ya hay una recarga del modelo en curso")
+
+        if not wait:
+            threading.Thread(target=self._reload_locked, name='model-reload', daemon=True).start()
+            return None
+        return self._reload_locked()
+
+    def _reload_locked(self) -> Optional[predictor.ModelVersion]:
+        started = time.perf_counter()
+        signature = predictor.model_file_signature()
+        try:
+            previous = predictor.ACTIVE_MODEL
+            version = predictor.load_model_version()
+            self.activate(version, self.warm_up(version))
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            self.failed_signature = signature
+            REGISTRY.inc('app_model_reloads_total', {'status': 'error'})
+            logger.exception("Error recargando el modelo, se mantiene el anterior: %s", e)
+            return None
+        finally:
+            self._reload_lock.release()
+
+        self.reloads += 1
+        self.last_error = None
+        self.failed_signature = None
+        self.last_reload_seconds = time.perf_counter() - started
+        REGISTRY.inc('app_model_reloads_total', {'status': 'ok'})
+        logger.info("Modelo recargado en %.2fs: %s -> %s", self.last_reload_seconds,
+                    previous.uid, version.uid)
+        return version
+
+    # --- Vigilancia de data/ ---
+
+    def start_watching(self, interval: float):
+        """
+        Comprueba cada `interval` segundos si ha cambiado el fichero del
+        modelo (o metadata.json) y lo recarga (ModelFileWatcher).
+        """
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(interval,),
+                                         name='model-watcher', daemon=True)
+        self._watcher.start()
+        logger.info("Vigilando %s cada %.1fs", predictor.MODEL_FILE, interval)
+
+    def stop_watching(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def _watch(self, interval: float):
+        watcher = ModelFileWatcher(self)
+        while not self._stop.wait(interval):
+            if not watcher.poll():
+                continue
+            try:
+                self.reload(wait=True)
+            except ModelReloadInProgress:
+                pass
+
+    # --- Estado ---
+
+    def stats(self) -> Dict[str, Any]:
+        active = predictor.ACTIVE_MODEL
+        return {
+            "active": active.uid,
+            "loaded_at": active.loaded_at,
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "last_reload_seconds": self.last_reload_seconds,
+            "reloading": self._reload_lock.locked(),
+            "watching": self._watcher is not None and self._watcher.is_alive()
+        }
+
+
+class ModelFileWatcher:
+    """
+    Detección de un modelo nuevo en data/, compartida por la vigilancia de
+    ModelRegistry y la del maestro de Gunicorn (gunicorn.conf.py).
+
+    poll() devuelve True cuando la firma del fichero (model_file_signature)
+    es distinta de la del modelo activo y se ha visto igual en dos
+    comprobaciones seguidas, para no cargar un despliegue a medias. La firma
+    cuya última recarga falló se ignora hasta que el fichero vuelva a cambiar.
+    """
+
+    def __init__(self, registry: ModelRegistry):
+        self.registry = registry
+        self._pending: Optional[tuple] = None
+
+    def poll(self) -> bool:
+        signature = predictor.model_file_signature()
+        if signature is None or signature in (self.registry.current().signature,
+                                              self.registry.failed_signature):
+            self._pending = None
+            return False
+        if signature != self._pending:
+            self._pending = signature
+            return False
+        self._pending = None
+        return True
+
+
+# --------------------------------------------------------------------------
+# --- REGISTRO GLOBAL ---
+# --------------------------------------------------------------------------
+
+MODEL_REGISTRY = ModelRegistry()
+
+
+def configure_model_registry(app_config) -> ModelRegistry:
+    """Arranca la vigilancia de data/ si MODEL_WATCH_INTERVAL > 0 (create_app)"""
+    if app_config.MODEL_WATCH_INTERVAL > 0:
+        MODEL_REGISTRY.start_watching(app_config.MODEL_WATCH_INTERVAL)
+    return MODEL_REGISTRY
+
+
+def get_model_registry() -> ModelRegistry:
+    """Devuelve el registro de modelos global"""
+    return MODEL_REGISTRY
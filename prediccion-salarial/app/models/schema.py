@@ -1,8 +1,42 @@
 """
 schema.py - Validación con Pydantic v2
+
+Los campos categóricos son Literal: pydantic-core comprueba los valores sin
+pasar por Python. Las peticiones se validan directamente desde el cuerpo
+JSON (PredictRequest.model_validate_json) y los lotes con un TypeAdapter
+compilado una sola vez (validate_batch).
 """
-from pydantic import BaseModel, Field, field_validator, ConfigDict
-from typing import Optional
+from pydantic import BaseModel, Field, ConfigDict, TypeAdapter, ValidationError
+from typing import Any, Dict, List, Literal, Optional, Sequence, Tuple, get_args
+
+# Valores admitidos por el formulario para cada campo categórico
+Pais = Literal['Brasil', 'China', 'España', 'Pakistán', 'USA', 'India', 'Vietnam', 'Nigeria']
+Genero = Literal['Hombre', 'Mujer', 'Otro']
+Titulacion = Literal['Grado', 'Master', 'PHD', 'FP']
+CampoEstudio = Literal['Artes', 'Ing', 'IT', 'Salud', 'S.Sociales', 'Empresa']
+NivelIngles = Literal['Básico', 'Intermedio', 'Avanzado', 'Fluido']
+RankingUniversidad = Literal['Alto', 'Medio', 'Bajo']
+RegionEstudio = Literal['Australia', 'Europa', 'USA']
+
+PAISES = list(get_args(Pais))
+GENEROS = list(get_args(Genero))
+TITULACIONES = list(get_args(Titulacion))
+CAMPOS_ESTUDIO = list(get_args(CampoEstudio))
+NIVELES_INGLES = list(get_args(NivelIngles))
+RANKINGS_UNIVERSIDAD = list(get_args(RankingUniversidad))
+REGIONES_ESTUDIO = list(get_args(RegionEstudio))
+
+# Campo del payload validado -> valores del formulario
+CATEGORICAL_VALUES = {
+    'pais': PAISES,
+    'genero': GENEROS,
+    'titulacion': TITULACIONES,
+    'campo_estudio': CAMPOS_ESTUDIO,
+    'nivel_ingles': NIVELES_INGLES,
+    'universidad_ranking': RANKINGS_UNIVERSIDAD,
+    'region_estudio': REGIONES_ESTUDIO
+}
+
 
 class PredictRequest(BaseModel):
     """Modelo de validación para requests de predicción"""
@@ -12,61 +46,21 @@ class PredictRequest(BaseModel):
     # Datos personales
     nombre: Optional[str] = None
     edad: float = Field(..., ge=18, le=100, description="Edad del graduado")
-    pais: str = Field(..., description="País de origen")
-    genero: str = Field(..., description="Género")
+    pais: Pais = Field(..., description="País de origen")
+    genero: Genero = Field(..., description="Género")
     
     # Datos de formación con aliases para camelCase
-    titulacion: str = Field(..., description="Nivel de titulación")
+    titulacion: Titulacion = Field(..., description="Nivel de titulación")
     anios_desde_obtencion: float = Field(default=2.0, ge=0, le=50, description="Años desde graduación", 
                                          alias="aniosDesdeObtencion")
-    campo_estudio: str = Field(..., description="Campo de estudio", alias="campoEstudio")
-    nivel_ingles: str = Field(..., description="Nivel de inglés", alias="nivelIngles")
-    universidad_ranking: str = Field(..., description="Ranking de universidad", 
-                                     alias="universidadRanking")
-    region_estudio: str = Field(..., description="Región de estudio", alias="regionEstudio")
+    campo_estudio: CampoEstudio = Field(..., description="Campo de estudio", alias="campoEstudio")
+    nivel_ingles: NivelIngles = Field(..., description="Nivel de inglés", alias="nivelIngles")
+    universidad_ranking: RankingUniversidad = Field(..., description="Ranking de universidad", 
+                                                    alias="universidadRanking")
+    region_estudio: RegionEstudio = Field(..., description="Región de estudio", alias="regionEstudio")
     nota_media: float = Field(..., ge=0, le=10, description="Nota media", alias="notaMedia")
     practicas: bool = Field(default=False, description="Realizó prácticas")
 
-    @field_validator('pais')
-    @classmethod
-    def validate_pais(cls, v):
-        valid = ['Brasil', 'China', 'España', 'Pakistán', 'USA', 'India', 'Vietnam', 'Nigeria']
-        if v not in valid:
-            raise ValueError(f'País debe ser uno de: {valid}')
-        return v
-
-    @field_validator('genero')
-    @classmethod
-    def validate_genero(cls, v):
-        valid = ['Hombre', 'Mujer', 'Otro']
-        if v not in valid:
-            raise ValueError(f'Género debe ser uno de: {valid}')
-        return v
-
-    @field_validator('titulacion')
-    @classmethod
-    def validate_titulacion(cls, v):
-        valid = ['Grado', 'Master', 'PHD', 'FP']
-        if v not in valid:
-            raise ValueError(f'Titulación debe ser uno de: {valid}')
-        return v
-
-    @field_validator('campo_estudio')
-    @classmethod
-    def validate_campo(cls, v):
-        valid = ['Artes', 'Ing', 'IT', 'Salud', 'S.Sociales', 'Empresa']
-        if v not in valid:
-            raise ValueError(f'Campo de estudio debe ser uno de: {valid}')
-        return v
-
-    @field_validator('nivel_ingles')
-    @classmethod
-    def validate_ingles(cls, v):
-        valid = ['Básico', 'Intermedio', 'Avanzado', 'Fluido']
-        if v not in valid:
-            raise ValueError(f'Nivel de inglés debe ser uno de: {valid}')
-        return v
-
 
 class PredictResponse(BaseModel):
     """Modelo de respuesta de predicción"""
@@ -74,3 +68,47 @@ class PredictResponse(BaseModel):
     model_version: str = Field(..., description="Versión del modelo")
     confidence: Optional[float] = Field(None, description="Confianza de la predicción")
     salary_range: Optional[dict] = Field(None, description="Rango salarial")
+
+
+# --------------------------------------------------------------------------
+# --- VALIDACIÓN COMPILADA ---
+# --------------------------------------------------------------------------
+
+# Validadores construidos una vez al importar (no en cada petición)
+PREDICT_REQUEST_ADAPTER = TypeAdapter(PredictRequest)
+PREDICT_BATCH_ADAPTER = TypeAdapter(List[PredictRequest])
+
+
+def validate_request_json(body: bytes) -> Dict[str, Any]:
+    """
+    Valida el cuerpo JSON de /predict sin decodificarlo antes a dict y
+    devuelve el model_dump(). Lanza ValidationError (también si el JSON
+    está mal formado: error de tipo 'json_invalid').
+    """
+    return PredictRequest.model_validate_json(body).model_dump()
+
+
+def validate_batch(items: Sequence[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[int], List[dict]]:
+    """
+    Valida un lote de payloads (dicts) de una sola pasada. Devuelve las filas
+    válidas (model_dump), sus índices en `items` y los errores por fila. Si
+    alguna fila falla, se revalidan una a una para separar las buenas.
+    """
+    try:
+        requests = PREDICT_BATCH_ADAPTER.validate_python(items)
+        return [req.model_dump() for req in requests], list(range(len(items))), []
+    except ValidationError:
+        pass
+
+    rows, indices, errors = [], [], []
+    for index, item in enumerate(items):
+        try:
+            rows.append(PREDICT_REQUEST_ADAPTER.validate_python(item).model_dump())
+            indices.append(index)
+        except ValidationError as ve:
+            errors.append({
+                "index": index,
+                "error": "validation_error",
+                "details": ve.errors(include_url=False, include_context=False)
+            })
+    return rows, indices, errors
@@ -0,0 +1,465 @@
+"""
+service.py - Servicio único de inferencia
+
+InferenceService es el único punto de entrada a la predicción: prepara las
+features (traducción o tablas de codificación precompiladas), consulta la
+cache, agrupa peticiones (micro-batching), reparte lotes grandes entre
+procesos y accede al modelo. /api/predict, /api/predict/batch, las
+estadísticas, score.py y la función legacy predict_one pasan todos por aquí.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Union
+
+from app.models import predictor
+from app.utils.metrics import stage_timer
+
+
+# --------------------------------------------------------------------------
+# --- CACHE DE PREDICCIONES ---
+# --------------------------------------------------------------------------
+
+class PredictionCache:
+    """
+    Cache LRU acotada con TTL para predicciones.
+
+    La clave es la tupla de features normalizada tras
+    translate_features_to_english (o los bytes de la fila ya codificada con
+    las tablas del backend compilado). El valor es la predicción; el
+    intervalo de predict_with_interval se guarda aparte, con la clave
+    ('interval', clave). Las entradas
+    pertenecen a una versión del modelo (ModelVersion.uid): invalidate() la
+    cambia al activar un modelo nuevo, y las lecturas y escrituras de
+    peticiones que siguen con la versión anterior se ignoran.
+    """
+
+    def __init__(self, max_size: int = 4096, ttl: float = 3600.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._version: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(features: Dict[str, Any]) -> tuple:
+        """Tupla canónica de features en el orden que espera el modelo"""
+        from app.utils.helpers import MODEL_FEATURES
+        return tuple(features[column] for column in MODEL_FEATURES)
+
+    def configure(self, max_size: int, ttl: float):
+        """Ajusta tamaño y TTL (vacía la cache)"""
+        with self._lock:
+            self.max_size = max_size
+            self.ttl = ttl
+            self._entries.clear()
+
+    def _check_version(self, version: str) -> bool:
+        # Llamar con el lock adquirido. La primera versión vista se adopta;
+        # después solo invalidate() la cambia
+        if self._version is None:
+            self._version = version
+        return version == self._version
+
+    def invalidate(self, version: str):
+        """Vacía la cache y la asocia a la nueva versión del modelo"""
+        with self._lock:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+    def get(self, key: tuple, version: str) -> Optional[Union[float, tuple]]:
+        with self._lock:
+            if not self._check_version(version):
+                self.misses += 1
+                return None
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: tuple, value: Union[float, tuple], version: str):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            if not self._check_version(version):
+                return
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "model_version": self._version
+            }
+
+
+# --------------------------------------------------------------------------
+# --- SERVICIO DE INFERENCIA ---
+# --------------------------------------------------------------------------
+
+class InferenceService:
+    """
+    Preparación de features, cache, micro-batching, puntuación paralela y
+    acceso al modelo en un solo objeto.
+
+    - predict(data): una petición validada (PredictRequest.model_dump())
+    - predict_features(features): una fila ya traducida al inglés
+    - predict_records(rows): lote de registros en español
+    - predict_frame(frame): lote ya traducido (columnas de MODEL_FEATURES)
+    - predict_with_interval(data) / predict_intervals_frame(frame): lo mismo
+      con el intervalo de predicción de los árboles (app.models.intervals),
+      solo para quien lo pide (?intervals=1): recorre todos los árboles
+
+    Todos aceptan `active`, la ModelVersion con la que puntuar; por defecto
+    la activa. Quien necesite la versión para la respuesta la obtiene antes
+    con active_model() y la pasa, así la predicción y la versión coinciden
+    aunque el modelo se cambie entre medias.
+    """
+
+    def __init__(self, cache: Optional[PredictionCache] = None):
+        self.cache = cache if cache is not None else PredictionCache()
+        self.microbatcher = None
+        self.parallel = None
+        self.intervals_enabled = True
+        self.interval_coverage = 0.8
+
+    # --- Configuración ---
+
+    def configure_cache(self, max_size: int, ttl: float):
+        self.cache.configure(max_size, ttl)
+
+    def configure_intervals(self, enabled: bool, coverage: float = 0.8):
+        """Intervalos de predicción a partir de los árboles (desactivar si prima la latencia)"""
+        self.intervals_enabled = enabled
+        self.interval_coverage = coverage
+        self.cache.clear()
+
+    def configure_microbatching(self, enabled: bool, window_ms: float = 2.0, max_batch: int = 64,
+                                timeout: float = 5.0):
+        """
+        Las predicciones individuales que llegan dentro de la ventana se
+        puntúan juntas; cada una espera como mucho `timeout` segundos
+        (TimeoutError, 503 en /api/predict).
+        """
+        if not enabled:
+            self.microbatcher = None
+            return
+
+        from app.models.batching import MicroBatcher
+        self.microbatcher = MicroBatcher(self._score_microbatch, window_ms=window_ms,
+                                         max_batch=max_batch, timeout=timeout)
+
+    def configure_parallel_scoring(self, workers: int, chunk_size: int = 20000, min_rows: int = 50000,
+                                   start_method: str = 'forkserver'):
+        """
+        Pool de procesos para lotes grandes (workers <= 1: en serie). Con
+        'fork' (solo procesos de un solo hilo, como score.py) los workers
+        heredan el modelo en lugar de cargarlo.
+        """
+        if self.parallel is not None:
+            self.parallel.shutdown()
+        if workers <= 1:
+            self.parallel = None
+            return
+
+        from app.models.parallel import ParallelScorer
+        self.parallel = ParallelScorer(workers, chunk_size=chunk_size, min_rows=min_rows,
+                                       start_method=start_method)
+
+    # --- Acceso al modelo ---
+
+    @staticmethod
+    def active_model() -> 'predictor.ModelVersion':
+        """Versión activa del modelo (carga perezosa)"""
+        return predictor.get_active_model()
+
+    @staticmethod
+    def model():
+        """Motor de inferencia activo (carga perezosa); None en modo MOCK"""
+        return predictor.get_model()
+
+    @staticmethod
+    def version() -> str:
+        return predictor.get_model_version()
+
+    @staticmethod
+    def is_available() -> bool:
+        return predictor.is_predictor_available()
+
+    def _require_model(self, active=None) -> 'predictor.ModelVersion':
+        active = active if active is not None else self.active_model()
+        if active.engine is None:
+            raise Exception("Modelo no cargado")
+        return active
+
+    # --- Preparación de features ---
+
+    @staticmethod
+    def prepare_features(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Payload en español -> dict con las features en inglés del modelo"""
+        from app.utils.helpers import translate_features_to_english
+        return translate_features_to_english(data)
+
+    @staticmethod
+    def prepare_frame(rows: Union[List[Dict[str, Any]], 'pd.DataFrame']) -> 'pd.DataFrame':
+        """Lote en español -> DataFrame con las columnas de MODEL_FEATURES"""
+        from app.utils.helpers import translate_features_batch_to_english
+        return translate_features_batch_to_english(rows)
+
+    # --- Predicción ---
+
+    def _prepare_request(self, model, data: Dict[str, Any]) -> tuple:
+        """
+        (clave de cache, tipo, payload) de una petición: la fila codificada
+        con las tablas del backend compilado o, si no es posible, las
+        features traducidas al inglés.
+        """
+        encode = getattr(model, 'encode_request', None)
+        row = None
+        if encode is not None:
+            with stage_timer('encode'):
+                row = encode(data)
+        if row is None:
+            with stage_timer('translate'):
+                features = self.prepare_features(data)
+            return self.cache.make_key(features), 'features', features
+        return row.tobytes(), 'encoded', row
+
+    def predict(self, data: Dict[str, Any], active=None) -> float:
+        """
+        Predicción desde el payload validado. Con el backend compilado la fila
+        se construye directamente con las tablas de codificación
+        precompiladas; si no, se traducen las features.
+        """
+        active = self._require_model(active)
+        key, kind, payload = self._prepare_request(active.engine, data)
+        return self._predict_prepared(active, key, kind, payload)
+
+    def _predict_prepared(self, active, key, kind: str, payload) -> float:
+        """Predicción de una petición ya preparada con _prepare_request"""
+        model = active.engine
+        if kind == 'encoded' and getattr(model, 'lookup', None) is not None:
+            # La tabla de predicciones ya es una búsqueda O(1): la cache no aporta
+            with stage_timer('model_predict'):
+                return float(model.predict_encoded(payload)[0])
+
+        cached = self.cache.get(key, active.uid)
+        if cached is not None:
+            return cached
+
+        salary = self._score_one(model, kind, payload)
+        self.cache.put(key, salary, active.uid)
+        return salary
+
+    def predict_with_interval(self, data: Dict[str, Any], active=None) -> tuple:
+        """
+        (predicción, intervalo) desde el payload validado. La predicción es
+        la de predict() con el backend configurado (pipeline de sklearn,
+        compilado o tabla de predicciones). El intervalo
+        (app.models.intervals.row_interval) es None si están desactivados o
+        el modelo no es un bosque; se calcula con todos los árboles (filas
+        agrupadas por el micro-batcher) y se guarda aparte en la cache.
+        """
+        from app.models.intervals import forest_engine, row_interval, summarize_tree_predictions
+
+        active = self._require_model(active)
+        key, kind, payload = self._prepare_request(active.engine, data)
+        salary = self._predict_prepared(active, key, kind, payload)
+
+        engine = forest_engine(active) if self.intervals_enabled else None
+        if engine is None:
+            return salary, None
+
+        interval_key = ('interval', key)
+        interval = self.cache.get(interval_key, active.uid)
+        if interval is None:
+            X = payload if kind == 'encoded' else engine.encode_request(data)
+            if X is None:
+                import pandas as pd
+                X = engine.transform(pd.DataFrame([payload]))
+            per_tree = self._score_one(engine, 'trees', X)[None, :]
+            summary = summarize_tree_predictions(per_tree, self.interval_coverage)
+            interval = row_interval(summary, self.interval_coverage, per_tree.shape[1])
+            self.cache.put(interval_key, interval, active.uid)
+        return salary, interval
+
+    def predict_features(self, features: Dict[str, Any], active=None) -> float:
+        """Predicción para features ya traducidas al inglés, pasando por la cache"""
+        active = self._require_model(active)
+        model = active.engine
+
+        version = active.uid
+        key = self.cache.make_key(features)
+        cached = self.cache.get(key, version)
+        if cached is not None:
+            return cached
+
+        salary = self._score_one(model, 'features', features)
+        self.cache.put(key, salary, version)
+        return salary
+
+    def predict_frame(self, frame: 'pd.DataFrame', active=None) -> 'np.ndarray':
+        """
+        Predicciones para un DataFrame con las columnas de MODEL_FEATURES.
+        Los lotes grandes se reparten entre los procesos del pool si está
+        configurado; el resto se puntúa con una sola llamada al modelo.
+        """
+        active = self._require_model(active)
+        if self.parallel is None:
+            return active.engine.predict(frame)
+        return self.parallel.predict(active, frame)
+
+    def predict_intervals_frame(self, frame: 'pd.DataFrame', active=None) -> Optional[Dict[str, 'np.ndarray']]:
+        """
+        Predicciones e intervalos de un lote (columnas de MODEL_FEATURES) en
+        una sola pasada por todos los árboles: dict de arrays salary, min,
+        max, std y confidence. None si los intervalos no están disponibles.
+        """
+        from app.models.intervals import forest_engine, summarize_tree_predictions
+
+        active = self._require_model(active)
+        engine = forest_engine(active) if self.intervals_enabled else None
+        if engine is None:
+            return None
+        with stage_timer('model_predict'):
+            per_tree = engine.forest.tree_predictions(engine.transform(frame))
+        return summarize_tree_predictions(per_tree, self.interval_coverage)
+
+    def predict_records(self, rows: Union[List[Dict[str, Any]], 'pd.DataFrame'],
+                        active=None) -> 'np.ndarray':
+        """Traduce un lote de registros en español y lo puntúa con predict_frame"""
+        active = self._require_model(active)
+        return self.predict_frame(self.prepare_frame(rows), active)
+
+    def _score_one(self, model, kind: str, payload) -> Union[float, 'np.ndarray']:
+        """
+        Puntúa una sola fila, pasando por el micro-batcher si está activo.
+        Con kind 'trees' (fila codificada de un motor compilado) devuelve
+        las predicciones de cada árbol en lugar de la media.
+        """
+        if self.microbatcher is not None:
+            # Incluye la espera en la ventana del micro-batcher
+            with stage_timer('model_predict'):
+                return self.microbatcher.submit((model, kind, payload))
+        if kind == 'trees':
+            with stage_timer('model_predict'):
+                return model.forest.tree_predictions(payload)[0]
+        if kind == 'encoded':
+            with stage_timer('model_predict'):
+                return float(model.predict_encoded(payload)[0])
+
+        import pandas as pd
+        with stage_timer('dataframe'):
+            frame = pd.DataFrame([payload])
+        with stage_timer('model_predict'):
+            return float(model.predict(frame)[0])
+
+    def _score_microbatch(self, items: list) -> list:
+        """
+        Puntúa un lote de elementos encolados: (modelo, 'features', dict),
+        (modelo, 'encoded', fila) o (modelo, 'trees', fila). Una sola
+        llamada al modelo por tipo de elemento; tras un cambio de modelo,
+        cada elemento se puntúa con la versión que tenía su petición.
+        """
+        import numpy as np
+        results = [None] * len(items)
+
+        models = {id(model): model for model, _, _ in items}
+        for model_id, model in models.items():
+            features = [(i, payload) for i, (item_model, kind, payload) in enumerate(items)
+                        if id(item_model) == model_id and kind == 'features']
+            if features:
+                import pandas as pd
+                from app.utils.helpers import MODEL_FEATURES
+                frame = pd.DataFrame([payload for _, payload in features], columns=MODEL_FEATURES)
+                for (i, _), salary in zip(features, model.predict(frame)):
+                    results[i] = float(salary)
+
+            encoded = [(i, payload) for i, (item_model, kind, payload) in enumerate(items)
+                       if id(item_model) == model_id and kind == 'encoded']
+            if encoded:
+                rows = np.vstack([payload for _, payload in encoded])
+                for (i, _), salary in zip(encoded, model.predict_encoded(rows)):
+                    results[i] = float(salary)
+
+            trees = [(i, payload) for i, (item_model, kind, payload) in enumerate(items)
+                     if id(item_model) == model_id and kind == 'trees']
+            if trees:
+                rows = np.vstack([payload for _, payload in trees])
+                for (i, _), per_tree in zip(trees, model.forest.tree_predictions(rows)):
+                    results[i] = per_tree
+
+        return results
+
+    # --- Estado ---
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "prediction_cache": self.cache.stats(),
+            "microbatch": self.microbatcher.stats() if self.microbatcher else None,
+            "parallel_workers": self.parallel.workers if self.parallel else 1
+        }
+
+
+# --------------------------------------------------------------------------
+# --- SERVICIO GLOBAL ---
+# --------------------------------------------------------------------------
+
+INFERENCE_SERVICE = InferenceService()
+
+
+def configure_inference_service(app_config) -> InferenceService:
+    """Configura el servicio global a partir de la configuración (create_app)"""
+    INFERENCE_SERVICE.configure_cache(app_config.PREDICTION_CACHE_SIZE,
+                                      app_config.PREDICTION_CACHE_TTL)
+    INFERENCE_SERVICE.configure_intervals(app_config.PREDICTION_INTERVALS,
+                                          app_config.PREDICTION_INTERVAL_COVERAGE)
+    INFERENCE_SERVICE.configure_microbatching(app_config.MICROBATCH_ENABLED,
+                                              app_config.MICROBATCH_WINDOW_MS,
+                                              app_config.MICROBATCH_MAX_SIZE,
+                                              app_config.MICROBATCH_TIMEOUT)
+    INFERENCE_SERVICE.configure_parallel_scoring(app_config.SCORING_WORKERS,
+                                                 app_config.SCORING_CHUNK_SIZE,
+                                                 app_config.SCORING_MIN_PARALLEL_ROWS)
+    return INFERENCE_SERVICE
+
+
+def get_inference_service() -> InferenceService:
+    """Devuelve el servicio de inferencia global"""
+    return INFERENCE_SERVICE
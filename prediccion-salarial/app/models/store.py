@@ -0,0 +1,202 @@
+"""
+store.py - Almacenamiento de predicciones por form_id
+
+Dos backends con la misma interfaz:
+- MemoryPredictionStore: LRU en memoria del proceso (desarrollo y tests)
+- SQLitePredictionStore: fichero SQLite en modo WAL, compartido entre los
+  workers de Gunicorn y persistente entre reinicios
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+class PredictionStore(ABC):
+    """Interfaz común de los almacenes de predicciones"""
+
+    @abstractmethod
+    def get(self, form_id: str) -> Optional[Dict[str, Any]]:
+        """Predicción guardada para `form_id` (None si no existe o ha caducado)"""
+
+    @abstractmethod
+    def put(self, form_id: str, prediction: Dict[str, Any]):
+        """Guarda (o sustituye) la predicción de `form_id`"""
+
+    @abstractmethod
+    def clear(self):
+        """Elimina todas las predicciones"""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Número de predicciones guardadas"""
+
+
+class MemoryPredictionStore(PredictionStore):
+    """
+    Almacén LRU en memoria acotado por tamaño y TTL.
+    No se comparte entre procesos.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 86400.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, form_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(form_id)
+            if entry is None:
+                return None
+
+            prediction, created_at = entry
+            if time.time() - created_at > self.ttl:
+                del self._entries[form_id]
+                return None
+
+            self._entries.move_to_end(form_id)
+            return prediction
+
+    def put(self, form_id: str, prediction: Dict[str, Any]):
+        with self._lock:
+            self._entries[form_id] = (prediction, time.time())
+            self._entries.move_to_end(form_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class SQLitePredictionStore(PredictionStore):
+    """
+    Almacén SQLite en modo WAL (lecturas concurrentes con un escritor).
+    Cada hilo/proceso abre su propia conexión. La expulsión por TTL y tamaño
+    se hace cada `evict_every` escrituras para no penalizar cada inserción.
+    """
+
+    def __init__(self, path: str, max_size: int = 10000, ttl: float = 86400.0,
+                 evict_every: int = 100):
+        self.path = str(path)
+        self.max_size = max_size
+        self.ttl = ttl
+        self.evict_every = evict_every
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+        self._init_schema()
+
+    def _connection(self) -> sqlite3.Connection:
+        # Reabrir tras un fork: las conexiones no se pueden compartir entre procesos
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _init_schema(self):
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS predictions ("
+            " form_id TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_predictions_form_id "
+            "ON predictions (form_id)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_predictions_created_at "
+            "ON predictions (created_at)"
+        )
+
+    def get(self, form_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            "SELECT payload FROM predictions WHERE form_id = ? AND created_at >= ?",
+            (form_id, time.time() - self.ttl)
+        ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0])
+
+    def put(self, form_id: str, prediction: Dict[str, Any]):
+        self._connection().execute(
+            "INSERT OR REPLACE INTO predictions (form_id, payload, created_at) "
+            "VALUES (?, ?, ?)",
+            (form_id, json.dumps(prediction), time.time())
+        )
+        with self._writes_lock:
+            self._writes += 1
+            should_evict = self._writes % self.evict_every == 0
+        if should_evict:
+            self.evict()
+
+    def evict(self):
+        """Elimina predicciones caducadas y las más antiguas por encima de max_size"""
+        conn = self._connection()
+        conn.execute("DELETE FROM predictions WHERE created_at < ?",
+                     (time.time() - self.ttl,))
+        conn.execute(
+            "DELETE FROM predictions WHERE rowid IN ("
+            " SELECT rowid FROM predictions ORDER BY created_at DESC"
+            " LIMIT -1 OFFSET ?)",
+            (self.max_size,)
+        )
+
+    def clear(self):
+        self._connection().execute("DELETE FROM predictions")
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+
+
+# --------------------------------------------------------------------------
+# --- ALMACÉN GLOBAL ---
+# --------------------------------------------------------------------------
+
+_STORE: Optional[PredictionStore] = None
+
+
+def create_prediction_store(backend: str, path: str, max_size: int, ttl: float) -> PredictionStore:
+    """Crea el almacén según el backend configurado ('memory' o 'sqlite')"""
+    if backend == 'sqlite':
+        return SQLitePredictionStore(path, max_size=max_size, ttl=ttl)
+    if backend == 'memory':
+        return MemoryPredictionStore(max_size=max_size, ttl=ttl)
+    raise ValueError(f"Backend de almacenamiento desconocido: '{backend}'")
+
+
+def init_prediction_store(app_config) -> PredictionStore:
+    """Inicializa el almacén global a partir de la configuración (create_app)"""
+    global _STORE
+    _STORE = create_prediction_store(
+        app_config.PREDICTION_STORE,
+        app_config.PREDICTION_STORE_PATH,
+        app_config.PREDICTION_STORE_MAX_SIZE,
+        app_config.PREDICTION_STORE_TTL
+    )
+    return _STORE
+
+
+def get_prediction_store() -> PredictionStore:
+    """Devuelve el almacén global (en memoria si no se ha inicializado)"""
+    global _STORE
+    if _STORE is None:
+        _STORE = MemoryPredictionStore()
+    return _STORE
@@ -0,0 +1,173 @@
+"""
+synthetic.py - Modelo y datos sintéticos deterministas
+
+Entrena un Pipeline (ColumnTransformer + RandomForest) con el mismo esquema
+de features que produce translate_features_to_english, sobre datos
+generados con una semilla fija, y lo guarda junto a metadata.json en
+data/synthetic/ (ignorado por git). Sirve para tests, benchmarks y pruebas
+de carga sin el modelo real; para servirlo con la app hay que escribirlo
+expresamente en data/ con --data-dir.
+
+Uso (desde prediccion-salarial/):
+    python -m app.models.synthetic            # no sobrescribe un modelo existente
+    python -m app.models.synthetic --force --trees 100 --rows 20000
+    python -m app.models.synthetic --data-dir data   # sustituye al modelo de la app
+"""
+
+import argparse
+import json
+import logging
+import os
+import pickle
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List
+
+from app.utils.helpers import CATEGORICAL_FIELDS, MODEL_FEATURES
+
+# Nombre fijo: con python -m el módulo se llama __main__
+logger = logging.getLogger('app.models.synthetic')
+
+# Fuera de data/: por defecto no ocupa el sitio del modelo de producción
+DATA_DIR = Path(__file__).parent.parent.parent / 'data' / 'synthetic'
+
+# Categorías en inglés que produce translate_features_to_english, en el orden
+# de los mapas de helpers
+CATEGORIES: Dict[str, List[str]] = {
+    column: list(dict.fromkeys(mapping.values()))
+    for column, mapping, _ in CATEGORICAL_FIELDS.values()
+}
+NUMERIC = ['Age', 'Years_Since_Graduation', 'GPA_10', 'Internship_Experience']
+
+SYNTHETIC_VERSION = '1.0.0-synthetic'
+
+# Efectos sobre el salario de cada categoría (el resto suma 0)
+_EFFECTS = {
+    'Country_of_Origin': {'USA': 18000, 'Spain': 6000, 'China': 4000, 'Brazil': 1000, 'India': -2000},
+    'Education_Level': {'FP': -4000, 'Master': 5000, 'PhD': 9000},
+    'Field_of_Study': {'Computer Science': 9000, 'Engineering': 7000, 'Business': 4000, 'Arts': -5000},
+    'University_Ranking': {'Top 100': 6000, 'Top 500': 2500},
+    'Language_Proficiency': {'Basic': -3000, 'Advanced': 2000, 'Fluent': 3500},
+    'Gender': {'Male': 1500}
+}
+
+
+def generate_features(n_rows: int, seed: int = 42):
+    """DataFrame determinista de n_rows filas con las columnas de MODEL_FEATURES"""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({column: rng.choice(values, n_rows) for column, values in CATEGORIES.items()})
+    frame['Age'] = rng.integers(20, 40, n_rows).astype(float)
+    frame['Years_Since_Graduation'] = rng.integers(0, 10, n_rows).astype(float)
+    frame['GPA_10'] = rng.uniform(5, 10, n_rows).round(1)
+    frame['Internship_Experience'] = rng.integers(0, 2, n_rows)
+    return frame[MODEL_FEATURES]
+
+
+def synthetic_salary(frame, seed: int = 42):
+    """Salario sintético: efectos aditivos por categoría, numéricos y ruido"""
+    import numpy as np
+
+    rng = np.random.default_rng(seed + 1)
+    salary = (22000 + frame['Age'] * 250 + frame['Years_Since_Graduation'] * 1200
+              + frame['GPA_10'] * 900 + frame['Internship_Experience'] * 2500)
+    for column, effects in _EFFECTS.items():
+        salary = salary + frame[column].map(effects).fillna(0)
+    return salary + rng.normal(0, 2500, len(frame))
+
+
+def build_synthetic_pipeline(n_rows: int = 5000, n_estimators: int = 50, max_depth: int = 12,
+                             seed: int = 42):
+    """Entrena el Pipeline sintético (mismo resultado para los mismos argumentos)"""
+    from sklearn.compose import ColumnTransformer
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+    frame = generate_features(n_rows, seed)
+    preprocessor = ColumnTransformer([
+        ('cat', OneHotEncoder(handle_unknown='ignore'), list(CATEGORIES)),
+        ('num', StandardScaler(), NUMERIC)
+    ])
+    pipeline = Pipeline([
+        ('preprocessor', preprocessor),
+        ('model', RandomForestRegressor(n_estimators=n_estimators, max_depth=max_depth,
+                                        random_state=seed))
+    ])
+    return pipeline.fit(frame, synthetic_salary(frame, seed))
+
+
+def write_synthetic_model(data_dir: Path = DATA_DIR, n_rows: int = 5000, n_estimators: int = 50,
+                          max_depth: int = 12, seed: int = 42, force: bool = False) -> Path:
+    """
+    Entrena el modelo sintético y escribe modelo_entrenado.pkl y metadata.json
+    en `data_dir`. No sobrescribe un modelo existente salvo con force=True.
+    """
+    from sklearn.metrics import mean_absolute_error, r2_score
+
+    data_dir = Path(data_dir)
+    model_path = data_dir / 'modelo_entrenado.pkl'
+    if model_path.exists() and not force:
+        raise FileExistsError(f"Ya existe {model_path} (usa --force para sobrescribirlo)")
+
+    pipeline = build_synthetic_pipeline(n_rows, n_estimators, max_depth, seed)
+
+    holdout = generate_features(max(n_rows // 5, 100), seed + 100)
+    expected = synthetic_salary(holdout, seed + 100)
+    predicted = pipeline.predict(holdout)
+
+    metadata = {
+        "version": SYNTHETIC_VERSION,
+        "trained_at": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        "synthetic": True,
+        "params": {"rows": n_rows, "n_estimators": n_estimators, "max_depth": max_depth, "seed": seed},
+        "metrics": {
+            "r2": round(float(r2_score(expected, predicted)), 4),
+            "mae": round(float(mean_absolute_error(expected, predicted)), 2)
+        },
+        "features": MODEL_FEATURES
+    }
+
+    data_dir.mkdir(parents=True, exist_ok=True)
+    # Escritura atómica: un worker que cargue el modelo nunca ve un fichero a medias
+    tmp_path = model_path.with_name(f"{model_path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'wb') as file:
+        pickle.dump(pipeline, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, model_path)
+    (data_dir / 'metadata.json').write_text(json.dumps(metadata, indent=2), encoding='utf-8')
+
+    # La copia memory-mapped del modelo anterior ya no es válida
+    mmap_path = data_dir / 'modelo_entrenado.joblib'
+    if mmap_path.exists():
+        mmap_path.unlink()
+
+    logger.info("Modelo sintético escrito en %s (r2=%.3f, mae=%.0f)", model_path,
+                metadata['metrics']['r2'], metadata['metrics']['mae'])
+    return model_path
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Genera un modelo sintético determinista (por defecto en data/synthetic/)")
+    parser.add_argument('--data-dir', type=Path, default=DATA_DIR)
+    parser.add_argument('--rows', type=int, default=5000, help="Filas de entrenamiento")
+    parser.add_argument('--trees', type=int, default=50, help="Árboles del RandomForest")
+    parser.add_argument('--max-depth', type=int, default=12)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--force', action='store_true', help="Sobrescribir un modelo existente")
+    args = parser.parse_args(argv)
+
+    from app.utils.logger import setup_logging
+    setup_logging('INFO', fmt='text')
+    try:
+        write_synthetic_model(args.data_dir, args.rows, args.trees, args.max_depth, args.seed, args.force)
+    except FileExistsError as e:
+        logger.error("%s", e)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,65 +2,105 @@
 api.py - Endpoints API REST
 """
 
+import hmac
 import time
+import json
+import logging
 import random
 import uuid
 from datetime import datetime
-from typing import Dict
-import pandas as pd
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, current_app, g
 from pydantic import ValidationError
 
-from app.models.schema import PredictRequest
-from app.models.predictor import predict_one, load_meta, MODEL, _PREDICTOR_AVAILABLE
+from app.models.registry import ModelReloadInProgress, get_model_registry
+from app.models.schema import validate_batch, validate_request_json
+from app.models.service import get_inference_service
+from app.models.store import get_prediction_store
+from app.models.predictor import (
+    load_meta,
+    is_predictor_available,
+    STARTUP_TIMINGS
+)
 from app.utils.helpers import (
     build_comparisons,
     get_stats_cache,
-    translate_features_to_english,
-    COUNTRY_MAP,
-    GENDER_MAP,
-    EDUCATION_MAP,
-    FIELD_MAP
+    resolve_statistics_profile,
+    compute_statistics
 )
+from app.utils.json_provider import cached_json_response
+from app.utils.metrics import stage_timer, record_request, render_metrics
 
 # Crear blueprint para la API
 api = Blueprint('api', __name__, url_prefix='/api')
 
+logger = logging.getLogger(__name__)
+
 # ID único de sesión del servidor (se regenera cada vez que se lanza el servidor)
 SERVER_SESSION_ID = str(uuid.uuid4())
 
-# Base de datos mock de predicciones
-predictions_db: Dict = {}
+
+@api.before_request
+def _start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@api.after_request
+def _record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        record_request(endpoint, response.status_code, time.perf_counter() - started)
+    return response
+
+
+def _version_label(active) -> str:
+    """Versión que se devuelve al cliente (la de metadata, o la mock)"""
+    if active.available:
+        return active.version
+    return load_meta().get("version", "unknown")
 
 
 @api.route('/health')
 def health():
     """Endpoint de health check"""
-    status = "ok" if _PREDICTOR_AVAILABLE else "ok (mock)"
+    # El health check también sirve de calentamiento: fuerza la carga perezosa
+    predictor_available = is_predictor_available()
+    status = "ok" if predictor_available else "ok (mock)"
     body = {
         "status": status,
         "timestamp": datetime.now().isoformat(),
         "version": load_meta().get("version", "unknown"),
-        "server_session_id": SERVER_SESSION_ID
+        "server_session_id": SERVER_SESSION_ID,
+        "startup_timings": STARTUP_TIMINGS,
+        **get_inference_service().stats(),
+        "model_registry": get_model_registry().stats()
     }
-    if not _PREDICTOR_AVAILABLE:
+    asgi_executor = current_app.extensions.get('asgi_executor')
+    if asgi_executor is not None:
+        body["asgi_executor"] = asgi_executor.stats()
+    if not predictor_available:
         body["note"] = "Predictor no cargado, usando modo mock"
     return jsonify(body), 200
 
 
 @api.route('/model/info')
 def model_info():
-    """Información del modelo ML"""
-    try:
+    """Información del modelo ML (serializada una vez por versión del modelo)"""
+    def build():
         meta = load_meta()
-        return jsonify({
+        return {
             "version": meta.get("version", "unknown"),
             "trained_at": meta.get("trained_at", "unknown"),
             "metrics": meta.get("metrics", {}),
             "features": meta.get("features", []),
-            "predictor_available": _PREDICTOR_AVAILABLE
-        }), 200
+            "predictor_available": is_predictor_available()
+        }
+
+    try:
+        # is_predictor_available() fuerza la carga perezosa antes de leer el uid
+        is_predictor_available()
+        return cached_json_response('model_info', get_model_registry().current().uid, build)
     except Exception as e:
         return jsonify({
             "error": "meta_error",
@@ -68,24 +108,40 @@ def model_info():
         }), 500
 
 
+@api.route('/metrics')
+def metrics():
+    """Métricas en formato de exposición de Prometheus (por proceso)"""
+    stats = get_inference_service().stats()
+    body = render_metrics(STARTUP_TIMINGS, stats['prediction_cache'], stats['microbatch'])
+    return Response(body, mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
 @api.route('/predict', methods=['POST'])
 def predict():
     """
     Endpoint principal de predicción con validación Pydantic
-    Acepta JSON y retorna predicción + comparaciones
+    Acepta JSON y retorna predicción + comparaciones; con ?intervals=1
+    statistics incluye el rango y la confianza de los árboles del bosque
     """
-    # Simular tiempo de procesamiento
-    time.sleep(1)
+    # Latencia simulada opcional (modo demo, nunca en producción)
+    simulated_latency = current_app.config.get('SIMULATED_LATENCY', 0)
+    if simulated_latency > 0:
+        time.sleep(simulated_latency)
 
-    # 1. Validación con Pydantic
+    # 1. Validación con Pydantic directamente desde el cuerpo JSON
     try:
-        payload = request.get_json(force=True) or {}
-        req = PredictRequest(**payload)
-        data = req.model_dump()
+        with stage_timer('validation'):
+            data = validate_request_json(request.get_data(cache=False) or b'{}')
     except ValidationError as ve:
+        errors = ve.errors()
+        if errors and errors[0]['type'] == 'json_invalid':
+            return jsonify({
+                "error": "bad_request",
+                "details": errors[0]['msg']
+            }), 400
         return jsonify({
             "error": "validation_error",
-            "details": ve.errors()
+            "details": errors
         }), 422
     except Exception as e:
         return jsonify({
@@ -96,59 +152,52 @@ def predict():
     # 2. Obtener form_id
     form_id = data.get('form_id', f"pred_{int(time.time())}")
 
-    # 3. Preparar features para el modelo
+    # 3. Realizar predicción con el servicio de inferencia (codificación con
+    # tablas precompiladas o traducción, cache y micro-batching)
     try:
-        features = translate_features_to_english(data)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Usando MODELO REAL para prediccion", extra={'request_data': dict(data)})
+
+        # La versión se fija al principio: si el modelo se recarga durante la
+        # petición, la predicción y model_version siguen siendo coherentes
+        service = get_inference_service()
+        active = service.active_model()
+        # ?intervals=1: rango y confianza a partir de los árboles (recorre el
+        # bosque completo; sin él basta con el backend configurado)
+        if request.args.get('intervals') == '1':
+            salary, interval = service.predict_with_interval(data, active)
+        else:
+            salary, interval = service.predict(data, active), None
+        logger.debug("Prediccion realizada: %.2f", salary)
+
+        model_version = _version_label(active)
     except ValueError as e:
         return jsonify({
             "error": "missing_field",
             "details": str(e)
         }), 400
-
-    # 4. Realizar predicción
-    try:
-        # El modelo espera un DataFrame con columnas en inglés
-        df = pd.DataFrame([features])
-
-        print(f"[INFO] Usando MODELO REAL para prediccion")
-        print(f"[INFO] Columnas del DataFrame: {list(df.columns)}")
-        print(f"[INFO] Valores: {df.iloc[0].to_dict()}")
-
-        if MODEL is None:
-            raise Exception("Modelo no cargado")
-
-        # Predicción directa con el modelo
-        salary = float(MODEL.predict(df)[0])
-        print(f"[INFO] Prediccion realizada: {salary:.2f}")
-
-        model_version = load_meta().get("version", "unknown")
+    except TimeoutError as e:
+        # Micro-batcher atascado o saturado: el cliente puede reintentar
+        logger.error("Prediccion sin respuesta: %s", e)
+        return jsonify({
+            "error": "overloaded",
+            "details": str(e)
+        }), 503, {'Retry-After': '1'}
     except Exception as e:
-        print(f"[ERROR] Error en prediccion: {e}")
-        print(f"[ERROR] Features enviadas: {features}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error en prediccion: %s", e, extra={'request_data': dict(data)})
         return jsonify({
             "error": "prediction_error",
             "details": str(e)
         }), 500
 
-    # 4.5. Easter Egg para Santiago Die
+    # 3.5. Easter Egg para Santiago Die
     nombre_lower = data.get('nombre', '').strip().lower()
 
     # Debug: mostrar valores recibidos si el nombre coincide
-    if nombre_lower == 'santiago die':
-        print(f"[DEBUG] Valores recibidos para easter egg:")
-        print(f"  - nombre: {data.get('nombre')} (lower: {nombre_lower})")
-        print(f"  - edad: {data.get('edad')} (tipo: {type(data.get('edad'))})")
-        print(f"  - pais: {data.get('pais')}")
-        print(f"  - genero: {data.get('genero')}")
-        print(f"  - titulacion: {data.get('titulacion')}")
-        print(f"  - campo_estudio: {data.get('campo_estudio')}")
-        print(f"  - nivel_ingles: {data.get('nivel_ingles')}")
-        print(f"  - region_estudio: {data.get('region_estudio')}")
-        print(f"  - universidad_ranking: {data.get('universidad_ranking')}")
-        print(f"  - nota_media: {data.get('nota_media')} (tipo: {type(data.get('nota_media'))})")
-        print(f"  - practicas: {data.get('practicas')} (tipo: {type(data.get('practicas'))})")
+    if nombre_lower == 'santiago die' and logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Valores recibidos para easter egg", extra={
+            'request_data': {key: f"{value!r} ({type(value).__name__})" for key, value in data.items()}
+        })
 
     if (nombre_lower == 'santiago die' and
         float(data.get('edad', 0)) == 23.0 and
@@ -162,31 +211,171 @@ def predict():
         abs(float(data.get('nota_media', 0)) - 6.7) < 0.01 and
         data.get('practicas', True) == False):
 
-        print(f"[EASTER EGG] 🎉 ¡Bienvenido Santiago Die! Bonus de 100,000 aplicado")
+        logger.info("🎉 ¡Bienvenido Santiago Die! Bonus de 100,000 aplicado")
         salary += 100000
+        if interval is not None:
+            interval = dict(interval, min=interval['min'] + 100000, max=interval['max'] + 100000)
+
+    # 4. Construir respuesta completa
+    with stage_timer('build_comparisons'):
+        comparisons = build_comparisons(data, salary)
 
-    # 5. Construir respuesta completa
     result = {
         'salary': salary,
         'form_id': form_id,
         'model_version': model_version,
         'timestamp': datetime.now().isoformat(),
-        'using_real_model': _PREDICTOR_AVAILABLE,
-        'comparisons': build_comparisons(data, salary),
-        'statistics': {
+        'using_real_model': active.available,
+        'comparisons': comparisons,
+        'statistics': _prediction_statistics(salary, interval)
+    }
+
+    # 5. Guardar en el almacén de predicciones
+    get_prediction_store().put(form_id, result)
+
+    with stage_timer('serialization'):
+        response = jsonify(result)
+    return response, 200
+
+
+def _prediction_statistics(salary: float, interval) -> dict:
+    """
+    Bloque `statistics` de /api/predict: rango y confianza a partir de los
+    árboles del bosque. Sin intervalo (desactivados o modo MOCK) el rango es
+    el fijo de siempre y no se da confianza.
+    """
+    if interval is None:
+        return {
             'total_predictions': random.randint(1000, 5000),
-            'confidence': random.randint(75, 95),
-            'salary_range': {
-                'min': salary - 5000,
-                'max': salary + 8000
-            }
+            'confidence': None,
+            'salary_range': {'min': salary - 5000, 'max': salary + 8000},
+            'interval': None
         }
+    return {
+        'total_predictions': random.randint(1000, 5000),
+        'confidence': interval['confidence'],
+        'salary_range': {'min': interval['min'], 'max': interval['max']},
+        'interval': {key: interval[key] for key in ('std', 'coverage', 'trees')}
     }
 
-    # 6. Guardar en base de datos mock
-    predictions_db[form_id] = result
 
-    return jsonify(result), 200
+def _parse_batch_payload():
+    """
+    Lee el cuerpo de /predict/batch como array JSON o como NDJSON (un objeto por línea).
+    Devuelve (items, errors): las líneas NDJSON mal formadas se reportan por fila.
+    """
+    content_type = (request.content_type or '').split(';')[0].strip().lower()
+    errors = []
+
+    if content_type in ('application/x-ndjson', 'application/ndjson', 'application/jsonl'):
+        items = []
+        lines = request.get_data(as_text=True).splitlines()
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError as e:
+                errors.append({
+                    "index": len(items),
+                    "error": "bad_request",
+                    "details": f"JSON inválido: {e}"
+                })
+                items.append(None)
+        return items, errors
+
+    payload = request.get_json(force=True)
+    if not isinstance(payload, list):
+        raise ValueError("Se esperaba un array JSON de predicciones")
+    return payload, errors
+
+
+@api.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """
+    Predicción por lotes con validación Pydantic por fila.
+    Acepta un array JSON o NDJSON de payloads de /predict y puntúa todas las
+    filas válidas con el servicio de inferencia (una llamada al modelo, o
+    repartida entre el pool de procesos si el lote es grande). Los errores de
+    validación se devuelven por fila sin hacer fallar el lote. Con
+    ?intervals=1 cada resultado incluye salary_range y confidence.
+    """
+    # 1. Leer el lote
+    try:
+        items, errors = _parse_batch_payload()
+    except Exception as e:
+        return jsonify({
+            "error": "bad_request",
+            "details": str(e)
+        }), 400
+
+    max_rows = current_app.config.get('BATCH_MAX_ROWS', 100000)
+    if len(items) > max_rows:
+        return jsonify({
+            "error": "batch_too_large",
+            "details": f"El lote tiene {len(items)} filas (máximo {max_rows})"
+        }), 413
+
+    # 2. Validación con Pydantic de todas las filas de una vez
+    candidates = []
+    for index, item in enumerate(items):
+        if item is None:
+            continue
+        if not isinstance(item, dict):
+            errors.append({
+                "index": index,
+                "error": "bad_request",
+                "details": "Cada elemento del lote debe ser un objeto JSON"
+            })
+            continue
+        candidates.append(index)
+
+    valid_rows, valid, row_errors = validate_batch([items[index] for index in candidates])
+    valid_indices = [candidates[position] for position in valid]
+    for error in row_errors:
+        error["index"] = candidates[error["index"]]
+    errors.extend(row_errors)
+
+    # 3. Traducir y predecir todo el lote de una vez
+    service = get_inference_service()
+    active = service.active_model()
+    results = []
+    if valid_rows:
+        summary = None
+        try:
+            # ?intervals=1: rango y confianza por fila en la misma pasada por los árboles
+            if request.args.get('intervals') == '1':
+                summary = service.predict_intervals_frame(service.prepare_frame(valid_rows), active)
+            salaries = (summary['salary'] if summary is not None
+                        else service.predict_records(valid_rows, active))
+        except Exception as e:
+            logger.exception("Error en prediccion por lotes: %s", e)
+            return jsonify({
+                "error": "prediction_error",
+                "details": str(e)
+            }), 500
+
+        results = [
+            {"index": index, "salary": float(salary)}
+            for index, salary in zip(valid_indices, salaries)
+        ]
+        if summary is not None:
+            for result, low, high, confidence in zip(results, summary['min'], summary['max'],
+                                                     summary['confidence']):
+                result["salary_range"] = {"min": float(low), "max": float(high)}
+                result["confidence"] = int(confidence)
+
+    errors.sort(key=lambda err: err["index"])
+
+    return jsonify({
+        "model_version": _version_label(active),
+        "using_real_model": active.available,
+        "total": len(items),
+        "succeeded": len(results),
+        "failed": len(errors),
+        "results": results,
+        "errors": errors
+    }), 200
 
 
 @api.route('/statistics', methods=['POST'])
@@ -199,7 +388,7 @@ def get_statistics():
     filters = request.json or {}
     stats_cache = get_stats_cache()
 
-    if MODEL is None:
+    if get_inference_service().model() is None:
         # Si no hay modelo, devolver cache con valores mock
         from app.utils.helpers import FIELD_AVERAGES
         field_key = filters.get('campoEstudio', 'IT')
@@ -215,92 +404,13 @@ def get_statistics():
             'average_grade': field_stats['grade']
         }), 200
 
-    print(f"[INFO] Calculando estadisticas con filtros: {filters}")
-
-    # Perfil base (se sobrescribirá con filtros)
-    base_profile = {
-        'Age': 28.0,
-        'Years_Since_Graduation': 3.0,
-        'GPA_10': 7.5,
-        'Internship_Experience': 1,
-        'Gender': 'Male',
-        'Education_Level': 'Bachelor',
-        'Field_of_Study': 'Computer Science',
-        'Language_Proficiency': 'Intermediate',
-        'University_Ranking': 'Top 500',
-        'Region_of_Study': 'Europe'
-    }
-
-    # Aplicar filtros al perfil base
-    if filters.get('pais'):
-        base_profile['Country_of_Origin'] = COUNTRY_MAP.get(filters['pais'].lower(), 'Spain')
-    else:
-        base_profile['Country_of_Origin'] = 'Spain'
-
-    if filters.get('genero'):
-        base_profile['Gender'] = GENDER_MAP.get(filters['genero'].lower(), 'Male')
+    logger.debug("Calculando estadisticas con filtros: %s", filters)
 
-    if filters.get('formacion'):
-        base_profile['Education_Level'] = EDUCATION_MAP.get(filters['formacion'].lower(), 'Bachelor')
-
-    if filters.get('campoEstudio'):
-        base_profile['Field_of_Study'] = FIELD_MAP.get(filters['campoEstudio'].lower(), 'Computer Science')
-
-    # Calcular estadísticas POR PAÍS con el perfil filtrado
-    stats_by_country = {}
-    countries = ['Brazil', 'China', 'Spain', 'Pakistan', 'USA', 'India', 'Vietnam', 'Nigeria']
-    for country in countries:
-        profile = base_profile.copy()
-        profile['Country_of_Origin'] = country
-        try:
-            df = pd.DataFrame([profile])
-            salary = float(MODEL.predict(df)[0])
-            stats_by_country[country] = salary
-        except Exception as e:
-            print(f"[ERROR] Error calculando {country}: {e}")
-            stats_by_country[country] = stats_cache['by_country'].get(country, 50000)
-
-    # Calcular estadísticas POR EDUCACIÓN con el perfil filtrado
-    stats_by_education = {}
-    education_levels = ['FP', 'Bachelor', 'Master', 'PhD']
-    for edu in education_levels:
-        profile = base_profile.copy()
-        profile['Education_Level'] = edu
-        try:
-            df = pd.DataFrame([profile])
-            salary = float(MODEL.predict(df)[0])
-            stats_by_education[edu] = salary
-        except Exception as e:
-            print(f"[ERROR] Error calculando {edu}: {e}")
-            stats_by_education[edu] = stats_cache['by_education'].get(edu, 50000)
-
-    # Calcular estadísticas POR CAMPO con el perfil filtrado
-    stats_by_field = {}
-    fields = ['Arts', 'Engineering', 'Computer Science', 'Health', 'Social Sciences', 'Business']
-    for field in fields:
-        profile = base_profile.copy()
-        profile['Field_of_Study'] = field
-        try:
-            df = pd.DataFrame([profile])
-            salary = float(MODEL.predict(df)[0])
-            stats_by_field[field] = salary
-        except Exception as e:
-            print(f"[ERROR] Error calculando {field}: {e}")
-            stats_by_field[field] = stats_cache['by_field'].get(field, 50000)
-
-    # Calcular estadísticas POR GÉNERO (para el gráfico de campo de estudio)
-    stats_by_gender = {}
-    genders = ['Male', 'Female']
-    for gender in genders:
-        profile = base_profile.copy()
-        profile['Gender'] = gender
-        try:
-            df = pd.DataFrame([profile])
-            salary = float(MODEL.predict(df)[0])
-            stats_by_gender[gender] = salary
-        except Exception as e:
-            print(f"[ERROR] Error calculando {gender}: {e}")
-            stats_by_gender[gender] = 50000
+    # Perfil base con los filtros aplicados; la tabla precalculada al cargar
+    # el modelo resuelve los 20 perfiles contrafactuales con una búsqueda
+    profile = resolve_statistics_profile(filters)
+    stats = compute_statistics(profile)
+    stats_by_country = stats['by_country']
 
     # Calcular edad y nota media basadas en el campo de estudio
     from app.utils.helpers import FIELD_AVERAGES
@@ -312,25 +422,50 @@ def get_statistics():
     average_age = field_stats['age']
     average_grade = field_stats['grade']
 
-    print(f"[INFO] Estadisticas calculadas con filtros aplicados")
-    print(f"[INFO] Edad media: {average_age}, Nota media: {average_grade}")
+    logger.debug("Estadisticas calculadas: edad media %s, nota media %s", average_age, average_grade)
 
     return jsonify({
         'average_salary': sum(stats_by_country.values()) / len(stats_by_country),
         'total_graduates': random.randint(800, 1200),
         'by_country': stats_by_country,
-        'by_education': stats_by_education,
-        'by_field': stats_by_field,
-        'by_gender': stats_by_gender,
+        'by_education': stats['by_education'],
+        'by_field': stats['by_field'],
+        'by_gender': stats['by_gender'],
         'average_age': average_age,
         'average_grade': average_grade
     }), 200
 
 
+@api.route('/admin/reload-model', methods=['POST'])
+def reload_model():
+    """
+    Recarga el modelo de data/ sin reiniciar. Requiere la cabecera
+    X-Admin-Token igual a ADMIN_TOKEN (sin ADMIN_TOKEN está desactivado).
+    Por defecto responde 202 y recarga en segundo plano; con ?wait=1
+    espera y devuelve la versión activada.
+    """
+    token = current_app.config.get('ADMIN_TOKEN', '')
+    if not token or not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), token):
+        return jsonify({"error": "forbidden"}), 403
+
+    registry = get_model_registry()
+    wait = request.args.get('wait', '0') in ('1', 'true')
+    try:
+        version = registry.reload(wait=wait)
+    except ModelReloadInProgress as e:
+        return jsonify({"error": "reload_in_progress", "details": str(e)}), 409
+
+    if not wait:
+        return jsonify({"status": "reloading", "active": registry.stats()["active"]}), 202
+    if version is None:
+        return jsonify({"error": "reload_failed", "details": registry.last_error}), 500
+    return jsonify({"status": "reloaded", **registry.stats()}), 200
+
+
 @api.route('/prediction/<form_id>')
 def get_prediction(form_id):
     """Obtener predicción por ID"""
-    prediction = predictions_db.get(form_id)
+    prediction = get_prediction_store().get(form_id)
 
     if not prediction:
         return jsonify({
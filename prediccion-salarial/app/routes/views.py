@@ -4,13 +4,11 @@ views.py - Rutas para renderizado de páginas HTML
 
 from flask import Blueprint, render_template, redirect, url_for, request
 from app.models.predictor import load_meta
+from app.models.store import get_prediction_store
 
 # Crear blueprint para las vistas
 views = Blueprint('views', __name__)
 
-# Base de datos mock de predicciones (compartida con API)
-from app.routes.api import predictions_db
-
 
 @views.route('/')
 def index():
@@ -41,7 +39,7 @@ def formulario(form_id):
 def resultado(form_id):
     """Página de resultados de predicción"""
     # Obtener predicción de la base de datos
-    prediction = predictions_db.get(form_id)
+    prediction = get_prediction_store().get(form_id)
 
     if not prediction:
         # Si no existe, redirigir a error
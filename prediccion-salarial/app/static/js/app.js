@@ -779,7 +779,7 @@ function submitForm() {
 
     console.log('Datos a enviar:', formData);
 
-    fetch('/api/predict', {
+    fetch('/api/predict?intervals=1', {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json'
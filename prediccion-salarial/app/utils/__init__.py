@@ -6,8 +6,13 @@ from app.utils.helpers import (
     calculate_percentile,
     build_comparisons,
     calculate_average_salaries_from_model,
+    precompute_statistics_grid,
+    resolve_statistics_profile,
+    compute_statistics,
     get_stats_cache,
     translate_features_to_english,
+    translate_features_batch_to_english,
+    MODEL_FEATURES,
     COUNTRY_MAP,
     GENDER_MAP,
     EDUCATION_MAP,
@@ -16,18 +21,33 @@ from app.utils.helpers import (
     RANKING_MAP,
     REGION_MAP
 )
+from app.utils.metrics import (
+    observe_stage,
+    stage_timer,
+    record_request,
+    render_metrics
+)
 
 __all__ = [
     'calculate_percentile',
     'build_comparisons',
     'calculate_average_salaries_from_model',
+    'precompute_statistics_grid',
+    'resolve_statistics_profile',
+    'compute_statistics',
     'get_stats_cache',
     'translate_features_to_english',
+    'translate_features_batch_to_english',
+    'MODEL_FEATURES',
     'COUNTRY_MAP',
     'GENDER_MAP',
     'EDUCATION_MAP',
     'FIELD_MAP',
     'LANGUAGE_MAP',
     'RANKING_MAP',
-    'REGION_MAP'
+    'REGION_MAP',
+    'observe_stage',
+    'stage_timer',
+    'record_request',
+    'render_metrics'
 ]
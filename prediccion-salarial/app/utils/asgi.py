@@ -0,0 +1,234 @@
+"""
+asgi.py - Adaptador ASGI con executor acotado para la app Flask
+
+El bucle de eventos lee el cuerpo de la petición y envía la respuesta; solo
+la ejecución de la vista (validación, MODEL.predict, serialización) ocupa un
+hilo de un pool acotado. Cuando el pool y su cola están llenos la petición
+se rechaza al momento con 503 en lugar de acumular hilos. Las respuestas de
+esta app son pequeñas, así que se construyen completas en el hilo worker y
+los clientes lentos no retienen hilos.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from io import BytesIO
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+REGISTRY.describe('app_requests_rejected_total', 'Peticiones rechazadas con 503 por saturación')
+
+
+class ExecutorSaturated(RuntimeError):
+    """Todos los huecos del executor (en ejecución + en cola) están ocupados"""
+
+
+class BoundedExecutor:
+    """
+    ThreadPoolExecutor con capacidad máxima: como mucho `max_workers` tareas
+    en ejecución y `max_queue` esperando. submit() lanza ExecutorSaturated en
+    lugar de encolar por encima de ese límite.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.capacity = max_workers + max_queue
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pid = None
+        self.completed = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Los hilos no sobreviven a un fork: se crea un pool nuevo en cada proceso
+        if self._executor is None or self._pid != os.getpid():
+            self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='asgi-worker')
+            self._pid = os.getpid()
+        return self._executor
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        with self._lock:
+            if self._pending >= self.capacity:
+                self.rejected += 1
+                raise ExecutorSaturated(f"{self._pending} tareas en curso (máximo {self.capacity})")
+            self._pending += 1
+            executor = self._get_executor()
+
+        try:
+            future = executor.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, _future: Optional[Future] = None):
+        with self._lock:
+            self._pending -= 1
+            if _future is not None:
+                self.completed += 1
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Ejecuta `fn` en el pool y espera su resultado sin bloquear el bucle"""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._pending,
+                "completed": self.completed,
+                "rejected": self.rejected
+            }
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+def build_environ(scope: Dict[str, Any], body: bytes) -> Dict[str, Any]:
+    """Traduce un scope HTTP de ASGI y su cuerpo a un environ de WSGI"""
+    script_name = scope.get('root_path', '').encode('utf8').decode('latin1')
+    path_info = scope['path'].encode('utf8').decode('latin1')
+    if script_name and path_info.startswith(script_name):
+        path_info = path_info[len(script_name):]
+
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': script_name,
+        'PATH_INFO': path_info,
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin1').upper().replace('-', '_')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        value = value.decode('latin1')
+        environ[name] = f"{environ[name]},{value}" if name in environ else value
+    return environ
+
+
+class BoundedWsgiToAsgi:
+    """Aplicación ASGI que ejecuta una app WSGI en un BoundedExecutor"""
+
+    def __init__(self, wsgi_app: Callable, executor: BoundedExecutor, retry_after: int = 1):
+        self.wsgi_app = wsgi_app
+        self.executor = executor
+        self.retry_after = retry_after
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise ValueError(f"Tipo de scope no soportado: {scope['type']}")
+
+        body = await self._read_body(receive)
+        if body is None:
+            # El cliente se fue antes de enviar el cuerpo completo: no se
+            # ocupa un hilo del pool con una petición que nadie va a leer
+            logger.debug("Cliente desconectado antes de terminar el cuerpo",
+                         extra={'path': scope['path']})
+            return
+        try:
+            status, headers, chunks = await self.executor.run(self._run_wsgi, scope, body)
+        except ExecutorSaturated as e:
+            REGISTRY.inc('app_requests_rejected_total', {'reason': 'overloaded'})
+            logger.warning("Petición rechazada por saturación: %s", e, extra={'path': scope['path']})
+            await self._send_overloaded(send)
+            return
+
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': b''.join(chunks)})
+
+    @staticmethod
+    async def _read_body(receive) -> Optional[bytes]:
+        """Cuerpo completo de la petición, o None si el cliente se desconecta antes"""
+        parts = []
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return None
+            parts.append(message.get('body', b''))
+            if not message.get('more_body'):
+                break
+        return b''.join(parts)
+
+    def _run_wsgi(self, scope, body: bytes) -> Tuple[int, List[Tuple[bytes, bytes]], List[bytes]]:
+        """Ejecuta la app WSGI completa en el hilo worker y devuelve la respuesta"""
+        response = {}
+        chunks: List[bytes] = []
+
+        def start_response(status, response_headers, exc_info=None):
+            # Nada se envía hasta terminar la vista: un start_response con
+            # exc_info simplemente sustituye a la cabecera anterior
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(name.lower().encode('latin1'), value.encode('latin1'))
+                                   for name, value in response_headers]
+            return chunks.append
+
+        iterable = self.wsgi_app(build_environ(scope, body), start_response)
+        try:
+            chunks.extend(chunk for chunk in iterable if chunk)
+        finally:
+            if hasattr(iterable, 'close'):
+                iterable.close()
+        return response['status'], response['headers'], chunks
+
+    async def _send_overloaded(self, send):
+        body = json.dumps({
+            "error": "overloaded",
+            "details": "Servidor saturado, reintenta en unos segundos"
+        }).encode('utf-8')
+        await send({
+            'type': 'http.response.start',
+            'status': 503,
+            'headers': [(b'content-type', b'application/json'),
+                        (b'content-length', str(len(body)).encode('ascii')),
+                        (b'retry-after', str(self.retry_after).encode('ascii'))]
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+def create_asgi_app(flask_app) -> BoundedWsgiToAsgi:
+    """Envuelve la app Flask con el tamaño de pool y de cola de su configuración"""
+    executor = BoundedExecutor(flask_app.config['ASGI_WORKER_THREADS'],
+                               flask_app.config['ASGI_MAX_QUEUE'])
+    flask_app.extensions['asgi_executor'] = executor
+    return BoundedWsgiToAsgi(flask_app, executor)
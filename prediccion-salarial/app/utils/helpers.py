@@ -2,9 +2,12 @@
 helpers.py - Funciones auxiliares y utilidades
 """
 
-from typing import Dict, Any
+import logging
+from typing import Dict, Any, List, Union
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 
 # =============================================================================
 # DATOS DE REFERENCIA
@@ -67,6 +70,33 @@ REGION_MAP = {
     'australia': 'Australia', 'europa': 'Europe', 'usa': 'USA'
 }
 
+# Campos categóricos: campo en español -> (columna en inglés, mapeo, valor por
+# defecto si no está en el mapeo; None = conservar el valor original)
+CATEGORICAL_FIELDS = {
+    'pais': ('Country_of_Origin', COUNTRY_MAP, None),
+    'genero': ('Gender', GENDER_MAP, None),
+    'titulacion': ('Education_Level', EDUCATION_MAP, None),
+    'campo_estudio': ('Field_of_Study', FIELD_MAP, None),
+    'nivel_ingles': ('Language_Proficiency', LANGUAGE_MAP, None),
+    'universidad_ranking': ('University_Ranking', RANKING_MAP, 'Unranked'),
+    'region_estudio': ('Region_of_Study', REGION_MAP, None)
+}
+
+# Orden de columnas (en inglés) que espera el pipeline del modelo
+MODEL_FEATURES = [
+    'Age',
+    'Country_of_Origin',
+    'Gender',
+    'Education_Level',
+    'Years_Since_Graduation',
+    'Field_of_Study',
+    'Language_Proficiency',
+    'University_Ranking',
+    'Region_of_Study',
+    'GPA_10',
+    'Internship_Experience'
+]
+
 # Medias de edad y nota por campo de estudio
 FIELD_AVERAGES = {
     'Artes': {'age': 26, 'grade': 7.2},
@@ -78,6 +108,52 @@ FIELD_AVERAGES = {
 }
 
 
+# =============================================================================
+# PERFILES PARA ESTADÍSTICAS
+# =============================================================================
+
+# Perfil base "promedio" sobre el que se calculan las comparaciones
+STATS_BASE_PROFILE = {
+    'Age': 28.0,
+    'Country_of_Origin': 'Spain',
+    'Gender': 'Male',
+    'Education_Level': 'Bachelor',
+    'Years_Since_Graduation': 3.0,
+    'Field_of_Study': 'Computer Science',
+    'Language_Proficiency': 'Intermediate',
+    'University_Ranking': 'Top 500',
+    'Region_of_Study': 'Europe',
+    'GPA_10': 7.5,
+    'Internship_Experience': 1
+}
+
+STATS_COUNTRIES = ['Brazil', 'China', 'Spain', 'Pakistan', 'USA', 'India', 'Vietnam', 'Nigeria']
+STATS_EDUCATION_LEVELS = ['FP', 'Bachelor', 'Master', 'PhD']
+STATS_FIELDS = ['Arts', 'Engineering', 'Computer Science', 'Health', 'Social Sciences', 'Business']
+STATS_GENDERS = ['Male', 'Female']
+
+# Dimensiones que se varían en cada perfil contrafactual y su sección en la respuesta
+STATS_DIMENSIONS = [
+    ('Country_of_Origin', STATS_COUNTRIES),
+    ('Education_Level', STATS_EDUCATION_LEVELS),
+    ('Field_of_Study', STATS_FIELDS),
+    ('Gender', STATS_GENDERS)
+]
+STATS_SECTIONS = ['by_country', 'by_education', 'by_field', 'by_gender']
+
+# Espacio completo de filtros de /api/statistics (pais × genero × formacion × campoEstudio)
+STATS_GRID_DOMAIN = [
+    ('Country_of_Origin', STATS_COUNTRIES),
+    ('Gender', ['Male', 'Female', 'Other']),
+    ('Education_Level', STATS_EDUCATION_LEVELS),
+    ('Field_of_Study', STATS_FIELDS)
+]
+STATS_GRID_COLUMNS = [column for column, _ in STATS_GRID_DOMAIN]
+
+# Tabla precalculada: clave de filtros -> estadísticas por sección
+_STATS_TABLE: Dict[tuple, Dict[str, Dict[str, float]]] = {}
+
+
 # =============================================================================
 # FUNCIONES AUXILIARES
 # =============================================================================
@@ -149,97 +225,171 @@ def build_comparisons(request_data: Dict[str, Any], salary: float) -> Dict[str,
     }
 
 
-def calculate_average_salaries_from_model():
+def resolve_statistics_profile(filters: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Calcula salarios promedio usando el modelo real para diferentes categorías.
-    Esto se hace una vez al inicio y se cachea.
+    Aplica los filtros de /api/statistics (en español) sobre el perfil base.
+    Los valores desconocidos caen en el valor por defecto del perfil base.
+    """
+    profile = STATS_BASE_PROFILE.copy()
+
+    if filters.get('pais'):
+        profile['Country_of_Origin'] = COUNTRY_MAP.get(filters['pais'].lower(), 'Spain')
+    if filters.get('genero'):
+        profile['Gender'] = GENDER_MAP.get(filters['genero'].lower(), 'Male')
+    if filters.get('formacion'):
+        profile['Education_Level'] = EDUCATION_MAP.get(filters['formacion'].lower(), 'Bachelor')
+    if filters.get('campoEstudio'):
+        profile['Field_of_Study'] = FIELD_MAP.get(filters['campoEstudio'].lower(), 'Computer Science')
+
+    return profile
+
+
+def _statistics_key(profile: Dict[str, Any]) -> tuple:
+    """Clave de la tabla de estadísticas: las cuatro dimensiones filtrables"""
+    return tuple(profile[column] for column in STATS_GRID_COLUMNS)
+
+
+def build_statistics_frame(profile: Dict[str, Any]) -> 'pd.DataFrame':
+    """
+    Construye en un único DataFrame todos los perfiles contrafactuales de un
+    perfil: uno por país, por nivel de educación, por campo y por género.
     """
     import pandas as pd
-    from app.models.predictor import MODEL
 
-    if MODEL is None:
-        print("[WARNING] Modelo no disponible, no se pueden calcular estadisticas reales")
-        return
+    rows = []
+    for column, values in STATS_DIMENSIONS:
+        for value in values:
+            row = profile.copy()
+            row[column] = value
+            rows.append(row)
 
-    print("[INFO] Calculando estadisticas reales con el modelo...")
+    return pd.DataFrame(rows, columns=MODEL_FEATURES)
 
-    # Perfil base "promedio" para hacer comparaciones
-    base_profile = {
-        'Age': 28.0,
-        'Years_Since_Graduation': 3.0,
-        'GPA_10': 7.5,
-        'Internship_Experience': 1
-    }
 
-    # Calcular salarios por país
-    countries = ['Brazil', 'China', 'Spain', 'Pakistan', 'USA', 'India', 'Vietnam', 'Nigeria']
-    for country in countries:
-        profile = base_profile.copy()
-        profile.update({
-            'Country_of_Origin': country,
-            'Gender': 'Male',
-            'Education_Level': 'Bachelor',
-            'Field_of_Study': 'Computer Science',
-            'Language_Proficiency': 'Intermediate',
-            'University_Ranking': 'Top 500',
-            'Region_of_Study': 'Europe'
-        })
-
-        try:
-            df = pd.DataFrame([profile])
-            salary = float(MODEL.predict(df)[0])
-            _STATS_CACHE['by_country'][country] = salary
-        except Exception as e:
-            print(f"[ERROR] Error calculando salario para {country}: {e}")
-
-    # Calcular salarios por educación
-    education_levels = ['FP', 'Bachelor', 'Master', 'PhD']
-    for edu in education_levels:
-        profile = base_profile.copy()
-        profile.update({
-            'Country_of_Origin': 'Spain',
-            'Gender': 'Male',
-            'Education_Level': edu,
-            'Field_of_Study': 'Computer Science',
-            'Language_Proficiency': 'Intermediate',
-            'University_Ranking': 'Top 500',
-            'Region_of_Study': 'Europe'
-        })
-
-        try:
-            df = pd.DataFrame([profile])
-            salary = float(MODEL.predict(df)[0])
-            _STATS_CACHE['by_education'][edu] = salary
-        except Exception as e:
-            print(f"[ERROR] Error calculando salario para {edu}: {e}")
-
-    # Calcular salarios por campo de estudio
-    fields = ['Arts', 'Engineering', 'Computer Science', 'Health', 'Social Sciences', 'Business']
-    for field in fields:
-        profile = base_profile.copy()
-        profile.update({
-            'Country_of_Origin': 'Spain',
-            'Gender': 'Male',
-            'Education_Level': 'Bachelor',
-            'Field_of_Study': field,
-            'Language_Proficiency': 'Intermediate',
-            'University_Ranking': 'Top 500',
-            'Region_of_Study': 'Europe'
-        })
-
-        try:
-            df = pd.DataFrame([profile])
-            salary = float(MODEL.predict(df)[0])
-            _STATS_CACHE['by_field'][field] = salary
-        except Exception as e:
-            print(f"[ERROR] Error calculando salario para {field}: {e}")
+def _split_statistics(salaries) -> Dict[str, Dict[str, float]]:
+    """Reparte las predicciones de build_statistics_frame por dimensión"""
+    stats = {}
+    position = 0
+    for (column, values), name in zip(STATS_DIMENSIONS, STATS_SECTIONS):
+        stats[name] = {
+            value: float(salary)
+            for value, salary in zip(values, salaries[position:position + len(values)])
+        }
+        position += len(values)
+    return stats
+
+
+def _fallback_statistics() -> Dict[str, Dict[str, float]]:
+    """Estadísticas de respaldo (cache global) si el modelo falla"""
+    fallback = {}
+    for (column, values), name in zip(STATS_DIMENSIONS, STATS_SECTIONS):
+        cached = _STATS_CACHE.get(name, {})
+        fallback[name] = {value: cached.get(value, 50000) for value in values}
+    return fallback
+
 
+def compute_statistics(profile: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+    """
+    Estadísticas contrafactuales de un perfil. Usa la tabla precalculada si
+    está disponible; si no, puntúa los 20 perfiles con un único predict.
+    """
+    cached = _STATS_TABLE.get(_statistics_key(profile))
+    if cached is not None:
+        return cached
+
+    from app.models.service import get_inference_service
+
+    try:
+        salaries = get_inference_service().predict_frame(build_statistics_frame(profile))
+        return _split_statistics(salaries)
+    except Exception as e:
+        logger.error("Error calculando estadisticas: %s", e)
+        return _fallback_statistics()
+
+
+def build_statistics_table(model) -> Dict[tuple, Dict[str, Dict[str, float]]]:
+    """
+    Calcula la tabla de estadísticas para todo el espacio de filtros
+    (país × género × educación × campo) con `model`. Todos los perfiles
+    contrafactuales caen dentro de la rejilla, así que basta un único
+    predict sobre ella.
+    """
+    import itertools
+    import pandas as pd
+
+    combinations = list(itertools.product(*(values for _, values in STATS_GRID_DOMAIN)))
+    rows = []
+    for combination in combinations:
+        row = STATS_BASE_PROFILE.copy()
+        row.update(zip(STATS_GRID_COLUMNS, combination))
+        rows.append(row)
+
+    salaries = model.predict(pd.DataFrame(rows, columns=MODEL_FEATURES))
+    grid = {combination: float(salary) for combination, salary in zip(combinations, salaries)}
+
+    table = {}
+    for combination in combinations:
+        profile = dict(zip(STATS_GRID_COLUMNS, combination))
+        stats = {}
+        for (column, values), name in zip(STATS_DIMENSIONS, STATS_SECTIONS):
+            section = {}
+            for value in values:
+                variant = dict(profile, **{column: value})
+                section[value] = grid[_statistics_key(variant)]
+            stats[name] = section
+        table[combination] = stats
+    return table
+
+
+def install_statistics_table(table: Dict[tuple, Dict[str, Dict[str, float]]]):
+    """
+    Publica una tabla de estadísticas y los promedios del perfil base. La
+    tabla se sustituye de una vez: una petición ve la anterior o la nueva.
+    """
+    global _STATS_TABLE
+
+    base_stats = table[_statistics_key(STATS_BASE_PROFILE)]
+    _STATS_TABLE = table
+    _STATS_CACHE['by_country'] = dict(base_stats['by_country'])
+    _STATS_CACHE['by_education'] = dict(base_stats['by_education'])
+    _STATS_CACHE['by_field'] = dict(base_stats['by_field'])
     _STATS_CACHE['last_updated'] = datetime.now().isoformat()
 
-    print(f"[INFO] Estadisticas calculadas:")
-    print(f"       - Paises: {len(_STATS_CACHE['by_country'])} valores")
-    print(f"       - Educacion: {len(_STATS_CACHE['by_education'])} valores")
-    print(f"       - Campos: {len(_STATS_CACHE['by_field'])} valores")
+
+def precompute_statistics_grid():
+    """Calcula y publica la tabla de estadísticas con el modelo activo"""
+    from app.models.service import get_inference_service
+
+    table = build_statistics_table(get_inference_service().model())
+    install_statistics_table(table)
+    return table
+
+
+def calculate_average_salaries_from_model():
+    """
+    Calcula salarios promedio usando el modelo real para diferentes categorías.
+    Esto se hace una vez al inicio y se cachea, junto con la tabla completa
+    de estadísticas de /api/statistics.
+    """
+    from app.models.service import get_inference_service
+
+    if get_inference_service().model() is None:
+        logger.warning("Modelo no disponible, no se pueden calcular estadisticas reales")
+        return
+
+    logger.info("Calculando estadisticas reales con el modelo...")
+
+    try:
+        precompute_statistics_grid()
+    except Exception as e:
+        logger.error("Error precalculando la tabla de estadisticas: %s", e)
+        return
+
+    logger.info(
+        "Estadisticas calculadas: %d paises, %d educacion, %d campos, %d combinaciones de filtros",
+        len(_STATS_CACHE['by_country']), len(_STATS_CACHE['by_education']),
+        len(_STATS_CACHE['by_field']), len(_STATS_TABLE)
+    )
 
 
 def get_stats_cache():
@@ -275,3 +425,58 @@ def translate_features_to_english(data: Dict[str, Any]) -> Dict[str, Any]:
         return features
     except KeyError as e:
         raise ValueError(f"Campo requerido faltante: {e}")
+
+
+def translate_category(field: str, value: str) -> str:
+    """Traduce un valor categórico con las mismas reglas que translate_features_to_english"""
+    _, mapping, default = CATEGORICAL_FIELDS[field]
+    key = value.lower()
+    if field == 'campo_estudio':
+        key = key.replace('.', ' ')
+    return mapping.get(key, value if default is None else default)
+
+
+def translate_features_batch_to_english(rows: Union[List[Dict[str, Any]], 'pd.DataFrame']) -> 'pd.DataFrame':
+    """
+    Versión vectorizada de translate_features_to_english.
+    Traduce un lote de registros (lista de dicts o DataFrame con los campos en
+    español) a un DataFrame con las columnas en inglés que espera el modelo.
+    """
+    import pandas as pd
+    from app.models.columnar import _parse_bool
+
+    frame = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame.from_records(rows)
+
+    def _translate(column, mapping, default=None, normalize=None):
+        raw = frame[column].astype(str)
+        keys = raw.str.lower()
+        if normalize is not None:
+            keys = normalize(keys)
+        translated = keys.map(mapping)
+        return translated.fillna(raw if default is None else default)
+
+    def _internship():
+        # "False", "no"... no son True: mismas reglas que la validación por columnas
+        values, unknown = _parse_bool(frame['practicas'])
+        if unknown.any():
+            raise ValueError(f"Valor no válido en practicas: {frame['practicas'][unknown].iloc[0]!r}")
+        return values.astype(int)
+
+    try:
+        features = pd.DataFrame({
+            'Age': frame['edad'].astype(float),
+            'Country_of_Origin': _translate('pais', COUNTRY_MAP),
+            'Gender': _translate('genero', GENDER_MAP),
+            'Education_Level': _translate('titulacion', EDUCATION_MAP),
+            'Years_Since_Graduation': frame['anios_desde_obtencion'].astype(float),
+            'Field_of_Study': _translate('campo_estudio', FIELD_MAP,
+                                         normalize=lambda s: s.str.replace('.', ' ', regex=False)),
+            'Language_Proficiency': _translate('nivel_ingles', LANGUAGE_MAP),
+            'University_Ranking': _translate('universidad_ranking', RANKING_MAP, default='Unranked'),
+            'Region_of_Study': _translate('region_estudio', REGION_MAP),
+            'GPA_10': frame['nota_media'].astype(float),
+            'Internship_Experience': _internship(),
+        }, columns=MODEL_FEATURES)
+        return features
+    except KeyError as e:
+        raise ValueError(f"Campo requerido faltante: {e}")
@@ -0,0 +1,109 @@
+"""
+json_provider.py - Serialización JSON de las respuestas con orjson
+
+FastJSONProvider sustituye al proveedor JSON de Flask: con orjson instalado
+serializa directamente a bytes (sin pasar por str ni volver a codificar) y
+entiende los escalares y arrays de NumPy; sin orjson usa la librería
+estándar con los mismos tipos extra. Las respuestas que no cambian mientras
+no cambia el modelo se pueden serializar una vez y servir los bytes
+(cached_json_response).
+"""
+
+import json
+import logging
+from typing import Any, Callable, Dict, Hashable, Tuple, Union
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+def _default(obj: Any) -> Any:
+    """Tipos que ni orjson ni json saben serializar por sí mismos"""
+    import numpy as np
+
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    return DefaultJSONProvider.default(obj)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Proveedor JSON de la app: orjson si está disponible, json si no"""
+
+    @property
+    def backend(self) -> str:
+        return 'orjson' if orjson is not None else 'json'
+
+    def dumps_bytes(self, obj: Any, indent: bool = False) -> bytes:
+        """Serializa `obj` a bytes UTF-8"""
+        if orjson is not None:
+            option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            if self.sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(obj, default=_default, option=option)
+
+        kwargs = {'indent': 2} if indent else {'separators': (',', ':')}
+        return json.dumps(obj, default=_default, ensure_ascii=False,
+                          sort_keys=self.sort_keys, **kwargs).encode('utf-8')
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is not None and not kwargs:
+            return self.dumps_bytes(obj).decode('utf-8')
+        kwargs.setdefault('default', _default)
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def _indent(self) -> bool:
+        return (self.compact is None and self._app.debug) or self.compact is False
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self.bytes_response(self.dumps_bytes(obj, indent=self._indent()))
+
+    def bytes_response(self, body: bytes, status: int = 200):
+        """Respuesta JSON a partir de bytes ya serializados"""
+        return self._app.response_class(body, status=status, mimetype=self.mimetype)
+
+
+# --------------------------------------------------------------------------
+# --- RESPUESTAS PRESERIALIZADAS ---
+# --------------------------------------------------------------------------
+
+_PRESERIALIZED: Dict[str, Tuple[Hashable, bytes]] = {}
+
+
+def cached_json_response(name: str, key: Hashable, build: Callable[[], Any], status: int = 200):
+    """
+    Respuesta JSON de `build()` serializada una sola vez por `key` (por
+    ejemplo, el uid de la versión del modelo). Al cambiar `key` se vuelve a
+    construir; se guarda solo la última serialización de cada `name`.
+    """
+    from flask import current_app
+
+    cached = _PRESERIALIZED.get(name)
+    if cached is None or cached[0] != key:
+        cached = (key, current_app.json.dumps_bytes(build()))
+        _PRESERIALIZED[name] = cached
+    return current_app.json.bytes_response(cached[1], status)
+
+
+def configure_json_provider(app) -> FastJSONProvider:
+    """Registra FastJSONProvider como proveedor JSON de `app` (create_app)"""
+    app.json = FastJSONProvider(app)
+    logger.debug("Serialización JSON con %s", app.json.backend)
+    return app.json
@@ -0,0 +1,120 @@
+"""
+logger.py - Logging estructurado de la aplicación
+
+Los módulos usan logging.getLogger(__name__). setup_logging() instala en el
+logger 'app' un QueueHandler: el hilo de la petición solo encola el registro
+y un QueueListener lo formatea (JSON) y lo escribe en stdout en otro hilo.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+# Atributos estándar de LogRecord (el resto se serializa como campos extra)
+_RESERVED = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_LISTENER: Optional[logging.handlers.QueueListener] = None
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que no formatea en el hilo que emite: el mensaje y el JSON se
+    construyen en el hilo del listener. Los argumentos del log no deben
+    modificarse después de emitirlo.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class JSONFormatter(logging.Formatter):
+    """Formatea cada registro como una línea JSON con los campos extra"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def parse_levels(spec: str) -> Dict[str, str]:
+    """Convierte "app.routes.api=DEBUG,app.models=WARNING" en un dict"""
+    levels = {}
+    for item in spec.split(','):
+        if '=' in item:
+            name, level = item.split('=', 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging(level: str = 'INFO', levels: Optional[Dict[str, str]] = None,
+                  fmt: str = 'json'):
+    """
+    Configura el logger 'app': nivel global, niveles por módulo y escritura
+    asíncrona a stdout. Se puede llamar varias veces (reconfigura).
+    """
+    global _LISTENER
+
+    if fmt == 'json':
+        formatter = JSONFormatter()
+    else:
+        formatter = logging.Formatter('%(asctime)s [%(levelname)s] %(name)s: %(message)s')
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter)
+
+    _stop_listener()
+
+    log_queue: queue.Queue = queue.Queue(-1)
+    _LISTENER = logging.handlers.QueueListener(log_queue, stream_handler,
+                                               respect_handler_level=True)
+    _LISTENER.start()
+
+    app_logger = logging.getLogger('app')
+    app_logger.handlers = [DeferredQueueHandler(log_queue)]
+    app_logger.setLevel(level.upper())
+    app_logger.propagate = False
+
+    for name, module_level in (levels or {}).items():
+        logging.getLogger(name).setLevel(module_level.upper())
+
+
+def _stop_listener():
+    # QueueListener.stop() falla si el hilo ya está parado (p.ej. atexit
+    # después de una parada explícita)
+    if _LISTENER is not None and _LISTENER._thread is not None:
+        _LISTENER.stop()
+
+
+def _restart_listener_after_fork():
+    # El hilo del listener no sobrevive a un fork (workers de Gunicorn con
+    # preload_app): el hijo crea su propia cola y su propio listener
+    global _LISTENER
+    if _LISTENER is None:
+        return
+
+    log_queue: queue.Queue = queue.Queue(-1)
+    _LISTENER = logging.handlers.QueueListener(log_queue, *_LISTENER.handlers,
+                                               respect_handler_level=True)
+    _LISTENER.start()
+    for handler in logging.getLogger('app').handlers:
+        if isinstance(handler, DeferredQueueHandler):
+            handler.queue = log_queue
+
+
+atexit.register(_stop_listener)
+os.register_at_fork(after_in_child=_restart_listener_after_fork)
@@ -0,0 +1,221 @@
+"""
+metrics.py - Métricas de la aplicación en formato de exposición de Prometheus
+
+Contadores e histogramas en memoria del proceso (cada worker de Gunicorn
+expone los suyos). Las rutas y el predictor registran la duración de cada
+etapa de /api/predict con stage_timer() u observe_stage() (validation,
+translate o encode, dataframe, model_predict, build_comparisons,
+serialization); /api/metrics vuelca todo con render_metrics().
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Límites de los histogramas de latencia en segundos (de 50 µs a 2.5 s)
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Límites del histograma de tamaños de lote del micro-batcher
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class Histogram:
+    """Histograma acumulativo con límites fijos, seguro entre hilos"""
+
+    def __init__(self, buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        """Devuelve (cuentas acumuladas por límite incluyendo +Inf, suma, total)"""
+        with self._lock:
+            counts = list(self._counts)
+            total_sum = self._sum
+        cumulative = []
+        running = 0
+        for count in counts:
+            running += count
+            cumulative.append(running)
+        return cumulative, total_sum, running
+
+
+class MetricsRegistry:
+    """Contadores e histogramas indexados por nombre y etiquetas"""
+
+    def __init__(self):
+        self._counters: Dict[Tuple[str, tuple], float] = {}
+        self._histograms: Dict[Tuple[str, tuple], Histogram] = {}
+        self._help: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, help_text: str):
+        self._help[name] = help_text
+
+    def inc(self, name: str, labels: Optional[Dict[str, str]] = None, value: float = 1.0):
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def histogram(self, name: str, labels: Optional[Dict[str, str]] = None,
+                  buckets: Iterable[float] = LATENCY_BUCKETS) -> Histogram:
+        """Histograma de (name, labels); `buckets` solo se usa al crearlo"""
+        key = (name, tuple(sorted((labels or {}).items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = Histogram(buckets)
+        return histogram
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, str]] = None,
+                buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.histogram(name, labels, buckets).observe(value)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self) -> List[str]:
+        """Líneas en formato de texto de Prometheus"""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+
+        lines = []
+        seen = set()
+        for (name, labels), value in counters:
+            if name not in seen:
+                lines.extend(_header(name, 'counter', self._help.get(name)))
+                seen.add(name)
+            lines.append(f"{name}{_labels(labels)} {_number(value)}")
+
+        for (name, labels), histogram in histograms:
+            if name not in seen:
+                lines.extend(_header(name, 'histogram', self._help.get(name)))
+                seen.add(name)
+            cumulative, total_sum, count = histogram.snapshot()
+            bounds = [_number(bound) for bound in histogram.buckets] + ['+Inf']
+            for bound, bucket_count in zip(bounds, cumulative):
+                lines.append(f"{name}_bucket{_labels(labels + (('le', bound),))} {bucket_count}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(total_sum)}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+        return lines
+
+
+def _header(name: str, kind: str, help_text: Optional[str]) -> List[str]:
+    lines = [f"# HELP {name} {help_text}"] if help_text else []
+    lines.append(f"# TYPE {name} {kind}")
+    return lines
+
+
+def _labels(labels: tuple) -> str:
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for _, value in labels)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + '}'
+
+
+def _number(value: float) -> str:
+    value = float(value)
+    if value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+# --------------------------------------------------------------------------
+# --- REGISTRO GLOBAL ---
+# --------------------------------------------------------------------------
+
+REGISTRY = MetricsRegistry()
+REGISTRY.describe('app_requests_total', 'Peticiones HTTP atendidas por endpoint y código de estado')
+REGISTRY.describe('app_request_duration_seconds', 'Latencia total de las peticiones HTTP por endpoint')
+REGISTRY.describe('app_predict_stage_duration_seconds', 'Latencia de cada etapa de /api/predict')
+REGISTRY.describe('app_microbatch_batch_size', 'Peticiones puntuadas en cada lote del micro-batcher')
+REGISTRY.describe('app_microbatch_wait_seconds',
+                  'Espera de cada petición en la cola del micro-batcher hasta puntuarse')
+
+
+def observe_stage(stage: str, seconds: float):
+    """Registra la duración de una etapa de la predicción"""
+    REGISTRY.observe('app_predict_stage_duration_seconds', seconds, {'stage': stage})
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """Mide el bloque y lo registra como etapa `stage`"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - started)
+
+
+def record_microbatch(size: int, waits: Iterable[float]):
+    """Registra un lote del micro-batcher y la espera de cada una de sus peticiones"""
+    REGISTRY.observe('app_microbatch_batch_size', size, buckets=BATCH_SIZE_BUCKETS)
+    for wait in waits:
+        REGISTRY.observe('app_microbatch_wait_seconds', wait)
+
+
+def record_request(endpoint: str, status: int, seconds: float):
+    """Registra una petición HTTP terminada"""
+    REGISTRY.inc('app_requests_total', {'endpoint': endpoint, 'status': str(status)})
+    REGISTRY.observe('app_request_duration_seconds', seconds, {'endpoint': endpoint})
+
+
+def _gauges(name: str, help_text: str, samples: Iterable[Tuple[tuple, float]]) -> List[str]:
+    lines = _header(name, 'gauge', help_text)
+    lines.extend(f"{name}{_labels(labels)} {_number(value)}" for labels, value in samples)
+    return lines
+
+
+def render_metrics(startup_timings: Dict[str, float], cache_stats: Dict[str, object],
+                   microbatch_stats: Optional[Dict[str, object]] = None) -> str:
+    """
+    Exposición completa: contadores e histogramas del registro más los
+    tiempos de arranque (carga del modelo, precálculo de estadísticas) y el
+    estado de la cache de predicciones y del micro-batcher (sus histogramas
+    de tamaño de lote y espera están en el registro).
+    """
+    lines = REGISTRY.render()
+
+    lines.extend(_gauges(
+        'app_startup_duration_seconds',
+        'Duración de cada fase de la carga del modelo (total, unpickle, stats_cache, ...)',
+        [((('phase', phase),), seconds) for phase, seconds in startup_timings.items()]
+    ))
+
+    lines.extend(_gauges('app_prediction_cache_hit_ratio',
+                         'Proporción de aciertos de la cache de predicciones',
+                         [((), cache_stats.get('hit_ratio', 0.0))]))
+    lines.extend(_gauges('app_prediction_cache_size',
+                         'Entradas en la cache de predicciones',
+                         [((), cache_stats.get('size', 0))]))
+    for field in ('hits', 'misses', 'evictions', 'expirations', 'invalidations'):
+        name = f'app_prediction_cache_{field}_total'
+        lines.extend(_header(name, 'counter', None))
+        lines.append(f"{name} {cache_stats.get(field, 0)}")
+
+    if microbatch_stats:
+        lines.extend(_gauges('app_microbatch_queue_depth',
+                             'Peticiones esperando en la cola del micro-batcher',
+                             [((), microbatch_stats.get('queue_depth', 0))]))
+        lines.extend(_gauges('app_microbatch_avg_batch_size',
+                             'Tamaño medio de los lotes del micro-batcher',
+                             [((), microbatch_stats.get('avg_batch_size', 0.0))]))
+
+    return '\n'.join(lines) + '\n'
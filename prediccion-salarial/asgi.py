@@ -0,0 +1,15 @@
+"""
+asgi.py - Punto de entrada ASGI de la aplicación
+
+El bucle de eventos atiende las conexiones y la ejecución de las vistas
+(validación, MODEL.predict) se hace en un pool de hilos acotado; con el pool
+y su cola llenos se responde 503 (ASGI_WORKER_THREADS, ASGI_MAX_QUEUE).
+
+Uso:
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+"""
+
+from app import create_app
+from app.utils.asgi import create_asgi_app
+
+application = create_asgi_app(create_app())
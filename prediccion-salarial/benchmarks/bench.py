@@ -0,0 +1,240 @@
+"""
+bench.py - Benchmarks de los caminos calientes del predictor y de la API
+
+Mide la validación del payload (dict frente a JSON directo, y lotes fila a
+fila frente al TypeAdapter), traducción de features, build_comparisons, la
+predicción individual (InferenceService.predict y predict_one, sin cache),
+/api/predict y /api/statistics con el cliente de pruebas de Flask, y la
+puntuación por lotes a 1/100/10k/1M filas. Usa el
+modelo sintético determinista de app.models.synthetic, así que no necesita
+data/modelo_entrenado.pkl. Los resultados se guardan en JSON para comparar
+entre commits.
+
+Uso (desde prediccion-salarial/):
+    python benchmarks/bench.py
+    python benchmarks/bench.py --backend compiled --sizes 1 100 10000
+    python benchmarks/bench.py --backend lookup --n-estimators 3 --max-depth 4
+    python benchmarks/bench.py --compare benchmarks/results/anterior.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_DIR))
+
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+
+PAYLOAD = {
+    "nombre": "Benchmark",
+    "edad": 28,
+    "pais": "España",
+    "genero": "Hombre",
+    "titulacion": "Master",
+    "aniosDesdeObtencion": 3,
+    "campoEstudio": "IT",
+    "nivelIngles": "Avanzado",
+    "universidadRanking": "Alto",
+    "regionEstudio": "Europa",
+    "notaMedia": 8.5,
+    "practicas": True
+}
+
+STATISTICS_FILTERS = {"pais": "India", "formacion": "PHD", "genero": "Mujer", "campoEstudio": "Salud"}
+
+# --------------------------------------------------------------------------
+# --- MODELO SINTÉTICO ---
+# --------------------------------------------------------------------------
+
+def install_model(pipeline, backend: str):
+    """Activa `pipeline` como modelo (con sus estadísticas) en el registro de modelos"""
+    from app.models import predictor
+    from app.models.registry import get_model_registry
+
+    predictor.configure_inference_backend(backend)
+    engine = predictor.build_inference_engine(pipeline)
+    if backend == 'lookup':
+        import tempfile
+        from app.models.lookup import LookupTable, LookupTooLarge
+        try:
+            engine.lookup = LookupTable.build(engine, Path(tempfile.mkdtemp()) / 'lookup.npy')
+        except LookupTooLarge as e:
+            print(f"  Sin tabla de predicciones (se mide el backend compilado): {e}")
+
+    version = predictor.ModelVersion(pipeline, engine, {"version": "benchmark-synthetic"})
+    get_model_registry().activate(version)
+
+
+# --------------------------------------------------------------------------
+# --- MEDICIÓN ---
+# --------------------------------------------------------------------------
+
+def measure(fn: Callable[[], object], repeat: int, min_time: float = 0.2,
+            rows: int = 1) -> Dict[str, float]:
+    """
+    Ejecuta `fn` hasta `repeat` veces (al menos una, y sin pasar mucho de
+    `min_time` segundos si cada llamada es lenta) tras una llamada de
+    calentamiento. Tiempos por llamada en milisegundos.
+    """
+    fn()
+    samples: List[float] = []
+    budget_started = time.perf_counter()
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+        if len(samples) >= 3 and time.perf_counter() - budget_started > max(min_time, 3 * samples[0]):
+            break
+
+    samples.sort()
+    median = statistics.median(samples)
+    result = {
+        'calls': len(samples),
+        'min_ms': samples[0] * 1000.0,
+        'median_ms': median * 1000.0,
+        'mean_ms': statistics.fmean(samples) * 1000.0,
+        'p95_ms': samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000.0
+    }
+    if rows > 1:
+        result['rows'] = rows
+        result['rows_per_second'] = rows / median
+    return {key: round(value, 4) if isinstance(value, float) else value
+            for key, value in result.items()}
+
+
+def run_benchmarks(backend: str, sizes: List[int], repeat: int, n_estimators: int,
+                   max_depth: int = 12) -> Dict[str, dict]:
+    from app import create_app
+    from app.models.predictor import predict_one
+    from app.models.schema import PredictRequest, validate_batch, validate_request_json
+    from app.models.service import get_inference_service
+    from app.models.synthetic import build_synthetic_pipeline, generate_features
+    from app.utils.helpers import build_comparisons, translate_features_to_english
+
+    app = create_app()
+    app.config['TESTING'] = True
+    client = app.test_client()
+
+    install_model(build_synthetic_pipeline(n_estimators=n_estimators, max_depth=max_depth), backend)
+    # Sin cache de predicciones: se mide siempre el modelo
+    service = get_inference_service()
+    service.configure_cache(0, 0)
+
+    data = PredictRequest(**PAYLOAD).model_dump()
+    # Claves del formulario antiguo que acepta predict_one
+    legacy = dict(data, anios_desde_titulo=data['anios_desde_obtencion'])
+    del legacy['anios_desde_obtencion']
+    results = {}
+
+    def record(name, fn, **kwargs):
+        results[name] = measure(fn, repeat, **kwargs)
+        print(f"  {name:<32} median {results[name]['median_ms']:>10.4f} ms", flush=True)
+
+    body = json.dumps(PAYLOAD).encode('utf-8')
+    batch = [PAYLOAD] * 1000
+    record('validation_dict', lambda: PredictRequest(**json.loads(body)).model_dump())
+    record('validation_json', lambda: validate_request_json(body))
+    record('validation_batch_1000_loop', lambda: [PredictRequest(**item).model_dump() for item in batch],
+           rows=len(batch))
+    record('validation_batch_1000', lambda: validate_batch(batch), rows=len(batch))
+    record('translate_features_to_english', lambda: translate_features_to_english(data))
+    record('build_comparisons', lambda: build_comparisons(data, 42000.0))
+    record('service_predict', lambda: service.predict(data))
+    record('predict_one', lambda: predict_one(legacy))
+    record('api_predict', lambda: client.post('/api/predict', json=PAYLOAD))
+    record('api_statistics', lambda: client.post('/api/statistics', json=STATISTICS_FILTERS))
+
+    for size in sizes:
+        frame = generate_features(size, seed=size)
+        record(f'batch_scoring_{size}', lambda: service.predict_frame(frame), rows=size)
+
+    return results
+
+
+# --------------------------------------------------------------------------
+# --- RESULTADOS ---
+# --------------------------------------------------------------------------
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment_info(backend: str, n_estimators: int, max_depth: int = 12) -> Dict[str, object]:
+    import numpy
+    import pandas
+    import sklearn
+
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': numpy.__version__,
+        'pandas': pandas.__version__,
+        'sklearn': sklearn.__version__,
+        'backend': backend,
+        'n_estimators': n_estimators,
+        'max_depth': max_depth
+    }
+
+
+def compare(current: Dict[str, dict], previous_path: Path):
+    """Imprime la variación de la mediana respecto a un JSON anterior"""
+    previous = json.loads(previous_path.read_text())['results']
+    print(f"\nComparación con {previous_path}:")
+    for name, result in current.items():
+        if name not in previous:
+            continue
+        before, after = previous[name]['median_ms'], result['median_ms']
+        change = (after - before) / before * 100.0 if before else 0.0
+        print(f"  {name:<32} {before:>10.4f} -> {after:>10.4f} ms ({change:+.1f}%)")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks del predictor y de la API")
+    parser.add_argument('--backend', choices=['sklearn', 'compiled', 'lookup'], default='sklearn')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 100, 10000, 1000000],
+                        help="Tamaños de lote para batch_scoring")
+    parser.add_argument('--repeat', type=int, default=200, help="Repeticiones máximas por caso")
+    parser.add_argument('--n-estimators', type=int, default=100, help="Árboles del modelo sintético")
+    parser.add_argument('--max-depth', type=int, default=12, help="Profundidad máxima de los árboles")
+    parser.add_argument('--output', type=Path, help="Fichero JSON de resultados")
+    parser.add_argument('--compare', type=Path, help="JSON anterior con el que comparar")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+    print(f"Benchmarks (backend={args.backend}, árboles={args.n_estimators}, profundidad={args.max_depth})")
+    results = run_benchmarks(args.backend, args.sizes, args.repeat, args.n_estimators, args.max_depth)
+    report = {'environment': environment_info(args.backend, args.n_estimators, args.max_depth),
+              'results': results}
+
+    output = args.output
+    if output is None:
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        output = RESULTS_DIR / f"{stamp}-{report['environment']['git_commit'] or 'nogit'}-{args.backend}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nResultados guardados en {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -11,6 +11,8 @@ DATA_DIR = BASE_DIR / "data"
 MODEL_PATH = DATA_DIR / "modelo_entrenado.pkl"
 SCALER_PATH = DATA_DIR / "scaler.pkl"
 METADATA_PATH = DATA_DIR / "metadata.json"
+MODEL_MMAP_PATH = DATA_DIR / "modelo_entrenado.joblib"
+PREDICTION_STORE_PATH = DATA_DIR / "predictions.sqlite"
 
 
 class Config:
@@ -23,6 +25,12 @@ class Config:
     # CORS
     FRONT_ORIGIN = os.getenv("FRONT_ORIGIN", "http://localhost:5173")
 
+    # Logging: nivel global, niveles por módulo ("app.routes.api=DEBUG,...")
+    # y formato ('json' o 'text')
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+
     # Server
     HOST = '0.0.0.0'
     PORT = int(os.getenv("PORT", "5000"))
@@ -31,16 +39,89 @@ class Config:
     MODEL_PATH = str(MODEL_PATH)
     SCALER_PATH = str(SCALER_PATH)
     METADATA_PATH = str(METADATA_PATH)
+    MODEL_MMAP_PATH = str(MODEL_MMAP_PATH)
+
+    # Cargar el modelo memory-mapped (joblib, mmap_mode='r') para compartir
+    # sus arrays entre workers
+    MODEL_MMAP = os.getenv("MODEL_MMAP", "0") == "1"
+
+    # Backend de inferencia: 'sklearn' (Pipeline.predict), 'compiled'
+    # (árboles compilados a arrays NumPy planos, mismas predicciones) o
+    # 'lookup' (compilado + tabla exacta precalculada con
+    # `python -m app.models.lookup`, si existe para el modelo cargado)
+    INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "sklearn")
+
+    # Carga anticipada del modelo al crear la app (por defecto: perezosa)
+    MODEL_EAGER_LOAD = os.getenv("MODEL_EAGER_LOAD", "0") == "1"
+
+    # Recarga en caliente: segundos entre comprobaciones del fichero del
+    # modelo (0 = desactivada) y token de POST /api/admin/reload-model
+    # (vacío = endpoint desactivado)
+    MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", "0"))
+    ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+    # Latencia simulada en /api/predict (segundos). Solo para demos de la UI,
+    # desactivada por defecto: SIMULATED_LATENCY=1 la reactiva
+    SIMULATED_LATENCY = float(os.getenv("SIMULATED_LATENCY", "0"))
+
+    # Cache LRU/TTL de predicciones (tamaño 0 la desactiva)
+    PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "4096"))
+    PREDICTION_CACHE_TTL = float(os.getenv("PREDICTION_CACHE_TTL", "3600"))
+
+    # Intervalos de predicción a partir de los árboles del bosque
+    # (salary_range y confidence). Solo se calculan si la petición los pide
+    # (/api/predict?intervals=1, /api/predict/batch?intervals=1): recorren
+    # todos los árboles, mientras que la predicción sale siempre del backend
+    # configurado. PREDICTION_INTERVALS=0 los desactiva del todo.
+    # COVERAGE: fracción central de los árboles que cubre el rango
+    PREDICTION_INTERVALS = os.getenv("PREDICTION_INTERVALS", "1") == "1"
+    PREDICTION_INTERVAL_COVERAGE = float(os.getenv("PREDICTION_INTERVAL_COVERAGE", "0.8"))
+
+    # Micro-batching de /api/predict: las peticiones que llegan dentro de la
+    # ventana se puntúan juntas con una sola llamada al modelo. TIMEOUT:
+    # segundos que una petición espera su lote antes de responder 503
+    MICROBATCH_ENABLED = os.getenv("MICROBATCH_ENABLED", "0") == "1"
+    MICROBATCH_WINDOW_MS = float(os.getenv("MICROBATCH_WINDOW_MS", "2"))
+    MICROBATCH_MAX_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", "64"))
+    MICROBATCH_TIMEOUT = float(os.getenv("MICROBATCH_TIMEOUT", "5"))
+
+    # Almacén de predicciones por form_id ('memory' o 'sqlite')
+    PREDICTION_STORE = os.getenv("PREDICTION_STORE", "memory")
+    PREDICTION_STORE_PATH = os.getenv("PREDICTION_STORE_PATH", str(PREDICTION_STORE_PATH))
+    PREDICTION_STORE_MAX_SIZE = int(os.getenv("PREDICTION_STORE_MAX_SIZE", "10000"))
+    PREDICTION_STORE_TTL = float(os.getenv("PREDICTION_STORE_TTL", "86400"))
+
+    # Predicción por lotes (/api/predict/batch)
+    BATCH_MAX_ROWS = int(os.getenv("BATCH_MAX_ROWS", "100000"))
+
+    # Pool de procesos para lotes grandes: workers (1 = en serie), filas por
+    # trozo y tamaño mínimo del lote para repartirlo (por debajo, el coste de
+    # IPC supera la ganancia). Los workers se crean con forkserver y cargan
+    # el artefacto del modelo (memory-mapped con MODEL_MMAP=1)
+    SCORING_WORKERS = int(os.getenv("SCORING_WORKERS", "1"))
+    SCORING_CHUNK_SIZE = int(os.getenv("SCORING_CHUNK_SIZE", "20000"))
+    SCORING_MIN_PARALLEL_ROWS = int(os.getenv("SCORING_MIN_PARALLEL_ROWS", "50000"))
+
+    # Modo ASGI (asgi.py): hilos que ejecutan las vistas y peticiones que
+    # pueden esperar turno; por encima se responde 503 al momento
+    ASGI_WORKER_THREADS = int(os.getenv("ASGI_WORKER_THREADS", str(min(32, (os.cpu_count() or 1) + 4))))
+    ASGI_MAX_QUEUE = int(os.getenv("ASGI_MAX_QUEUE", "64"))
 
 
 class DevelopmentConfig(Config):
     """Configuración de desarrollo"""
     DEBUG = True
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
 
 
 class ProductionConfig(Config):
     """Configuración de producción"""
     DEBUG = False
+    SIMULATED_LATENCY = 0.0
+    MODEL_EAGER_LOAD = os.getenv("MODEL_EAGER_LOAD", "1") == "1"
+    MODEL_MMAP = os.getenv("MODEL_MMAP", "1") == "1"
+    # SQLite compartido entre los workers de Gunicorn
+    PREDICTION_STORE = os.getenv("PREDICTION_STORE", "sqlite")
 
 
 # Mapeo de configuraciones
@@ -0,0 +1,88 @@
+"""
+gunicorn.conf.py - Configuración de Gunicorn para producción
+
+El maestro importa la app (preload_app), carga el modelo, calcula la tabla
+de estadísticas y congela el heap (preload_for_fork) una sola vez; los
+workers se crean con fork y comparten esas páginas (copy-on-write).
+
+Recarga sin cortes tras desplegar un modelo nuevo en data/:
+    kill -HUP <pid del maestro>
+El maestro recarga el modelo y las estadísticas, crea los workers nuevos y
+los antiguos terminan sus peticiones en curso (graceful_timeout) antes de
+salir. Con MODEL_RELOAD_POLL > 0 el maestro vigila el fichero del modelo
+(con el mismo ModelFileWatcher que MODEL_WATCH_INTERVAL) y se envía el HUP
+él mismo.
+
+Uso (desde prediccion-salarial/):
+    gunicorn -c gunicorn.conf.py
+    WEB_CONCURRENCY=8 GUNICORN_THREADS=4 gunicorn -c gunicorn.conf.py
+"""
+
+import gc
+import os
+import signal
+import threading
+import time
+
+os.environ.setdefault('FLASK_ENV', 'production')
+
+wsgi_app = 'run:app'
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+preload_app = True
+
+# MODEL.predict es CPU y retiene el GIL casi todo el tiempo: un proceso por
+# núcleo, y unos pocos hilos por proceso para solapar la E/S de red
+workers = int(os.getenv('WEB_CONCURRENCY', str(os.cpu_count() or 1)))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '2'))
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG') or None
+errorlog = '-'
+
+# Segundos entre comprobaciones del fichero del modelo (0 = solo con HUP manual)
+MODEL_RELOAD_POLL = float(os.getenv('MODEL_RELOAD_POLL', '0'))
+
+
+def _watch_model_file(server, interval: float):
+    """
+    Envía HUP al maestro cuando cambia data/modelo_entrenado.pkl: el cambio
+    tiene que verse igual en dos comprobaciones seguidas, y un fichero cuya
+    recarga falló en on_reload no se vuelve a intentar hasta que cambie
+    """
+    from app.models.registry import ModelFileWatcher, get_model_registry
+
+    watcher = ModelFileWatcher(get_model_registry())
+    while True:
+        time.sleep(interval)
+        if watcher.poll():
+            server.log.info("Nuevo fichero de modelo detectado, recargando workers")
+            os.kill(os.getpid(), signal.SIGHUP)
+
+
+def when_ready(server):
+    # La app ya está importada (preload_app): con MODEL_EAGER_LOAD el modelo
+    # y las estadísticas ya están calculados y esto solo congela el heap
+    from app.models.predictor import load_meta, preload_for_fork
+    preload_for_fork()
+    server.log.info("Modelo %s precargado en el maestro (pid %d), %d workers x %d hilos",
+                    load_meta().get('version', 'unknown'), os.getpid(), server.cfg.workers,
+                    server.cfg.threads)
+
+    if MODEL_RELOAD_POLL > 0:
+        threading.Thread(target=_watch_model_file, args=(server, MODEL_RELOAD_POLL),
+                         name='model-watcher', daemon=True).start()
+
+
+def on_reload(server):
+    # Se ejecuta en el maestro al recibir HUP, antes de crear los workers
+    # nuevos: se heredan el modelo y las estadísticas recién calculadas
+    from app.models.predictor import load_meta, preload_for_fork
+    from app.models.registry import get_model_registry
+    gc.unfreeze()
+    get_model_registry().reload(wait=True)
+    preload_for_fork()
+    server.log.info("Modelo recargado en el maestro: %s", load_meta().get('version', 'unknown'))
@@ -1,10 +1,12 @@
 """
 run.py - Punto de entrada principal de la aplicación
+
+Servidor de desarrollo de Flask; en producción usar gunicorn.conf.py.
 """
 
 import os
 from app import create_app
-from app.models.predictor import _PREDICTOR_AVAILABLE, load_meta
+from app.models.predictor import is_model_loaded, is_predictor_available, load_meta
 
 # Crear aplicación
 app = create_app()
@@ -18,8 +20,11 @@ if __name__ == '__main__':
     print("=" * 60)
     print(f"Puerto: {port}")
     print(f"Debug: {debug}")
-    print(f"Predictor real: {'SI' if _PREDICTOR_AVAILABLE else 'NO (mock)'}")
-    print(f"Modelo: {load_meta().get('version', 'unknown')}")
+    if is_model_loaded():
+        print(f"Predictor real: {'SI' if is_predictor_available() else 'NO (mock)'}")
+        print(f"Modelo: {load_meta().get('version', 'unknown')}")
+    else:
+        print("Predictor real: carga perezosa (primera predicción)")
     print("=" * 60)
 
     app.run(
@@ -0,0 +1,175 @@
+"""
+score.py - Puntuación masiva de ficheros CSV/Parquet sin pasar por la API
+
+Lee el fichero por bloques, valida cada bloque por columnas con las reglas
+de PredictRequest (app.models.columnar), puntúa las filas válidas con el
+servicio de inferencia (repartido entre procesos con --workers) y escribe el
+resultado bloque a bloque, de modo que la memoria no depende del tamaño del
+fichero. Con --errors se guarda además un CSV con los errores por fila.
+
+Uso:
+    python score.py graduados.csv salarios.csv --chunksize 50000 --workers 4
+    python score.py graduados.csv salarios.csv --errors errores.csv
+    python score.py graduados.parquet salarios.parquet
+"""
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Iterator, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.models.columnar import validate_columns
+from app.models.predictor import ensure_model_loaded, is_predictor_available
+from app.models.service import get_inference_service
+from app.utils.logger import setup_logging
+
+logger = logging.getLogger('app.score')
+
+# Bloques más pequeños que esto se puntúan en serie aunque haya --workers
+MIN_PARALLEL_ROWS = 10000
+
+
+def _detect_format(path: Path, explicit: str = None) -> str:
+    if explicit:
+        return explicit
+    return 'parquet' if path.suffix.lower() in ('.parquet', '.pq') else 'csv'
+
+
+def read_chunks(path: Path, fmt: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    """Itera el fichero de entrada en DataFrames de como mucho `chunksize` filas"""
+    if fmt == 'parquet':
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Leer Parquet requiere pyarrow (pip install pyarrow)")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize)
+
+
+class ChunkWriter:
+    """Escribe los bloques puntuados de forma incremental (CSV o Parquet)"""
+
+    def __init__(self, path: Path, fmt: str):
+        self.path = path
+        self.fmt = fmt
+        self._parquet_writer = None
+        self._first = True
+
+    def write(self, frame: pd.DataFrame):
+        if self.fmt == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            frame.to_csv(self.path, mode='w' if self._first else 'a',
+                         header=self._first, index=False)
+        self._first = False
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+
+def score_chunk(chunk: pd.DataFrame) -> Tuple[np.ndarray, pd.DataFrame]:
+    """
+    Puntúa un bloque con InferenceService.predict_records (una llamada a
+    MODEL.predict, o repartida entre el pool de procesos con --workers).
+    Devuelve un array alineado con el bloque (NaN en las filas inválidas) y
+    los errores de validación de esas filas.
+    """
+    validation = validate_columns(chunk)
+    salaries = np.full(len(chunk), np.nan)
+    if validation.valid.any():
+        salaries[validation.valid] = get_inference_service().predict_records(validation.frame)
+    return salaries, validation.errors
+
+
+def score_file(input_path: Path, output_path: Path, chunksize: int = 50000, workers: int = 1,
+               input_format: str = None, output_format: str = None,
+               output_column: str = 'salario_predicho', errors_path: Path = None) -> dict:
+    """
+    Puntúa `input_path` y escribe `output_path`; con `errors_path` escribe
+    también los errores de validación (row es la fila del fichero, desde 0).
+    Devuelve un resumen de la ejecución.
+    """
+    ensure_model_loaded()
+    if not is_predictor_available():
+        raise SystemExit("No se pudo cargar el modelo (data/modelo_entrenado.pkl)")
+
+    input_format = _detect_format(input_path, input_format)
+    output_format = _detect_format(output_path, output_format)
+    writer = ChunkWriter(output_path, output_format)
+    errors_writer = ChunkWriter(errors_path, 'csv') if errors_path is not None else None
+
+    # Cada bloque se reparte entre los workers en trozos iguales. El proceso
+    # es de un solo hilo: los workers se crean con fork y heredan el modelo
+    service = get_inference_service()
+    service.configure_parallel_scoring(workers, chunk_size=-(-chunksize // max(workers, 1)),
+                                       min_rows=MIN_PARALLEL_ROWS, start_method='fork')
+
+    rows = invalid = 0
+    started = time.perf_counter()
+    try:
+        chunks = read_chunks(input_path, input_format, chunksize)
+        for chunk in chunks:
+            salaries, errors = score_chunk(chunk)
+            chunk[output_column] = salaries
+            writer.write(chunk)
+            if errors_writer is not None and len(errors):
+                errors_writer.write(errors.assign(row=errors['row'] + rows))
+
+            rows += len(chunk)
+            invalid += int(np.isnan(salaries).sum())
+            elapsed = time.perf_counter() - started
+            logger.info("%d filas puntuadas (%.0f filas/s)", rows, rows / elapsed if elapsed else 0.0)
+    finally:
+        writer.close()
+        if errors_writer is not None:
+            errors_writer.close()
+        service.configure_parallel_scoring(1)
+
+    elapsed = time.perf_counter() - started
+    return {
+        'rows': rows,
+        'invalid_rows': invalid,
+        'seconds': round(elapsed, 3),
+        'rows_per_second': round(rows / elapsed, 1) if elapsed else 0.0
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Puntuación masiva de graduados desde CSV o Parquet")
+    parser.add_argument('input', type=Path, help="Fichero de entrada (.csv o .parquet)")
+    parser.add_argument('output', type=Path, help="Fichero de salida (.csv o .parquet)")
+    parser.add_argument('--chunksize', type=int, default=50000, help="Filas por bloque (defecto 50000)")
+    parser.add_argument('--workers', type=int, default=1, help="Procesos de puntuación (defecto 1)")
+    parser.add_argument('--input-format', choices=['csv', 'parquet'], help="Forzar el formato de entrada")
+    parser.add_argument('--output-format', choices=['csv', 'parquet'], help="Forzar el formato de salida")
+    parser.add_argument('--output-column', default='salario_predicho',
+                        help="Nombre de la columna con la predicción")
+    parser.add_argument('--errors', type=Path, help="CSV con los errores de validación por fila")
+    parser.add_argument('--log-level', default='INFO')
+    args = parser.parse_args(argv)
+
+    setup_logging(args.log_level, fmt='text')
+    summary = score_file(args.input, args.output, chunksize=args.chunksize, workers=args.workers,
+                         input_format=args.input_format, output_format=args.output_format,
+                         output_column=args.output_column, errors_path=args.errors)
+    logger.info("Terminado: %d filas (%d inválidas) en %.1fs, %.0f filas/s",
+                summary['rows'], summary['invalid_rows'], summary['seconds'],
+                summary['rows_per_second'])
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,46 @@
+"""
+Fixtures compartidas de los tests
+"""
+import itertools
+
+import pytest
+
+from app.models.synthetic import CATEGORIES, build_synthetic_pipeline
+
+
+@pytest.fixture(scope='session')
+def synthetic_pipeline():
+    """Pipeline pequeño (ColumnTransformer + RandomForest) con el esquema real"""
+    pytest.importorskip('sklearn')
+    return build_synthetic_pipeline(n_rows=2000, n_estimators=25, max_depth=10, seed=42)
+
+
+@pytest.fixture(scope='session')
+def categorical_grid():
+    """Rejilla categórica completa con valores numéricos aleatorios por fila"""
+    np = pytest.importorskip('numpy')
+    pd = pytest.importorskip('pandas')
+
+    rows = list(itertools.product(*CATEGORIES.values()))
+    grid = pd.DataFrame(rows, columns=list(CATEGORIES))
+    rng = np.random.default_rng(7)
+    grid['Age'] = rng.integers(18, 60, len(grid)).astype(float)
+    grid['Years_Since_Graduation'] = rng.integers(0, 20, len(grid)).astype(float)
+    grid['GPA_10'] = rng.uniform(0, 10, len(grid)).round(2)
+    grid['Internship_Experience'] = rng.integers(0, 2, len(grid))
+    return grid
+
+
+@pytest.fixture
+def use_model(monkeypatch):
+    """Activa un motor de inferencia durante el test (se restaura al terminar)"""
+    from app.models import predictor
+
+    def install(engine, pipeline=None, metadata=None):
+        version = predictor.ModelVersion(pipeline if pipeline is not None else engine, engine,
+                                         metadata if metadata is not None else {"version": "test"})
+        monkeypatch.setattr(predictor, 'ACTIVE_MODEL', version)
+        monkeypatch.setattr(predictor, '_LOADED', True)
+        return version
+
+    return install
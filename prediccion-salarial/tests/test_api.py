@@ -0,0 +1,269 @@
+"""
+Tests de los endpoints de la API con el cliente de pruebas de Flask
+"""
+import importlib
+import json
+import time
+
+import pytest
+
+from app import create_app
+from app.models import service as service_module
+from app.models.service import InferenceService, PredictionCache
+from app.utils import helpers
+
+# app.routes reexporta el blueprint con el mismo nombre que el módulo
+api_module = importlib.import_module('app.routes.api')
+
+
+PAYLOAD = {
+    "nombre": "Test Usuario",
+    "edad": 28,
+    "pais": "España",
+    "genero": "Hombre",
+    "titulacion": "Master",
+    "aniosDesdeObtencion": 3,
+    "campoEstudio": "IT",
+    "nivelIngles": "Avanzado",
+    "universidadRanking": "Alto",
+    "regionEstudio": "Europa",
+    "notaMedia": 8.5,
+    "practicas": True
+}
+
+
+class FakeModel:
+    """Modelo de prueba: salario proporcional a la edad, cuenta las llamadas"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def predict(self, df):
+        self.calls += 1
+        salary = df['Age'] * 1000.0
+        if 'Country_of_Origin' in df:
+            salary = (salary
+                      + df['Country_of_Origin'].str.len() * 100
+                      + df['Education_Level'].str.len() * 10
+                      + df['Field_of_Study'].str.len()
+                      + df['Gender'].str.len() * 0.1)
+        return salary.to_numpy()
+
+
+# Parte categórica de FakeModel para PAYLOAD (Spain, Master, Computer Science, Male):
+# 5 * 100 + 6 * 10 + 16 + 4 * 0.1
+PAYLOAD_OFFSET = 576.4
+
+
+@pytest.fixture
+def fake_model(monkeypatch, use_model):
+    model = FakeModel()
+    use_model(model)
+    monkeypatch.setattr(helpers, '_STATS_TABLE', {})
+    monkeypatch.setattr(service_module, 'INFERENCE_SERVICE', InferenceService())
+    return model
+
+
+@pytest.fixture
+def client():
+    app = create_app()
+    app.config['TESTING'] = True
+    return app.test_client()
+
+
+def test_predict_batch_single_model_call(client, fake_model):
+    rows = [dict(PAYLOAD, edad=20 + i) for i in range(5)]
+    response = client.post('/api/predict/batch', json=rows)
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert fake_model.calls == 1
+    assert body['succeeded'] == 5
+    assert [r['salary'] for r in body['results']] == [
+        pytest.approx(20000.0 + 1000 * i + PAYLOAD_OFFSET) for i in range(5)]
+
+
+def test_predict_batch_reports_row_errors(client, fake_model):
+    rows = [PAYLOAD, dict(PAYLOAD, pais="Marte"), PAYLOAD]
+    response = client.post('/api/predict/batch', json=rows)
+
+    body = response.get_json()
+    assert response.status_code == 200
+    assert [r['index'] for r in body['results']] == [0, 2]
+    assert body['errors'][0]['index'] == 1
+    assert body['errors'][0]['error'] == 'validation_error'
+
+
+def test_predict_validates_raw_json_body(client, fake_model):
+    response = client.post('/api/predict', data='{no es json', content_type='application/json')
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'bad_request'
+
+    response = client.post('/api/predict', json=dict(PAYLOAD, regionEstudio="Marte"))
+    assert response.status_code == 422
+    assert response.get_json()['details'][0]['loc'] == ['regionEstudio']
+
+    response = client.post('/api/predict', data=json.dumps(PAYLOAD), content_type='text/plain')
+    assert response.status_code == 200
+    assert response.get_json()['salary'] == pytest.approx(28000.0 + PAYLOAD_OFFSET)
+
+
+def test_predict_batch_ndjson(client, fake_model):
+    lines = [json.dumps(PAYLOAD), '{no es json', json.dumps(dict(PAYLOAD, edad=30))]
+    response = client.post('/api/predict/batch', data='\n'.join(lines),
+                           content_type='application/x-ndjson')
+
+    body = response.get_json()
+    assert response.status_code == 200
+    assert [r['index'] for r in body['results']] == [0, 2]
+    assert body['errors'][0]['index'] == 1
+    assert fake_model.calls == 1
+
+
+def test_predict_without_simulated_latency(client, fake_model, monkeypatch):
+    monkeypatch.setattr(api_module.time, 'sleep', lambda s: pytest.fail("sleep inesperado"))
+    response = client.post('/api/predict', json=PAYLOAD)
+
+    assert response.status_code == 200
+    assert response.get_json()['salary'] == pytest.approx(28000.0 + PAYLOAD_OFFSET)
+
+
+def test_statistics_single_predict_matches_precomputed_table(client, fake_model):
+    filters = {"pais": "India", "formacion": "PHD", "genero": "Mujer", "campoEstudio": "Salud"}
+
+    computed = client.post('/api/statistics', json=filters).get_json()
+    assert fake_model.calls == 1
+
+    helpers.precompute_statistics_grid()
+    calls = fake_model.calls
+    looked_up = client.post('/api/statistics', json=filters).get_json()
+
+    assert fake_model.calls == calls
+    for section in ('by_country', 'by_education', 'by_field', 'by_gender'):
+        assert looked_up[section] == computed[section]
+    assert computed['by_country']['India'] == computed['by_education']['PhD']
+
+
+def test_predict_cache_hits_are_reported_in_health(client, fake_model):
+    for _ in range(3):
+        assert client.post('/api/predict', json=PAYLOAD).status_code == 200
+
+    assert fake_model.calls == 1
+    cache = client.get('/api/health').get_json()['prediction_cache']
+    assert cache['hits'] == 2
+    assert cache['misses'] == 1
+
+
+def test_prediction_cache_lru_ttl_and_version():
+    cache = PredictionCache(max_size=2, ttl=60)
+    cache.put(('a',), 1.0, 'v1')
+    cache.put(('b',), 2.0, 'v1')
+    assert cache.get(('a',), 'v1') == 1.0
+    cache.put(('c',), 3.0, 'v1')
+
+    assert cache.get(('b',), 'v1') is None
+    assert cache.evictions == 1
+    # Otra versión no ve ni sustituye las entradas: solo invalidate() cambia de versión
+    assert cache.get(('a',), 'v2') is None
+    assert cache.get(('a',), 'v1') == 1.0
+    cache.invalidate('v2')
+    assert cache.invalidations == 1
+    cache.put(('a',), 9.0, 'v1')
+    assert cache.get(('a',), 'v2') is None
+
+    cache.configure(max_size=2, ttl=-1)
+    cache.put(('a',), 1.0, 'v2')
+    assert cache.get(('a',), 'v2') is None
+    assert cache.expirations == 1
+
+
+def test_prediction_is_stored_for_api_and_views(client, fake_model):
+    body = client.post('/api/predict', json=PAYLOAD).get_json()
+    form_id = body['form_id']
+
+    assert client.get(f'/api/prediction/{form_id}').get_json()['salary'] == body['salary']
+    assert client.get(f'/formulario/resultado/{form_id}').status_code == 200
+
+
+def test_metrics_exposes_stage_histograms(client, fake_model):
+    client.post('/api/predict', json=PAYLOAD)
+    response = client.get('/api/metrics')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    text = response.get_data(as_text=True)
+    for stage in ('validation', 'translate', 'dataframe', 'model_predict',
+                  'build_comparisons', 'serialization'):
+        assert f'app_predict_stage_duration_seconds_count{{stage="{stage}"}}' in text
+    assert 'app_requests_total{endpoint="/api/predict",status="200"}' in text
+    assert 'app_prediction_cache_hit_ratio' in text
+
+
+def test_predict_returns_503_when_the_microbatcher_times_out(client, fake_model):
+    service = service_module.INFERENCE_SERVICE
+    service.configure_microbatching(True, window_ms=1, timeout=0.05)
+    service.microbatcher.score_batch = lambda items: time.sleep(0.5) or [0.0] * len(items)
+
+    response = client.post('/api/predict', json=PAYLOAD)
+    assert response.status_code == 503
+    assert response.get_json()['error'] == 'overloaded'
+    assert response.headers['Retry-After'] == '1'
+
+
+def test_admin_reload_requires_token_and_rejects_concurrent_reloads(client, fake_model, monkeypatch):
+    from app.models.registry import get_model_registry
+
+    assert client.post('/api/admin/reload-model').status_code == 403
+
+    client.application.config['ADMIN_TOKEN'] = 'secreto'
+    headers = {'X-Admin-Token': 'secreto'}
+    assert client.post('/api/admin/reload-model', headers={'X-Admin-Token': 'otro'}).status_code == 403
+
+    registry = get_model_registry()
+    registry._reload_lock.acquire()
+    try:
+        response = client.post('/api/admin/reload-model?wait=1', headers=headers)
+    finally:
+        registry._reload_lock.release()
+    assert response.status_code == 409
+    assert client.get('/api/health').get_json()['model_registry']['reloading'] is False
+
+
+def test_json_provider_serializes_numpy_and_model_info_per_version(client, use_model):
+    np = pytest.importorskip('numpy')
+
+    with client.application.app_context():
+        body = client.application.json.dumps({"salary": np.float32(1.5), "ranks": np.arange(3)})
+    assert json.loads(body) == {"salary": 1.5, "ranks": [0, 1, 2]}
+
+    use_model(FakeModel(), metadata={"version": "v1", "features": ["Age"]})
+    first = client.get('/api/model/info')
+    assert first.status_code == 200
+    assert first.get_json()["version"] == "v1"
+    assert client.get('/api/model/info').data == first.data
+
+    use_model(FakeModel(), metadata={"version": "v2"})
+    assert client.get('/api/model/info').get_json()["version"] == "v2"
+
+
+def test_predict_reports_tree_interval(client, use_model, synthetic_pipeline, monkeypatch):
+    use_model(synthetic_pipeline)
+    monkeypatch.setattr(service_module, 'INFERENCE_SERVICE', InferenceService())
+
+    assert client.post('/api/predict', json=PAYLOAD).get_json()['statistics']['interval'] is None
+
+    body = client.post('/api/predict?intervals=1', json=PAYLOAD).get_json()
+    statistics = body['statistics']
+    assert statistics['salary_range']['min'] <= body['salary'] <= statistics['salary_range']['max']
+    assert isinstance(statistics['confidence'], int)
+    assert statistics['interval']['trees'] == 25
+
+    body = client.post('/api/predict/batch?intervals=1', json=[PAYLOAD, PAYLOAD]).get_json()
+    assert body['results'][0]['salary_range'] == statistics['salary_range']
+    assert body['results'][1]['confidence'] == statistics['confidence']
+
+
+def test_predict_without_forest_has_no_confidence(client, fake_model):
+    statistics = client.post('/api/predict?intervals=1', json=PAYLOAD).get_json()['statistics']
+    assert statistics['confidence'] is None
+    assert statistics['interval'] is None
@@ -0,0 +1,92 @@
+"""
+Tests del adaptador ASGI con executor acotado
+"""
+import asyncio
+import json
+import threading
+
+from app import create_app
+from app.utils.asgi import BoundedExecutor, BoundedWsgiToAsgi, create_asgi_app
+
+
+def _call(app, method, path, body=b'', headers=()):
+    """Ejecuta una petición ASGI y devuelve (status, cabeceras, cuerpo)"""
+    async def run():
+        messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {'type': 'http', 'method': method, 'path': path, 'query_string': b'',
+                 'headers': list(headers), 'http_version': '1.1'}
+        await app(scope, receive, send)
+        return sent
+
+    sent = asyncio.run(run())
+    start = sent[0]
+    return start['status'], dict(start['headers']), b''.join(m.get('body', b'') for m in sent[1:])
+
+
+def test_flask_app_served_through_asgi():
+    application = create_asgi_app(create_app())
+
+    status, headers, content = _call(application, 'GET', '/api/health')
+
+    assert status == 200
+    assert headers[b'content-type'] == b'application/json'
+    assert json.loads(content)['asgi_executor']['max_workers'] >= 1
+
+
+def test_saturated_executor_returns_503():
+    release = threading.Event()
+
+    def slow_app(environ, start_response):
+        release.wait(5)
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        return [b'ok']
+
+    application = BoundedWsgiToAsgi(slow_app, BoundedExecutor(max_workers=1, max_queue=0))
+    busy = threading.Thread(target=_call, args=(application, 'GET', '/'))
+    busy.start()
+    while application.executor.stats()['in_flight'] == 0:
+        pass
+
+    status, headers, content = _call(application, 'GET', '/')
+    release.set()
+    busy.join()
+
+    assert status == 503
+    assert headers[b'retry-after'] == b'1'
+    assert json.loads(content)['error'] == 'overloaded'
+    assert application.executor.stats()['rejected'] == 1
+
+
+def test_disconnect_while_reading_body_skips_the_view():
+    calls = []
+
+    def app(environ, start_response):
+        calls.append(environ)
+        start_response('200 OK', [])
+        return [b'ok']
+
+    application = BoundedWsgiToAsgi(app, BoundedExecutor(max_workers=1, max_queue=0))
+    messages = [{'type': 'http.request', 'body': b'{"edad": ', 'more_body': True},
+                {'type': 'http.disconnect'}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': 'POST', 'path': '/api/predict', 'query_string': b'',
+             'headers': [], 'http_version': '1.1'}
+    asyncio.run(application(scope, receive, send))
+
+    assert calls == [] and sent == []
+    assert application.executor.stats()['completed'] == 0
@@ -0,0 +1,94 @@
+"""
+Tests del micro-batching de predicciones
+"""
+import threading
+
+import pytest
+
+from app.models.batching import MicroBatcher
+
+
+def test_concurrent_requests_are_coalesced():
+    calls = []
+
+    def score_batch(items):
+        calls.append(len(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(score_batch, window_ms=50, max_batch=64)
+    results = {}
+    barrier = threading.Barrier(16)
+
+    def worker(i):
+        barrier.wait()
+        results[i] = batcher.submit(i, timeout=5)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {i: i * 2 for i in range(16)}
+    assert len(calls) < 16
+    stats = batcher.stats()
+    assert stats['requests'] == 16
+    assert stats['batches'] == len(calls)
+    assert sum(stats['batch_size_histogram'].values()) == len(calls)
+
+
+def test_max_batch_is_respected():
+    calls = []
+    batcher = MicroBatcher(lambda items: calls.append(len(items)) or items, window_ms=50, max_batch=4)
+
+    threads = [threading.Thread(target=batcher.submit, args=(i,)) for i in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max(calls) <= 4
+    assert sum(calls) == 10
+
+
+def test_errors_are_propagated_to_every_request():
+    def score_batch(items):
+        raise RuntimeError("modelo caído")
+
+    batcher = MicroBatcher(score_batch, window_ms=1)
+    with pytest.raises(RuntimeError):
+        batcher.submit(1, timeout=5)
+
+
+def test_stalled_dispatcher_times_out_and_skips_the_request():
+    release = threading.Event()
+    scored = []
+
+    def score_batch(items):
+        release.wait(5)
+        scored.extend(items)
+        return items
+
+    batcher = MicroBatcher(score_batch, window_ms=1, timeout=0.05)
+    with pytest.raises(TimeoutError):
+        batcher.submit('atascada')
+
+    # La segunda agota su espera en la cola y ya no se puntúa
+    with pytest.raises(TimeoutError):
+        batcher.submit('en cola')
+    release.set()
+    assert batcher.submit('siguiente', timeout=5) == 'siguiente'
+    assert 'en cola' not in scored
+
+
+def test_batch_sizes_and_waits_are_exported_as_histograms():
+    from app.utils.metrics import REGISTRY
+
+    REGISTRY.reset()
+    batcher = MicroBatcher(lambda items: items, window_ms=1)
+    batcher.submit(1, timeout=5)
+
+    text = '\n'.join(REGISTRY.render())
+    assert '# TYPE app_microbatch_batch_size histogram' in text
+    assert 'app_microbatch_batch_size_bucket{le="1"} 1' in text
+    assert 'app_microbatch_wait_seconds_count 1' in text
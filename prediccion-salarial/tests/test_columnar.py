@@ -0,0 +1,59 @@
+"""
+Tests del validador por columnas (mismas reglas que PredictRequest)
+"""
+import pytest
+
+pd = pytest.importorskip('pandas')
+
+from pydantic import ValidationError  # noqa: E402
+
+from app.models.columnar import validate_columns  # noqa: E402
+from app.models.schema import PredictRequest  # noqa: E402
+
+BASE = {
+    'edad': 30, 'pais': 'India', 'genero': 'Mujer', 'titulacion': 'PHD',
+    'aniosDesdeObtencion': 4, 'campoEstudio': 'Salud', 'nivelIngles': 'Fluido',
+    'universidadRanking': 'Medio', 'regionEstudio': 'USA', 'notaMedia': 7.5, 'practicas': True
+}
+
+
+def test_validate_columns_matches_predict_request():
+    rows = [
+        BASE,
+        dict(BASE, edad=17),
+        dict(BASE, edad=100),
+        dict(BASE, notaMedia=10.5),
+        dict(BASE, aniosDesdeObtencion=-1),
+        dict(BASE, pais='Marte'),
+        dict(BASE, nivelIngles='avanzado'),
+        dict(BASE, regionEstudio='Asia'),
+        dict(BASE, edad=None),
+        dict(BASE, aniosDesdeObtencion=None),
+    ]
+    result = validate_columns(pd.DataFrame(rows))
+
+    expected = []
+    for row in rows:
+        try:
+            PredictRequest(**{key: value for key, value in row.items() if value is not None})
+            expected.append(True)
+        except ValidationError:
+            expected.append(False)
+    assert result.valid.tolist() == expected
+    assert sorted(set(result.errors['row'])) == [i for i, ok in enumerate(expected) if not ok]
+
+    # Las celdas vacías de campos con valor por defecto lo toman, como en el esquema
+    assert result.frame['anios_desde_obtencion'].tolist() == [4.0, 4.0, 2.0]
+    assert list(result.features().columns)[0] == 'Age'
+
+
+def test_batch_translator_parses_practicas_text():
+    from app.utils.helpers import translate_features_batch_to_english
+
+    base = PredictRequest(**BASE).model_dump(exclude={'nombre'})
+    values = [True, False, 'False', 'no', 'sí', '1', 0]
+    frame = translate_features_batch_to_english([dict(base, practicas=v) for v in values])
+    assert frame['Internship_Experience'].tolist() == [1, 0, 0, 0, 1, 1, 0]
+
+    with pytest.raises(ValueError, match='practicas'):
+        translate_features_batch_to_english([dict(base, practicas='quizás')])
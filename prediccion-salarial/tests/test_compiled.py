@@ -0,0 +1,62 @@
+"""
+Tests del motor de inferencia compilado (paridad con sklearn)
+"""
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from app.models.compiled import CompiledPipeline
+
+
+def test_parity_on_full_categorical_grid(synthetic_pipeline, categorical_grid):
+    compiled = CompiledPipeline.from_pipeline(synthetic_pipeline)
+
+    expected = synthetic_pipeline.predict(categorical_grid)
+    assert np.array_equal(compiled.predict(categorical_grid), expected)
+
+
+def test_preprocessor_matches_column_transformer(synthetic_pipeline, categorical_grid):
+    compiled = CompiledPipeline.from_pipeline(synthetic_pipeline)
+
+    expected = synthetic_pipeline[:-1].transform(categorical_grid.head(500))
+    if hasattr(expected, 'toarray'):
+        expected = expected.toarray()
+    assert np.array_equal(compiled.transform(categorical_grid.head(500)), expected)
+
+
+def test_unknown_category_is_ignored_like_sklearn(synthetic_pipeline, categorical_grid):
+    compiled = CompiledPipeline.from_pipeline(synthetic_pipeline)
+    frame = categorical_grid.head(3).copy()
+    frame['Country_of_Origin'] = 'Atlantis'
+
+    assert np.array_equal(compiled.predict(frame), synthetic_pipeline.predict(frame))
+
+
+def test_encoding_table_matches_translated_pipeline(synthetic_pipeline):
+    import itertools
+    import random
+
+    from app.models.schema import CATEGORICAL_VALUES
+    from app.utils.helpers import translate_features_batch_to_english
+
+    compiled = CompiledPipeline.from_pipeline(synthetic_pipeline)
+    assert compiled.encoding is not None
+
+    rng = random.Random(3)
+    combos = list(itertools.product(*CATEGORICAL_VALUES.values()))
+    payloads = []
+    for combo in rng.sample(combos, 300):
+        data = dict(zip(CATEGORICAL_VALUES, combo))
+        data.update(edad=rng.randint(18, 60), anios_desde_obtencion=rng.randint(0, 20),
+                    nota_media=round(rng.uniform(0, 10), 2), practicas=rng.random() < 0.5)
+        payloads.append(data)
+
+    encoded = np.vstack([compiled.encode_request(data) for data in payloads])
+    expected = synthetic_pipeline.predict(translate_features_batch_to_english(payloads))
+    assert np.array_equal(compiled.predict_encoded(encoded), expected)
+
+
+def test_encoding_table_falls_back_on_unknown_value(synthetic_pipeline):
+    compiled = CompiledPipeline.from_pipeline(synthetic_pipeline)
+
+    assert compiled.encode_request({'pais': 'Marte'}) is None
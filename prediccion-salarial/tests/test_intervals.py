@@ -0,0 +1,55 @@
+"""
+Tests de los intervalos de predicción a partir de los árboles del bosque
+"""
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from app.models.compiled import CompiledPipeline  # noqa: E402
+from app.models.service import InferenceService  # noqa: E402
+from app.utils.helpers import translate_features_batch_to_english  # noqa: E402
+
+DATA = {
+    'edad': 30, 'pais': 'India', 'genero': 'Mujer', 'titulacion': 'PHD',
+    'anios_desde_obtencion': 4, 'campo_estudio': 'Salud', 'nivel_ingles': 'Fluido',
+    'universidad_ranking': 'Medio', 'region_estudio': 'Australia', 'nota_media': 9.1,
+    'practicas': False
+}
+
+
+def test_tree_predictions_match_each_estimator(synthetic_pipeline, categorical_grid):
+    compiled = CompiledPipeline.from_pipeline(synthetic_pipeline)
+    frame = categorical_grid.head(200)
+    X = compiled.transform(frame)
+
+    per_tree = compiled.forest.tree_predictions(X)
+    expected = np.column_stack([tree.predict(X.astype(np.float32))
+                                for tree in synthetic_pipeline.steps[-1][1].estimators_])
+    assert np.array_equal(per_tree, expected)
+
+
+@pytest.mark.parametrize('backend', ['sklearn', 'compiled'])
+def test_interval_is_cached_with_the_prediction(backend, use_model, synthetic_pipeline):
+    engine = (synthetic_pipeline if backend == 'sklearn'
+              else CompiledPipeline.from_pipeline(synthetic_pipeline))
+    use_model(engine, pipeline=synthetic_pipeline)
+    service = InferenceService()
+
+    salary, interval = service.predict_with_interval(DATA)
+    assert salary == float(synthetic_pipeline.predict(translate_features_batch_to_english([DATA]))[0])
+    assert interval['min'] <= salary <= interval['max']
+    assert 0 <= interval['confidence'] <= 100
+    assert interval['trees'] == 25
+
+    # Predicción e intervalo se guardan en entradas separadas de la cache
+    assert service.predict_with_interval(DATA) == (salary, interval)
+    assert service.predict(DATA) == salary
+    assert service.cache.stats()['hits'] == 3
+
+    batch = service.predict_intervals_frame(translate_features_batch_to_english([DATA, DATA]))
+    assert batch['salary'].tolist() == [salary, salary]
+    assert batch['min'][1] == interval['min']
+
+    service.configure_intervals(False)
+    assert service.predict_with_interval(DATA) == (salary, None)
+    assert service.predict_intervals_frame(translate_features_batch_to_english([DATA])) is None
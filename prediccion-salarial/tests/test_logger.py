@@ -0,0 +1,103 @@
+"""
+Tests del logging estructurado (formato JSON, niveles por módulo y listener)
+"""
+import json
+import logging
+import os
+import sys
+
+import pytest
+
+from app.utils import logger as logger_module
+from app.utils.logger import JSONFormatter, parse_levels, setup_logging
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    """
+    configure(level, levels) llama a setup_logging y redirige la salida del
+    listener a un fichero; al terminar se restaura el logger 'app'
+    """
+    app_logger = logging.getLogger('app')
+    saved = (app_logger.handlers, app_logger.level, app_logger.propagate)
+    path = tmp_path / 'app.log'
+
+    with open(path, 'w', encoding='utf-8') as stream:
+        def configure(level, levels=None):
+            setup_logging(level, levels)
+            logger_module._LISTENER.handlers[0].setStream(stream)
+
+        yield path, configure
+        logger_module._stop_listener()
+
+    app_logger.handlers, app_logger.level, app_logger.propagate = saved
+    for name in ('app.routes.api', 'app.models'):
+        logging.getLogger(name).setLevel(logging.NOTSET)
+
+
+def _read(path):
+    return [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+
+
+def test_json_formatter_includes_extra_fields_and_exception():
+    record = logging.LogRecord('app.routes.api', logging.ERROR, __file__, 1,
+                               "Prediccion %s", ('fallida',), None)
+    record.request_data = {'edad': 30}
+    record._private = 'oculto'
+    try:
+        raise RuntimeError("modelo caído")
+    except RuntimeError:
+        record.exc_info = sys.exc_info()
+
+    entry = json.loads(JSONFormatter().format(record))
+    assert entry['level'] == 'ERROR'
+    assert entry['logger'] == 'app.routes.api'
+    assert entry['message'] == 'Prediccion fallida'
+    assert entry['request_data'] == {'edad': 30}
+    assert '_private' not in entry
+    assert 'RuntimeError: modelo caído' in entry['exc_info']
+
+
+def test_parse_levels():
+    assert parse_levels(" app.routes.api = debug,app.models=WARNING,,basura") == {
+        'app.routes.api': 'DEBUG', 'app.models': 'WARNING'}
+    assert parse_levels('') == {}
+
+
+def test_module_levels_override_the_global_level(log_file):
+    path, configure = log_file
+    configure('INFO', parse_levels('app.routes.api=DEBUG,app.models=WARNING'))
+
+    logging.getLogger('app.utils.helpers').debug("descartado")
+    logging.getLogger('app.utils.helpers').info("global", extra={'form_id': 'f1'})
+    logging.getLogger('app.routes.api').debug("detalle de la ruta")
+    logging.getLogger('app.models.service').info("descartado")
+    logging.getLogger('app.models.service').warning("aviso")
+    logger_module._stop_listener()
+
+    entries = _read(path)
+    assert [entry['message'] for entry in entries] == ['global', 'detalle de la ruta', 'aviso']
+    assert entries[0]['form_id'] == 'f1'
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="requiere os.fork")
+def test_listener_is_restarted_in_forked_child(log_file):
+    path, configure = log_file
+    configure('INFO')
+    parent_listener = logger_module._LISTENER
+
+    pid = os.fork()
+    if pid == 0:
+        # Hijo: sin el listener nuevo este registro se quedaría en la cola
+        status = 1
+        try:
+            if logger_module._LISTENER is not parent_listener:
+                logging.getLogger('app.worker').info("desde el hijo")
+                logger_module._stop_listener()
+                status = 0
+        finally:
+            os._exit(status)
+
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert [entry['message'] for entry in _read(path)] == ['desde el hijo']
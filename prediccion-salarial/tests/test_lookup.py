@@ -0,0 +1,141 @@
+"""
+Tests de la tabla exacta de predicciones (paridad con sklearn)
+"""
+import itertools
+import random
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from app.models.compiled import CompiledForest, CompiledPipeline  # noqa: E402
+from app.models.lookup import LookupTable, LookupTooLarge  # noqa: E402
+from app.models.synthetic import build_synthetic_pipeline  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def small_pipeline():
+    """Bosque pequeño: su tabla ocupa ~1 MB"""
+    pytest.importorskip('sklearn')
+    return build_synthetic_pipeline(n_rows=500, n_estimators=3, max_depth=4, seed=11)
+
+
+def _payloads(n, seed=5):
+    from app.models.schema import CATEGORICAL_VALUES
+
+    rng = random.Random(seed)
+    combos = list(itertools.product(*CATEGORICAL_VALUES.values()))
+    payloads = []
+    for combo in rng.sample(combos, n):
+        data = dict(zip(CATEGORICAL_VALUES, combo))
+        data.update(edad=rng.uniform(18, 60), anios_desde_obtencion=rng.randint(0, 20),
+                    nota_media=round(rng.uniform(0, 10), 2), practicas=rng.random() < 0.5)
+        payloads.append(data)
+    return payloads
+
+
+def test_lookup_matches_pipeline_including_threshold_edges(tmp_path, small_pipeline):
+    from app.utils.helpers import translate_features_batch_to_english
+
+    compiled = CompiledPipeline.from_pipeline(small_pipeline)
+    table = LookupTable.build(compiled, tmp_path / 'tabla.npy')
+    assert isinstance(table.values, np.memmap)
+
+    payloads = _payloads(400)
+    encoded = np.vstack([compiled.encode_request(data) for data in payloads])
+    expected = small_pipeline.predict(translate_features_batch_to_english(payloads))
+    assert np.array_equal(table.predict_encoded(encoded, compiled.forest), expected)
+
+    # Valores numéricos justo en cada umbral y en el float32 siguiente
+    forest_model = small_pipeline.steps[-1][1]
+    for _, position, thresholds, _ in table.numeric:
+        for threshold in thresholds:
+            for value in (threshold, np.nextafter(threshold, np.float32(np.inf))):
+                rows = encoded[:20].copy()
+                rows[:, position] = value
+                assert np.array_equal(table.predict_encoded(rows, compiled.forest),
+                                      forest_model.predict(rows.astype(np.float32)))
+
+
+def test_lookup_is_rejected_for_another_model_or_when_too_large(tmp_path, small_pipeline):
+    compiled = CompiledPipeline.from_pipeline(small_pipeline)
+    LookupTable.build(compiled, tmp_path / 'tabla.npy')
+
+    other = CompiledPipeline.from_pipeline(
+        build_synthetic_pipeline(n_rows=500, n_estimators=3, max_depth=4, seed=12))
+    assert LookupTable.load(other, tmp_path / 'tabla.npy') is None
+    assert LookupTable.load(compiled, tmp_path / 'tabla.npy') is not None
+
+    # Sidecar nuevo con el tensor anterior (escritura interrumpida entre los dos pasos)
+    np.save(tmp_path / 'tabla.npy', np.load(tmp_path / 'tabla.npy') + 1.0)
+    assert LookupTable.load(compiled, tmp_path / 'tabla.npy') is None
+
+    with pytest.raises(LookupTooLarge):
+        LookupTable.build(compiled, tmp_path / 'grande.npy', max_mb=0.01)
+    assert not (tmp_path / 'grande.npy').exists()
+
+
+def test_lookup_backend_serves_service_predictions(tmp_path, monkeypatch, use_model, small_pipeline):
+    from app.models import lookup, predictor
+    from app.models.service import InferenceService
+
+    LookupTable.build(CompiledPipeline.from_pipeline(small_pipeline), tmp_path / 'tabla.npy')
+    monkeypatch.setattr(lookup, 'LOOKUP_FILE', tmp_path / 'tabla.npy')
+    monkeypatch.setattr(predictor, 'INFERENCE_BACKEND', 'lookup')
+
+    engine = predictor.build_inference_engine(small_pipeline)
+    assert engine.lookup is not None
+    use_model(engine, small_pipeline)
+
+    service = InferenceService()
+    for data in _payloads(20, seed=9):
+        assert service.predict(data) == service.predict_records([data])[0]
+
+
+def test_api_predict_reads_the_lookup_table(tmp_path, monkeypatch, use_model, small_pipeline):
+    from app import create_app
+    from app.models import lookup, predictor, service as service_module
+    from app.models.service import InferenceService
+    from app.utils import helpers
+
+    LookupTable.build(CompiledPipeline.from_pipeline(small_pipeline), tmp_path / 'tabla.npy')
+    monkeypatch.setattr(lookup, 'LOOKUP_FILE', tmp_path / 'tabla.npy')
+    monkeypatch.setattr(predictor, 'INFERENCE_BACKEND', 'lookup')
+    use_model(predictor.build_inference_engine(small_pipeline), small_pipeline)
+
+    client = create_app().test_client()
+    service = InferenceService()
+    service.configure_microbatching(True, window_ms=1.0)
+    monkeypatch.setattr(service_module, 'INFERENCE_SERVICE', service)
+    monkeypatch.setattr(helpers, '_STATS_TABLE', {})
+
+    reads, walks = [], []
+    predict_encoded = LookupTable.predict_encoded
+    tree_predictions = CompiledForest.tree_predictions
+
+    def spy_lookup(self, X, forest):
+        reads.append(len(X))
+        return predict_encoded(self, X, forest)
+
+    def spy_trees(self, X, *args, **kwargs):
+        walks.append(len(X))
+        return tree_predictions(self, X, *args, **kwargs)
+
+    monkeypatch.setattr(LookupTable, 'predict_encoded', spy_lookup)
+    monkeypatch.setattr(CompiledForest, 'tree_predictions', spy_trees)
+
+    data = _payloads(1, seed=3)[0]
+    expected = service.predict_records([data])[0]
+
+    # Sin ?intervals=1 basta con la tabla: no se recorre ningún árbol
+    body = client.post('/api/predict', json=dict(data, nombre='Test')).get_json()
+    assert reads == [1] and walks == []
+    assert body['salary'] == pytest.approx(expected)
+    assert body['statistics']['interval'] is None
+
+    body = client.post('/api/predict?intervals=1', json=dict(data, nombre='Test')).get_json()
+    assert reads == [1, 1] and walks == [1]
+    assert body['salary'] == pytest.approx(expected)
+    assert body['statistics']['interval']['trees'] == 3
+    # Las predicciones de los árboles para el intervalo pasan por el micro-batcher
+    assert service.microbatcher.stats()['requests'] == 1
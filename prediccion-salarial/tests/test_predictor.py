@@ -0,0 +1,286 @@
+"""
+Tests del módulo predictor
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).parent.parent
+
+
+def test_import_is_lazy():
+    """Importar el predictor no debe cargar pandas/sklearn ni el modelo"""
+    code = (
+        "import sys; import app.models.predictor as p; "
+        "print('pandas' in sys.modules, 'sklearn' in sys.modules, p.is_model_loaded())"
+    )
+    output = subprocess.run([sys.executable, '-c', code], cwd=PROJECT_DIR,
+                            capture_output=True, text=True, check=True).stdout
+
+    assert output.strip().splitlines()[-1] == 'False False False'
+
+
+def test_mmap_artifact_roundtrip(tmp_path, monkeypatch):
+    import pickle
+
+    import numpy as np
+
+    from app.models import predictor
+
+    table = np.arange(20000, dtype=float)
+    with open(tmp_path / 'modelo.pkl', 'wb') as file:
+        pickle.dump({'table': table}, file)
+
+    monkeypatch.setattr(predictor, 'MODEL_FILE', tmp_path / 'modelo.pkl')
+    monkeypatch.setattr(predictor, 'MODEL_MMAP_FILE', tmp_path / 'modelo.joblib')
+    monkeypatch.setattr(predictor, 'USE_MMAP', True)
+
+    loaded = predictor._read_model_artifact()
+
+    assert (tmp_path / 'modelo.joblib').exists()
+    assert isinstance(loaded['table'], np.memmap)
+    assert not loaded['table'].flags.writeable
+    assert np.array_equal(loaded['table'], table)
+
+
+def test_predict_frame_parallel_matches_serial(monkeypatch, use_model, synthetic_pipeline,
+                                              categorical_grid):
+    import numpy as np
+
+    from app.models import predictor
+    from app.models.service import InferenceService
+
+    use_model(synthetic_pipeline)
+    monkeypatch.setattr(predictor, 'preload_for_fork', lambda: None)
+
+    service = InferenceService()
+    service.configure_parallel_scoring(2, chunk_size=4000, min_rows=5000, start_method='fork')
+    try:
+        scorer = service.parallel
+        assert not scorer.should_parallelize(len(categorical_grid) // 10)
+        assert scorer.should_parallelize(len(categorical_grid))
+
+        parallel = service.predict_frame(categorical_grid)
+        assert scorer._pool is not None
+    finally:
+        service.configure_parallel_scoring(1)
+
+    np.testing.assert_allclose(parallel, synthetic_pipeline.predict(categorical_grid))
+
+
+def test_app_scoring_pool_does_not_fork_the_server(monkeypatch):
+    import pytest
+
+    from app.models import parallel, predictor
+
+    created = []
+    monkeypatch.setattr(predictor, 'preload_for_fork',
+                        lambda: pytest.fail("preload_for_fork desde una petición"))
+    monkeypatch.setattr(parallel, 'ProcessPoolExecutor',
+                        lambda **kwargs: created.append(kwargs) or object())
+
+    active = predictor.ModelVersion(None, None, None, signature=(1, 2, None))
+    parallel.ParallelScorer(2)._get_pool(active)
+    assert created[0]['mp_context'].get_start_method() in ('forkserver', 'spawn')
+    assert created[0]['initargs'][-1] == (1, 2, None)
+
+
+def _use_model_files(monkeypatch, data_dir):
+    from app.models import predictor
+
+    monkeypatch.setattr(predictor, 'MODEL_FILE', data_dir / 'modelo_entrenado.pkl')
+    monkeypatch.setattr(predictor, 'META_FILE', data_dir / 'metadata.json')
+    monkeypatch.setattr(predictor, 'MODEL_MMAP_FILE', data_dir / 'modelo_entrenado.joblib')
+    monkeypatch.setattr(predictor, 'USE_MMAP', False)
+    monkeypatch.setattr(predictor, 'INFERENCE_BACKEND', 'sklearn')
+
+
+def test_scoring_worker_loads_the_artifact_without_statistics(tmp_path, monkeypatch):
+    import pytest
+
+    from app.models import parallel, predictor
+    from app.models.synthetic import write_synthetic_model
+    from app.utils import helpers
+
+    write_synthetic_model(tmp_path, n_rows=300, n_estimators=3)
+    _use_model_files(monkeypatch, tmp_path)
+    monkeypatch.setattr(predictor, '_LOADED', False)
+    monkeypatch.setattr(parallel, '_WORKER_MODEL', (None, None))
+    monkeypatch.setattr(helpers, 'calculate_average_salaries_from_model',
+                        lambda: pytest.fail("estadísticas en un worker de puntuación"))
+
+    paths = (str(tmp_path / 'modelo_entrenado.pkl'), str(tmp_path / 'metadata.json'),
+             str(tmp_path / 'modelo_entrenado.joblib'))
+    parallel._init_worker(False, 'sklearn', paths, predictor.model_file_signature())
+
+    signature, engine = parallel._WORKER_MODEL
+    assert signature == predictor.model_file_signature()
+    assert engine is not None
+    assert predictor.is_model_loaded() is False
+
+
+def test_pool_rejects_another_model_and_in_memory_models(tmp_path, monkeypatch, use_model,
+                                                         synthetic_pipeline, categorical_grid):
+    import dataclasses
+
+    import numpy as np
+    import pytest
+
+    from app.models import parallel, predictor
+    from app.models.synthetic import write_synthetic_model
+
+    # Modelo solo en memoria: los workers no podrían cargarlo, no se crea el pool
+    memory = use_model(synthetic_pipeline)
+    scorer = parallel.ParallelScorer(2, chunk_size=2000, min_rows=1000)
+    monkeypatch.setattr(scorer, '_get_pool', lambda active: pytest.fail("pool sin modelo en disco"))
+    np.testing.assert_allclose(scorer.predict(memory, categorical_grid),
+                               synthetic_pipeline.predict(categorical_grid))
+
+    # La versión de la petición no es la que hay en disco: se puntúa en serie
+    # con la de la petición y el pool no se vuelve a crear para ella
+    write_synthetic_model(tmp_path, n_rows=300, n_estimators=3)
+    _use_model_files(monkeypatch, tmp_path)
+    stale = use_model(synthetic_pipeline)
+    stale = dataclasses.replace(stale, signature=(0, 0, None), uid='antigua')
+    monkeypatch.setattr(predictor, 'ACTIVE_MODEL', stale)
+
+    scorer = parallel.ParallelScorer(2, chunk_size=2000, min_rows=1000)
+    try:
+        np.testing.assert_allclose(scorer.predict(stale, categorical_grid),
+                                   synthetic_pipeline.predict(categorical_grid))
+        assert scorer._failed_version is stale
+        assert scorer._pool is None
+        assert not scorer._usable(stale)
+    finally:
+        scorer.shutdown()
+
+
+def test_all_entry_points_share_the_inference_service(monkeypatch, use_model, synthetic_pipeline):
+    from app.models import predictor, service as service_module
+    from app.models.schema import PredictRequest
+    from app.models.service import InferenceService
+    from app.utils.helpers import translate_features_batch_to_english
+
+    use_model(synthetic_pipeline)
+    service = InferenceService()
+    monkeypatch.setattr(service_module, 'INFERENCE_SERVICE', service)
+
+    data = {
+        'edad': 30, 'pais': 'India', 'genero': 'Mujer', 'titulacion': 'PHD',
+        'anios_desde_obtencion': 4, 'campo_estudio': 'Salud', 'nivel_ingles': 'Fluido',
+        'universidad_ranking': 'Medio', 'region_estudio': 'Australia', 'nota_media': 9.1,
+        'practicas': False
+    }
+    # Petición real: la acepta el esquema de /api/predict
+    assert PredictRequest(**data).model_dump(exclude={'nombre'}) == data
+    legacy = dict(data, anios_desde_titulo=4)
+    del legacy['anios_desde_obtencion']
+
+    expected = float(synthetic_pipeline.predict(translate_features_batch_to_english([data]))[0])
+    assert service.predict(data) == expected
+    assert predictor.predict_one(legacy) == expected
+    assert service.predict_records([data])[0] == expected
+    assert service.cache.stats()['hits'] == 1
+
+
+def test_synthetic_model_is_deterministic_and_loadable(tmp_path, monkeypatch):
+    import json
+
+    import pytest
+
+    from app.models import predictor
+    from app.models.synthetic import write_synthetic_model
+
+    first = write_synthetic_model(tmp_path / 'a', n_rows=300, n_estimators=3)
+    second = write_synthetic_model(tmp_path / 'b', n_rows=300, n_estimators=3)
+    assert first.read_bytes() == second.read_bytes()
+    with pytest.raises(FileExistsError):
+        write_synthetic_model(tmp_path / 'a', n_rows=300, n_estimators=3)
+
+    monkeypatch.setattr(predictor, 'MODEL_FILE', first)
+    monkeypatch.setattr(predictor, 'USE_MMAP', False)
+    model = predictor._read_model_artifact()
+    metadata = json.loads((tmp_path / 'a' / 'metadata.json').read_text())
+    assert list(model.feature_names_in_) == metadata['features']
+
+
+def test_hot_reload_swaps_model_and_pins_in_flight_version(tmp_path, monkeypatch):
+    from app.models import predictor, service as service_module
+    from app.models.registry import ModelFileWatcher, ModelRegistry
+    from app.models.service import InferenceService
+    from app.models.synthetic import generate_features, write_synthetic_model
+    from app.utils import helpers
+
+    model_file = write_synthetic_model(tmp_path, n_rows=300, n_estimators=2, seed=1)
+    monkeypatch.setattr(predictor, 'ACTIVE_MODEL', predictor.ACTIVE_MODEL)
+    monkeypatch.setattr(predictor, '_LOADED', False)
+    monkeypatch.setattr(predictor, 'MODEL_FILE', model_file)
+    monkeypatch.setattr(predictor, 'META_FILE', tmp_path / 'metadata.json')
+    monkeypatch.setattr(predictor, 'USE_MMAP', False)
+    monkeypatch.setattr(helpers, '_STATS_TABLE', {})
+    monkeypatch.setattr(helpers, '_STATS_CACHE', dict(helpers._STATS_CACHE))
+    service = InferenceService()
+    monkeypatch.setattr(service_module, 'INFERENCE_SERVICE', service)
+
+    data = {
+        'edad': 30, 'pais': 'India', 'genero': 'Mujer', 'titulacion': 'PHD',
+        'anios_desde_obtencion': 4, 'campo_estudio': 'Salud', 'nivel_ingles': 'Fluido',
+        'universidad_ranking': 'Medio', 'region_estudio': 'Australia', 'nota_media': 9.1,
+        'practicas': False
+    }
+    old = service.active_model()
+    old_salary = service.predict(data)
+    old_table = helpers._STATS_TABLE
+
+    write_synthetic_model(tmp_path, n_rows=300, n_estimators=3, seed=2, force=True)
+    registry = ModelRegistry()
+    new = registry.reload(wait=True)
+
+    assert new is service.active_model() and new is not old
+    assert new.pipeline.named_steps['model'].n_estimators == 3
+    assert new.signature == predictor.model_file_signature()
+    assert helpers._STATS_TABLE is not old_table
+    assert service.cache.stats()['model_version'] == new.uid
+    # Una petición que empezó con la versión anterior termina con ella
+    assert service.predict(data, old) == old_salary
+    frame = generate_features(5, seed=3)
+    assert (service.predict_frame(frame, old) == old.engine.predict(frame)).all()
+    assert service.predict(data) == float(new.engine.predict(service.prepare_frame([data]))[0])
+    assert registry.stats()['reloads'] == 1
+
+    # Un fichero corrupto no sustituye al modelo activo
+    model_file.write_bytes(b'no es un pickle')
+    assert registry.reload(wait=True) is None
+    assert service.active_model() is new
+    assert registry.stats()['failures'] == 1
+
+    # La vigilancia no vuelve a intentar el fichero que falló...
+    watcher = ModelFileWatcher(registry)
+    assert registry.failed_signature == predictor.model_file_signature()
+    assert [watcher.poll() for _ in range(3)] == [False, False, False]
+
+    # ...y un fichero nuevo solo cuenta cuando se ve igual dos veces seguidas
+    write_synthetic_model(tmp_path, n_rows=300, n_estimators=4, seed=3, force=True)
+    assert [watcher.poll(), watcher.poll(), watcher.poll()] == [False, True, False]
+    assert registry.reload(wait=True) is not None
+    assert registry.failed_signature is None
+    assert watcher.poll() is False
+
+
+def test_logging_listener_restarts_after_fork():
+    """Un worker creado con fork (preload_app) sigue escribiendo sus logs"""
+    code = (
+        "import os, logging\n"
+        "from app.utils.logger import setup_logging, _stop_listener\n"
+        "setup_logging('INFO', fmt='text')\n"
+        "pid = os.fork()\n"
+        "if pid == 0:\n"
+        "    logging.getLogger('app.worker').info('desde el hijo')\n"
+        "    _stop_listener()\n"
+        "    os._exit(0)\n"
+        "os.waitpid(pid, 0)\n"
+    )
+    output = subprocess.run([sys.executable, '-c', code], cwd=PROJECT_DIR,
+                            capture_output=True, text=True, check=True).stdout
+
+    assert 'desde el hijo' in output
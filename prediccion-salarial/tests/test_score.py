@@ -0,0 +1,42 @@
+"""
+Tests del CLI de puntuación masiva (score.py)
+"""
+import pytest
+
+pd = pytest.importorskip('pandas')
+
+import score  # noqa: E402
+from app.models.columnar import validate_columns  # noqa: E402
+from app.utils.helpers import translate_features_batch_to_english  # noqa: E402
+
+
+def test_score_file_streams_chunks_and_flags_invalid_rows(tmp_path, use_model, synthetic_pipeline):
+    use_model(synthetic_pipeline)
+
+    rows = [{
+        'edad': 25 + i % 10, 'pais': 'España', 'genero': 'Mujer', 'titulacion': 'Master',
+        'aniosDesdeObtencion': 2, 'campoEstudio': 'IT', 'nivelIngles': 'Avanzado',
+        'universidadRanking': 'Alto', 'regionEstudio': 'Europa', 'notaMedia': 8.0,
+        'practicas': 'Sí' if i % 2 else 'No'
+    } for i in range(25)]
+    rows[3]['edad'] = 'desconocida'
+
+    rows[17]['pais'] = 'Marte'
+    pd.DataFrame(rows).to_csv(tmp_path / 'entrada.csv', index=False)
+
+    summary = score.score_file(tmp_path / 'entrada.csv', tmp_path / 'salida.csv', chunksize=10,
+                               errors_path=tmp_path / 'errores.csv')
+
+    result = pd.read_csv(tmp_path / 'salida.csv')
+    assert summary['rows'] == 25
+    assert summary['invalid_rows'] == 2
+    assert len(result) == 25
+    assert result['salario_predicho'].isna().tolist() == [i in (3, 17) for i in range(25)]
+
+    errors = pd.read_csv(tmp_path / 'errores.csv')
+    assert errors[['row', 'field', 'error']].values.tolist() == [
+        [3, 'edad', 'float_parsing'], [17, 'pais', 'literal_error']]
+
+    expected = synthetic_pipeline.predict(
+        translate_features_batch_to_english(validate_columns(pd.DataFrame(rows[:1])).frame))
+    assert result['salario_predicho'][0] == pytest.approx(expected[0])
@@ -0,0 +1,62 @@
+"""
+Tests de los almacenes de predicciones
+"""
+import pytest
+
+from app.models.store import MemoryPredictionStore, PredictionStore, SQLitePredictionStore
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def make_store(request, tmp_path):
+    def factory(**kwargs):
+        if request.param == 'sqlite':
+            return SQLitePredictionStore(tmp_path / 'predictions.sqlite', evict_every=1, **kwargs)
+        return MemoryPredictionStore(**kwargs)
+    return factory
+
+
+def test_roundtrip(make_store):
+    store = make_store()
+    store.put('pred_1', {'salary': 41000.5, 'comparisons': {'pais': {'user': 'España'}}})
+
+    assert store.get('pred_1') == {'salary': 41000.5, 'comparisons': {'pais': {'user': 'España'}}}
+    assert store.get('pred_2') is None
+
+
+def test_size_eviction_keeps_newest(make_store):
+    store = make_store(max_size=2)
+    for i in range(3):
+        store.put(f'pred_{i}', {'salary': i})
+
+    assert len(store) == 2
+    assert store.get('pred_0') is None
+    assert store.get('pred_2') == {'salary': 2}
+
+
+def test_ttl_expiration(make_store):
+    store = make_store(ttl=-1)
+    store.put('pred_1', {'salary': 1})
+
+    assert store.get('pred_1') is None
+
+
+def test_sqlite_store_is_shared_between_instances(tmp_path):
+    path = tmp_path / 'predictions.sqlite'
+    SQLitePredictionStore(path).put('pred_1', {'salary': 1})
+
+    assert SQLitePredictionStore(path).get('pred_1') == {'salary': 1}
+
+
+def test_incomplete_backend_fails_on_creation():
+    class WithoutLen(PredictionStore):
+        def get(self, form_id):
+            return None
+
+        def put(self, form_id, prediction):
+            pass
+
+        def clear(self):
+            pass
+
+    with pytest.raises(TypeError):
+        WithoutLen()